@@ -0,0 +1,399 @@
+
+##################################################
+## VISUAL RUBIK'S CUBE SOLVER - BENCHMARK
+
+# Measures the throughput (frames/sec), the latency per frame (percentiles)
+# and the accuracy against the ground truth of the pipeline, using synthetic
+# frames (see SyntheticCube.py). The stages measured are:
+# detection      - FindRectangles (crop, HSV, mask, filter, contours)
+# classification - IdentifyPosCol + CreateMatrix
+# lattice        - FitLattice + ClassifyLattice (also on the frames without 9 rectangles)
+# loop           - CubeSession.ProcessFrame while scanning and solving a cube
+# simulation     - CubeSimulator over a batch of random scrambles and their inverses
+
+# Usage: python Benchmark.py [--frames 300] [--scenario noisy] [--output results.json]
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+import numpy as np
+from rubik_solver.Cubie import Cube
+from rubik_solver.Move import Move
+from ColorClassifier import ColorTable
+from CubeVision import ColorRanges, CalibrationError, DetectBatch, FindRectangles, FrameDetection, IdentifyPosCol, CreateMatrix
+from FrameBuffers import FrameBuffers, NO_BUFFERS
+from LatticeFit import FitLattice, ClassifyLattice
+from CubeSession import CubeSession, SolveError
+from CubeSimulator import SelfTest
+from SyntheticCube import RenderFace, RandomColors, RandomPose
+
+
+#----------------------------------------------------------------------------------------------------------
+# Scenarios - Conditions of the synthetic frames. Jitter is the amount of random pose (see RandomPose).
+#----------------------------------------------------------------------------------------------------------
+
+SCENARIOS = {
+	'clean':  {'Jitter': 0.0, 'Noise': 0.0, 'Blur': 0.0, 'Lighting': 1.0, 'Gradient': 0.0},
+	'noisy':  {'Jitter': 0.5, 'Noise': 6.0, 'Blur': 0.8, 'Lighting': 1.0, 'Gradient': 0.0},
+	'tilted': {'Jitter': 1.0, 'Noise': 3.0, 'Blur': 0.5, 'Lighting': 1.0, 'Gradient': 0.0},
+	'dim':    {'Jitter': 0.5, 'Noise': 4.0, 'Blur': 0.5, 'Lighting': 0.85, 'Gradient': 0.3},
+}
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# Render - Renders one face with the conditions of the scenario.
+#----------------------------------------------------------------------------------------------------------
+
+def Render(Colors, Scenario, Rng):
+
+	Conditions = dict(SCENARIOS[Scenario])
+	Pose = RandomPose(Rng, Conditions.pop('Jitter'))
+
+	return RenderFace(Colors, Rng=Rng, **Pose, **Conditions)
+
+#----------------------------------------------------------------------------------------------------------
+# RandomFrames - N frames of random faces with their ground truth.
+#----------------------------------------------------------------------------------------------------------
+
+def RandomFrames(N, Scenario, Rng):
+
+	return [Render(RandomColors(Rng.choice(list('bgyorw')), Rng), Scenario, Rng) for i in range(N)]
+
+#----------------------------------------------------------------------------------------------------------
+# Latency - Frames/sec and latency percentiles (ms) of a list of durations in seconds.
+#----------------------------------------------------------------------------------------------------------
+
+def Latency(Times):
+
+	if len(Times) == 0:
+		return {'samples': 0}
+
+	Times = np.array(Times)*1000
+
+	return {'samples': len(Times),
+			'fps': 1000/Times.mean(),
+			'mean_ms': Times.mean(),
+			'p50_ms': np.percentile(Times, 50),
+			'p90_ms': np.percentile(Times, 90),
+			'p99_ms': np.percentile(Times, 99),
+			'max_ms': Times.max()}
+
+#----------------------------------------------------------------------------------------------------------
+# BenchmarkDetection - Times FindRectangles. A frame is detected when exactly 9 rectangles are found.
+#					 - Returns the results and the detections (needed by the classification benchmark).
+#					 - Scale < 1 is the pyramid detection (see FindRectangles).
+#----------------------------------------------------------------------------------------------------------
+
+def BenchmarkDetection(Frames, Table, Scale=1.0):
+
+	Times = []
+	Detections = []
+
+	for frame, Truth in Frames:
+		frame = frame.copy()
+		Start = time.perf_counter()
+		f_c, hsv, Labels, mask, Rectangles = FindRectangles(frame, Table, Scale=Scale)
+		Times.append(time.perf_counter() - Start)
+		Detections.append((hsv, Labels, Rectangles, Truth))
+
+	Result = Latency(Times)
+	Result['detection_rate'] = np.mean([len(Rectangles) == 9 for hsv, Labels, Rectangles, Truth in Detections])
+
+	return Result, Detections
+
+#----------------------------------------------------------------------------------------------------------
+# BenchmarkClassification - Times IdentifyPosCol + CreateMatrix on the detected faces and compares the
+#						  - colors and central points with the ground truth. A face is correct when its 9
+#						  - colors are correct and every central point is within Tolerance pixels.
+#----------------------------------------------------------------------------------------------------------
+
+def BenchmarkClassification(Detections, Table, Tolerance=4):
+
+	Times = []
+	Faces = []
+	Stickers = []
+
+	for hsv, Labels, Rectangles, Truth in Detections:
+		if len(Rectangles) != 9:
+			continue
+
+		Start = time.perf_counter()
+		try:
+			Colors, Points = IdentifyPosCol(Rectangles, hsv, Table)
+			MatrixColors, MatrixPoints = CreateMatrix(Points, Colors)
+		except CalibrationError:
+			MatrixColors = None
+		Times.append(time.perf_counter() - Start)
+
+		if MatrixColors is None:
+			Faces.append(False)
+			Stickers.append(0.0)
+			continue
+
+		Correct = (MatrixColors == Truth['colors']) & (np.abs(MatrixPoints - Truth['points']).max(axis=2) <= Tolerance)
+		Faces.append(Correct.all())
+		Stickers.append(Correct.mean())
+
+	Result = Latency(Times)
+	Result['face_accuracy'] = np.mean(Faces) if Faces else 0.0
+	Result['sticker_accuracy'] = np.mean(Stickers) if Stickers else 0.0
+
+	return Result
+
+#----------------------------------------------------------------------------------------------------------
+# BenchmarkLattice - Times FitLattice + ClassifyLattice on all the frames, whatever the number of rectangles
+#				   - found, and compares the result with the ground truth as BenchmarkClassification.
+#				   - lock_rate is the fraction of the frames where a grid was fitted.
+#----------------------------------------------------------------------------------------------------------
+
+def BenchmarkLattice(Detections, Table, Tolerance=4):
+
+	Times = []
+	Locked = []
+	Faces = []
+	Stickers = []
+
+	for hsv, Labels, Rectangles, Truth in Detections:
+		Start = time.perf_counter()
+		Lattice = FitLattice(Rectangles)
+		if Lattice is not None:
+			MatrixColors, Confidence = ClassifyLattice(Lattice, hsv, Labels, Table)
+		Times.append(time.perf_counter() - Start)
+		Locked.append(Lattice is not None)
+
+		if Lattice is None:
+			Faces.append(False)
+			Stickers.append(0.0)
+			continue
+
+		Correct = (MatrixColors == Truth['colors']) & (np.abs(Lattice.MatrixPoints - Truth['points']).max(axis=2) <= Tolerance)
+		Faces.append(Correct.all())
+		Stickers.append(Correct.mean())
+
+	Result = Latency(Times)
+	Result['lock_rate'] = np.mean(Locked)
+	Result['face_accuracy'] = np.mean(Faces) if Faces else 0.0
+	Result['sticker_accuracy'] = np.mean(Stickers) if Stickers else 0.0
+
+	return Result
+
+#----------------------------------------------------------------------------------------------------------
+# BenchmarkBatch - Times DetectBatch on all the frames at once (reported per frame) and compares the faces
+#				 - found with the ground truth as BenchmarkClassification, over all the frames.
+#----------------------------------------------------------------------------------------------------------
+
+def BenchmarkBatch(Frames, Table, Tolerance=4):
+
+	Batch = np.stack([frame for frame, Truth in Frames])
+
+	Start = time.perf_counter()
+	MatrixColors, MatrixPoints, Found = DetectBatch(Batch, Table)
+	Elapsed = time.perf_counter() - Start
+
+	Faces = [f and (c == Truth['colors']).all() and (np.abs(p - Truth['points']).max() <= Tolerance) for c, p, f, (frame, Truth) in zip(MatrixColors, MatrixPoints, Found, Frames)]
+
+	Result = Latency([Elapsed/len(Frames)]*len(Frames))
+	Result['face_accuracy'] = np.mean(Faces)
+
+	return Result
+
+#----------------------------------------------------------------------------------------------------------
+# FrameAllocations - Memory allocated (bytes, traced by tracemalloc) while Step runs on each frame, after
+#				   - Warmup frames. The peak is reported as well as what is kept, so the temporary images
+#				   - that are freed before the frame ends are counted too.
+#----------------------------------------------------------------------------------------------------------
+
+def FrameAllocations(Frames, Step, Warmup=5):
+
+	Peaks = []
+	tracemalloc.start()
+
+	for frame in Frames:
+		tracemalloc.reset_peak()
+		Before = tracemalloc.get_traced_memory()[0]
+		Step(frame)
+		Peaks.append(tracemalloc.get_traced_memory()[1] - Before)
+
+	tracemalloc.stop()
+	Peaks = np.array(Peaks[Warmup:])
+
+	return {'median_bytes': float(np.median(Peaks)), 'max_bytes': float(Peaks.max())}
+
+#----------------------------------------------------------------------------------------------------------
+# BenchmarkAllocations - Memory allocated per frame by the image stages (FindRectangles) and by the whole
+#					   - detection (grid and colors) with and without preallocated buffers (see FrameBuffers).
+#					   - With buffers what remains is not images: the contours of findContours for the image
+#					   - stages, plus the arrays of the grid fit and the sticker colors for the detection.
+#----------------------------------------------------------------------------------------------------------
+
+def BenchmarkAllocations(Frames, Table):
+
+	Frames = [frame.copy() for frame, Truth in Frames]
+	Result = {}
+
+	for Name, Buffers in (('allocating', NO_BUFFERS), ('buffered', FrameBuffers())):
+		Result[Name] = {'images': FrameAllocations(Frames, lambda frame: FindRectangles(frame, Table, Buffers=Buffers)),
+						'detection': FrameAllocations(Frames, lambda frame: FrameDetection(frame, Table, Buffers=Buffers).Read())}
+
+	return Result
+
+#----------------------------------------------------------------------------------------------------------
+# ScrambledCube - Faces (U, L, F, R, B, D) of a cube scrambled with a few random movements. The scramble
+#				- is kept short so the Kociemba's search does not dominate the loop benchmark.
+#----------------------------------------------------------------------------------------------------------
+
+def ScrambledCube(Moves, Seed):
+
+	random.seed(Seed)
+	c = Cube()
+	for i in range(Moves):
+		c.move(Move(random.choice('UDLRFB') + random.choice(["", "'", "2"])))
+	s = c.to_naive_cube().get_cube()
+
+	return {Face: np.array(list(s[9*i:9*i+9])).reshape(3,3) for i, Face in enumerate('ULFRBD')}
+
+#----------------------------------------------------------------------------------------------------------
+# BenchmarkLoop - Times CubeSession.ProcessFrame while a synthetic user shows the six faces of a scrambled
+#				- cube (FramesPerFace frames each, then one empty frame) and then holds the red face. The
+#				- frame that runs the Kociemba's search is reported apart, as 'solve'. With AutoCalibrate the
+#				- colors are calibrated from the scanned faces (see Calibration).
+#----------------------------------------------------------------------------------------------------------
+
+def BenchmarkLoop(Table, Scenario, Rng, Sessions=1, FramesPerFace=30, Scramble=8, AutoCalibrate=False):
+
+	Times = []
+	SolveTimes = []
+	Scanned = []
+
+	for n in range(Sessions):
+		Faces = ScrambledCube(Scramble, int(Rng.integers(1<<30)))
+		Sequence = []
+		for Face in 'FDRLBU':
+			Sequence += [Render(Faces[Face], Scenario, Rng)[0] for i in range(FramesPerFace)]
+			Sequence.append(np.zeros_like(Sequence[-1]))
+		Sequence += [Render(Faces['F'], Scenario, Rng)[0] for i in range(FramesPerFace)]
+
+		Session = CubeSession(Table, BannerFrames=1, ReadyFrames=1, SolvedFrames=1, AutoCalibrate=AutoCalibrate)
+		for frame in Sequence:
+			Start = time.perf_counter()
+			try:
+				Events = Session.ProcessFrame(frame)
+			except (CalibrationError, SolveError):
+				break
+			Elapsed = time.perf_counter() - Start
+
+			if any(e['event'] == 'solution' for e in Events):
+				SolveTimes.append(Elapsed)
+			else:
+				Times.append(Elapsed)
+
+		Scanned.append(np.mean([Session.Faces.get(Face) == ''.join(Faces[Face].ravel()) for Face in 'FDRLBU']))
+
+	Result = Latency(Times)
+	Result['solve'] = Latency(SolveTimes)
+	Result['scan_accuracy'] = np.mean(Scanned)
+
+	return Result
+
+#----------------------------------------------------------------------------------------------------------
+# BenchmarkSimulation - Time of the simulation of a batch of Cubes scrambles (see CubeSimulator.SelfTest).
+#----------------------------------------------------------------------------------------------------------
+
+def BenchmarkSimulation(Rng, Cubes=10000, Length=25):
+
+	Passed, Microseconds = SelfTest(Cubes, Length, Rng)
+
+	return {'cubes': Cubes, 'moves': Length, 'passed': Passed, 'us_per_cube': Microseconds}
+
+#----------------------------------------------------------------------------------------------------------
+# RunBenchmark - Runs all the benchmarks of a scenario and returns their results.
+#----------------------------------------------------------------------------------------------------------
+
+def RunBenchmark(Frames=300, Scenario='noisy', Seed=0, Sessions=1, Table=None):
+
+	if Table is None:
+		Table = ColorTable(ColorRanges())
+
+	Rng = np.random.default_rng(Seed)
+	Synthetic = RandomFrames(Frames, Scenario, Rng)
+
+	Detection, Detections = BenchmarkDetection(Synthetic, Table)
+	Pyramid, PyramidDetections = BenchmarkDetection(Synthetic, Table, Scale=0.5)
+
+	return {'scenario': Scenario,
+			'detection': Detection,
+			'classification': BenchmarkClassification(Detections, Table),
+			'lattice': BenchmarkLattice(Detections, Table),
+			'pyramid': Pyramid,
+			'pyramid_lattice': BenchmarkLattice(PyramidDetections, Table),
+			'batch': BenchmarkBatch(Synthetic, Table),
+			'allocations': BenchmarkAllocations(Synthetic[:50], Table),
+			'loop': BenchmarkLoop(Table, Scenario, Rng, Sessions),
+			'calibrated': BenchmarkLoop(Table, Scenario, Rng, Sessions, AutoCalibrate=True),
+			'simulation': BenchmarkSimulation(Rng)}
+
+#----------------------------------------------------------------------------------------------------------
+# Report - Prints the results as a table.
+#----------------------------------------------------------------------------------------------------------
+
+def Report(Results):
+
+	print(f"Scenario: {Results['scenario']}")
+	print(f"{'stage':<16}{'fps':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}   accuracy")
+
+	for Stage, Accuracy in (('detection', 'detection_rate'), ('classification', 'face_accuracy'), ('lattice', 'face_accuracy'), ('pyramid', 'detection_rate'), ('pyramid_lattice', 'face_accuracy'), ('batch', 'face_accuracy'), ('loop', 'scan_accuracy'), ('calibrated', 'scan_accuracy')):
+		r = Results[Stage]
+		if r['samples'] == 0:
+			print(f'{Stage:<16}{"no samples":>10}')
+			continue
+		print(f"{Stage:<16}{r['fps']:>10.1f}{r['p50_ms']:>10.3f}{r['p90_ms']:>10.3f}{r['p99_ms']:>10.3f}   {Accuracy} {r[Accuracy]:.3f}")
+
+	Solve = Results['loop']['solve']
+	if Solve['samples']:
+		print(f"{'solve':<16}{'':>10}{Solve['p50_ms']:>10.3f}")
+
+	Simulation = Results['simulation']
+	print(f"{'simulation':<16}{Simulation['us_per_cube']:>10.2f} us/cube ({Simulation['cubes']} cubes of {Simulation['moves']} moves, {'passed' if Simulation['passed'] else 'FAILED'})")
+
+	print(f"{'allocations':<16}{'images':>20}{'detection':>20}   (bytes/frame, median / max)")
+	for Name, r in Results['allocations'].items():
+		print(f"{Name:<16}" + ''.join(f"{r[Stage]['median_bytes']:>10.0f}{r[Stage]['max_bytes']:>10.0f}" for Stage in ('images', 'detection')))
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# MAIN
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+if __name__ == '__main__':
+
+	Parser = argparse.ArgumentParser(description="Benchmark of the Visual Rubik's Cube Solver with synthetic frames")
+	Parser.add_argument('--frames', type=int, default=300, help='synthetic frames for the detection and classification benchmarks')
+	Parser.add_argument('--sessions', type=int, default=1, help='scanned cubes for the loop benchmark')
+	Parser.add_argument('--scenario', default='all', choices=['all'] + list(SCENARIOS), help='conditions of the frames')
+	Parser.add_argument('--seed', type=int, default=0)
+	Parser.add_argument('--output', default=None, help='write the results to this JSON file')
+	Args = Parser.parse_args()
+
+	Scenarios = list(SCENARIOS) if Args.scenario == 'all' else [Args.scenario]
+	Results = []
+
+	for Scenario in Scenarios:
+		Results.append(RunBenchmark(Args.frames, Scenario, Args.seed, Args.sessions))
+		Report(Results[-1])
+		print()
+
+	if Args.output:
+		with open(Args.output, 'w') as f:
+			json.dump(Results, f, indent=2, default=float)
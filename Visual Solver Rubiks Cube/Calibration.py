@@ -0,0 +1,276 @@
+
+##################################################
+## CALIBRATION
+
+# Automatic color calibration of the Visual Rubik's Cube Solver. While the
+# faces are scanned, the 54 stickers are sampled without using the color
+# ranges (any bright sticker is found, see BrightnessTable). Once the six
+# faces are sampled, the stickers are clustered in the CIE Lab space into six
+# groups of nine, each seeded by (and holding) the central sticker of one
+# face. Each group is labelled with a color, and tight HSV ranges are derived
+# from the stickers of each color so the rest of the session is classified
+# with the lighting of the scan.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import collections
+import itertools
+import cv2
+import numpy as np
+from ColorClassifier import COLORS, ColorTable
+
+
+#----------------------------------------------------------------------------------------------------------
+# Reference colors (BGR) - Usual color of each sticker, used to name the groups when the current color
+# ranges do not recognise them.
+#----------------------------------------------------------------------------------------------------------
+
+REFERENCE_BGR = {'b': (200, 80, 0),
+				 'g': (60, 180, 0),
+				 'y': (0, 220, 230),
+				 'o': (0, 120, 255),
+				 'r': (40, 20, 200),
+				 'w': (235, 235, 235)}
+
+#----------------------------------------------------------------------------------------------------------
+# Brightness - Minimum V of a sticker while the colors are not calibrated (the plastic of the cube is dark).
+#----------------------------------------------------------------------------------------------------------
+
+BRIGHTNESS = 80
+
+#----------------------------------------------------------------------------------------------------------
+# Tables - Color tables built once per process and shared by every session (each one takes 16 MB).
+#----------------------------------------------------------------------------------------------------------
+
+TABLES = {}
+
+#----------------------------------------------------------------------------------------------------------
+# Range margins - Added to the HSV values observed for each color (H, S, V). A color whose stickers have a
+# saturation below GREY_SATURATION (white) accepts any hue.
+#----------------------------------------------------------------------------------------------------------
+
+RANGE_MARGIN = np.array([8, 50, 60])
+GREY_SATURATION = 70
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# BrightnessTable - Table that marks every bright pixel as a sticker, used to find the stickers before the
+#				  - colors are calibrated. It is built on the first call only (see TABLES).
+#----------------------------------------------------------------------------------------------------------
+
+def BrightnessTable():
+
+	if 'Brightness' not in TABLES:
+		TABLES['Brightness'] = ColorTable([('w', np.array([0, 0, BRIGHTNESS]), np.array([255, 255, 255]))])
+
+	return TABLES['Brightness']
+
+#----------------------------------------------------------------------------------------------------------
+# HsvToLab - CIE Lab values (float) of a (N,3) array of HSV values.
+#----------------------------------------------------------------------------------------------------------
+
+def HsvToLab(Values):
+
+	hsv = np.clip(np.asarray(Values), 0, 255).astype(np.uint8).reshape(1,-1,3)
+	Lab = cv2.cvtColor(cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR), cv2.COLOR_BGR2Lab)
+
+	return Lab.reshape(-1,3).astype(np.float64)
+
+#----------------------------------------------------------------------------------------------------------
+# StickerSampler - Samples the 9 stickers of the face shown over the last Frames frames. The face is
+#				 - stable when no sticker moved more than Spread (Lab units) from its median, and frames
+#				 - without a face are skipped up to MaxGap in a row.
+#----------------------------------------------------------------------------------------------------------
+
+class StickerSampler:
+
+	def __init__(self, Frames=5, Spread=10.0, MaxGap=3):
+
+		self.Frames = Frames
+		self.Spread = Spread
+		self.MaxGap = MaxGap
+		self.Samples = collections.deque(maxlen=Frames)
+		self.Gap = 0
+
+	def Reset(self):
+
+		self.Samples.clear()
+		self.Gap = 0
+
+	#------------------------------------------------------------------------------------------------------
+	# Add - HSV values (9,3) of the stickers in one frame, in row-major order.
+	#------------------------------------------------------------------------------------------------------
+
+	def Add(self, Values):
+
+		self.Samples.append(np.asarray(Values, np.float64))
+		self.Gap = 0
+
+	def Miss(self):
+
+		self.Gap = self.Gap + 1
+		if self.Gap > self.MaxGap:
+			self.Reset()
+
+	#------------------------------------------------------------------------------------------------------
+	# Stable - True when the last Frames samples agree.
+	#------------------------------------------------------------------------------------------------------
+
+	def Stable(self):
+
+		if len(self.Samples) < self.Frames:
+			return False
+
+		Lab = HsvToLab(np.concatenate(self.Samples)).reshape(self.Frames, 9, 3)
+		Distance = np.linalg.norm(Lab - np.median(Lab, axis=0), axis=2)
+
+		return Distance.max() < self.Spread
+
+	#------------------------------------------------------------------------------------------------------
+	# Face - Median HSV value (9,3) of each sticker over the samples.
+	#------------------------------------------------------------------------------------------------------
+
+	def Face(self):
+		return np.median(np.array(self.Samples), axis=0)
+
+#----------------------------------------------------------------------------------------------------------
+# BalancedAssignment - Assigns each sample to a cluster so every cluster gets exactly Size samples, with a
+#					 - low total distance: greedy by distance, then improved by swapping pairs of samples.
+#					 - Pinned maps a sample to the cluster it must belong to (none by default).
+#----------------------------------------------------------------------------------------------------------
+
+def BalancedAssignment(Distances, Size, Pinned=None):
+
+	Pinned = {} if Pinned is None else Pinned
+	n, k = Distances.shape
+	Labels = np.full(n, -1)
+	Count = np.zeros(k, int)
+
+	for i, c in Pinned.items():
+		Labels[i] = c
+		Count[c] += 1
+
+	for Flat in np.argsort(Distances, axis=None):
+		i, c = divmod(int(Flat), k)
+		if (Labels[i] < 0) and (Count[c] < Size):
+			Labels[i] = c
+			Count[c] += 1
+
+	Free = [i for i in range(n) if i not in Pinned]
+	Improved = True
+	while Improved:
+		Improved = False
+		for a, b in itertools.combinations(Free, 2):
+			ca, cb = Labels[a], Labels[b]
+			if (ca != cb) and (Distances[a,cb] + Distances[b,ca] < Distances[a,ca] + Distances[b,cb] - 1e-9):
+				Labels[a], Labels[b] = cb, ca
+				Improved = True
+
+	return Labels
+
+#----------------------------------------------------------------------------------------------------------
+# ConstrainedKMeans - K-means with clusters of exactly Size samples, seeded by the samples in Seeds (one per
+#					- cluster, which always stay in their cluster). Returns the cluster of each sample and the
+#					- centroids.
+#----------------------------------------------------------------------------------------------------------
+
+def ConstrainedKMeans(Samples, Seeds, Size=9, Iterations=20):
+
+	Centroids = Samples[Seeds].copy()
+	Pinned = {Seed: c for c, Seed in enumerate(Seeds)}
+	Labels = None
+
+	for Iteration in range(Iterations):
+		Distances = np.linalg.norm(Samples[:,None,:] - Centroids[None,:,:], axis=2)
+		New = BalancedAssignment(Distances, Size, Pinned)
+		if (Labels is not None) and (New == Labels).all():
+			break
+		Labels = New
+		Centroids = np.array([Samples[Labels == c].mean(axis=0) for c in range(len(Seeds))])
+
+	return Labels, Centroids
+
+#----------------------------------------------------------------------------------------------------------
+# NameClusters - Color of each cluster. The permutation of the six colors chosen is the one that agrees with
+#			   - the most stickers classified by the current Table; ties are broken by the distance of the
+#			   - centroids to REFERENCE_BGR.
+#----------------------------------------------------------------------------------------------------------
+
+def NameClusters(Values, Labels, Centroids, Table):
+
+	Letters = list(REFERENCE_BGR)
+	Reference = cv2.cvtColor(np.uint8([[REFERENCE_BGR[c] for c in Letters]]), cv2.COLOR_BGR2Lab)[0].astype(np.float64)
+
+	Classified = np.array(COLORS)[Table.ClassifyValues(Values)]
+	Votes = np.array([[np.sum(Classified[Labels == c] == Letter) for Letter in Letters] for c in range(len(Centroids))])
+	Distances = np.linalg.norm(Centroids[:,None,:] - Reference[None,:,:], axis=2)
+	Score = 1000*Votes - Distances
+
+	Best = max(itertools.permutations(range(len(Letters))), key=lambda p: Score[np.arange(len(p)), p].sum())
+
+	return [Letters[j] for j in Best]
+
+#----------------------------------------------------------------------------------------------------------
+# TightRanges - HSV ranges (in the format of ColorTable) covering the stickers of each color plus
+#			  - RANGE_MARGIN. Hues that wrap around 0 (red) are split in two ranges. The chromatic colors come
+#			  - first so they win the overlaps with white.
+#----------------------------------------------------------------------------------------------------------
+
+def TightRanges(Values, Letters):
+
+	Ranges = []
+	Letters = np.asarray(Letters)
+
+	for Color in sorted(set(Letters.tolist()), key=lambda c: (c == 'w', COLORS.index(c))):
+		v = Values[Letters == Color]
+		Lower = np.clip(v.min(axis=0) - RANGE_MARGIN, 0, 255).astype(int)
+		Upper = np.clip(v.max(axis=0) + RANGE_MARGIN, 0, 255).astype(int)
+		Upper[2] = 255
+
+		if np.median(v[:,1]) < GREY_SATURATION:
+			Lower[0], Upper[0] = 0, 179
+			Ranges.append((Color, Lower, Upper))
+			continue
+
+		# Hue wrap: the low hues of a red around 0 are shifted above 180
+		h = v[:,0].copy()
+		if h.max() - h.min() > 90:
+			h[h < 90] += 180
+		Low, High = int(h.min() - RANGE_MARGIN[0]), int(h.max() + RANGE_MARGIN[0])
+
+		if Low < 0:
+			Low, High = Low + 180, High + 180
+		if High > 179:
+			Ranges.append((Color, np.array([Low, Lower[1], Lower[2]]), np.array([179, Upper[1], Upper[2]])))
+			Low, High = 0, High - 180
+		Lower[0], Upper[0] = Low, High
+		Ranges.append((Color, Lower, Upper))
+
+	return Ranges
+
+#----------------------------------------------------------------------------------------------------------
+# CalibrateScan - Calibrates the colors from the sampled faces: Faces is the list of the six (9,3) HSV
+#				- arrays of the stickers of each face. Returns the color of each sticker (one 9 letters
+#				- string per face) and the tight ranges. Table is the current classifier, used to name the
+#				- clusters.
+#----------------------------------------------------------------------------------------------------------
+
+def CalibrateScan(Faces, Table):
+
+	Values = np.concatenate(Faces)
+	Lab = HsvToLab(Values)
+	Seeds = [9*f + 4 for f in range(len(Faces))]
+
+	Labels, Centroids = ConstrainedKMeans(Lab, Seeds)
+	Names = NameClusters(Values, Labels, Centroids, Table)
+	Letters = np.array(Names)[Labels]
+
+	return [''.join(Letters[9*f:9*f+9]) for f in range(len(Faces))], TightRanges(Values, Letters)
@@ -0,0 +1,200 @@
+
+##################################################
+## COLOR CLASSIFIER
+
+# Lookup-table colour classifier for the Visual Rubik's Cube Solver.
+# The HSV calibration ranges are compiled once into a table that maps every
+# HSV value to a colour label, so a whole frame is classified in one pass
+# instead of one cv2.inRange call per colour.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import cv2
+import numpy as np
+from FrameBuffers import NO_BUFFERS
+
+
+#----------------------------------------------------------------------------------------------------------
+# Labels - Label 0 is reserved for pixels outside every calibrated range ('Z', the same letter used by
+#		 - IdentifyPosCol for an unknown colour). The remaining labels follow the priority used by
+#		 - IdentifyPosCol: when the ranges overlap, the first colour of the list wins.
+#----------------------------------------------------------------------------------------------------------
+
+COLORS = ['Z','b','g','y','o','r','w']
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# ColorTable - HSV --> label lookup table compiled from the calibration ranges.
+#			 - Ranges is a list of (color, lower, upper) with the colors of COLORS, a color can appear more
+#			 - than once (e.g. the two white ranges).
+#			 - Quantization drops the lower bits of each channel to shrink the table (0 keeps the full
+#			 - 256x256x256 table, 16MB). A quantized cell is labelled when any of its values is in range.
+#----------------------------------------------------------------------------------------------------------
+
+class ColorTable:
+
+	def __init__(self, Ranges, Quantization=0):
+
+		self.Ranges = [(Color, np.array(Lower), np.array(Upper)) for Color, Lower, Upper in Ranges]
+		self.Quantization = Quantization
+		self.Bits = 8 - Quantization
+
+		Size = 1 << self.Bits
+		Table = np.zeros((Size,Size,Size), np.uint8)
+
+		# Lowest priority first so the first range of the list is written last and wins the overlaps
+		for Color, Lower, Upper in reversed(self.Ranges):
+			Lower = np.clip(Lower, 0, 255) >> Quantization
+			Upper = np.clip(Upper, 0, 255) >> Quantization
+			Table[Lower[0]:Upper[0]+1, Lower[1]:Upper[1]+1, Lower[2]:Upper[2]+1] = COLORS.index(Color)
+
+		self.Table = Table.ravel()
+
+		# Stacked range table (K ranges) to classify a few HSV values at once
+		self.Lower = np.array([Lower for Color, Lower, Upper in self.Ranges])
+		self.Upper = np.array([Upper for Color, Lower, Upper in self.Ranges])
+		self.RangeLabels = np.array([COLORS.index(Color) for Color, Lower, Upper in self.Ranges], np.uint8)
+
+	#------------------------------------------------------------------------------------------------------
+	# Classify - Returns a uint8 image with the label of each pixel of the HSV image. The full table is
+	#		   - indexed without arithmetic: the H, S and V bytes are copied (cv2.mixChannels) into the low
+	#		   - bytes of an 8 byte integer per pixel, which is the index h<<16 | s<<8 | v on a little endian
+	#		   - machine. The index and the labels are written into Buffers (see FrameBuffers).
+	#------------------------------------------------------------------------------------------------------
+
+	def Classify(self, hsv, Buffers=NO_BUFFERS):
+
+		if self.Quantization or (not np.little_endian):
+			return self.ClassifyShifted(hsv)
+
+		Shape = hsv.shape[:2]
+		Index = Buffers.View('index', Shape + (np.dtype(np.intp).itemsize,))
+		if Index is None:
+			Index = np.zeros(Shape + (np.dtype(np.intp).itemsize,), np.uint8)
+		Labels = Buffers.View('labels', Shape)
+
+		cv2.mixChannels([np.ascontiguousarray(hsv)], [Index], [2,0, 1,1, 0,2])
+
+		return np.take(self.Table, Index.view(np.intp).reshape(Shape), out=Labels, mode='clip')
+
+	#------------------------------------------------------------------------------------------------------
+	# ClassifyShifted - Classify for the quantized tables: the index is built by shifting each channel.
+	#------------------------------------------------------------------------------------------------------
+
+	def ClassifyShifted(self, hsv):
+
+		q = self.Quantization
+		b = self.Bits
+
+		Index = (hsv[...,0] >> q).astype(np.intp) << (2*b)
+		Index |= (hsv[...,1] >> q).astype(np.intp) << b
+		Index |= hsv[...,2] >> q
+
+		return np.take(self.Table, Index)
+
+	#------------------------------------------------------------------------------------------------------
+	# ClassifyValues - Returns the label of each row of a (N,3) array of HSV values. All the values are
+	#				 - compared against all the stacked ranges at once, the first range that matches wins.
+	#------------------------------------------------------------------------------------------------------
+
+	def ClassifyValues(self, Values):
+
+		Values = np.asarray(Values)[:,None,:]
+		Inside = ((self.Lower <= Values) & (Values <= self.Upper)).all(axis=2)
+		Labels = self.RangeLabels[Inside.argmax(axis=1)]
+
+		return np.where(Inside.any(axis=1), Labels, 0).astype(np.uint8)
+
+#----------------------------------------------------------------------------------------------------------
+# Mask - Combined mask (255 where the pixel has any cube color, 0 otherwise) derived from the labels,
+#	   - written into Out when given.
+#----------------------------------------------------------------------------------------------------------
+
+def Mask(Labels, Out=None):
+	return cv2.compare(Labels, 0, cv2.CMP_GT, dst=Out)
+
+#----------------------------------------------------------------------------------------------------------
+# ColorMask - Mask of a single color (e.g. 'r') derived from the labels. Required to calibrate the colors.
+#----------------------------------------------------------------------------------------------------------
+
+def ColorMask(Labels, Color):
+	return cv2.compare(Labels, COLORS.index(Color), cv2.CMP_EQ)
+
+#----------------------------------------------------------------------------------------------------------
+# Centroids - Central point of each quadrilateral (same result as cv2.moments) computed for all the
+#			- rectangles at once with the shoelace formula.
+#----------------------------------------------------------------------------------------------------------
+
+def Centroids(Rect_l):
+
+	Quads = np.array([Rect.reshape(-1,2) for Rect in Rect_l], np.float64)
+	x, y = Quads[...,0], Quads[...,1]
+	xn, yn = np.roll(x,-1,axis=1), np.roll(y,-1,axis=1)
+
+	Cross = x*yn - xn*y
+	Area = Cross.sum(axis=1)/2
+	Degenerate = np.abs(Area) < 1e-9
+	Area[Degenerate] = 1
+
+	cX = ((x+xn)*Cross).sum(axis=1)/(6*Area)
+	cY = ((y+yn)*Cross).sum(axis=1)/(6*Area)
+
+	# Flat polygons have no area, the mean of the vertices is used instead
+	cX[Degenerate] = x[Degenerate].mean(axis=1)
+	cY[Degenerate] = y[Degenerate].mean(axis=1)
+
+	return np.stack((cX,cY),axis=1)
+
+#----------------------------------------------------------------------------------------------------------
+# Patches - Pixels of the (2*Radius+1)x(2*Radius+1) patch around each point of an image (HSV or labels),
+#		  - as an array (points, pixels, ...). The patches are clipped to the image. With Frames, Image is
+#		  - a stack of images (N, H, W, ...) and Frames gives the image of each point.
+#----------------------------------------------------------------------------------------------------------
+
+def Patches(Image, Points, Radius=4, Frames=None):
+
+	Points = np.asarray(Points, np.intp)
+	Offsets = np.arange(-Radius, Radius+1)
+	Height, Width = Image.shape[:2] if Frames is None else Image.shape[1:3]
+
+	ys = np.clip(Points[:,1,None,None] + Offsets[None,:,None], 0, Height-1)
+	xs = np.clip(Points[:,0,None,None] + Offsets[None,None,:], 0, Width-1)
+
+	if Frames is None:
+		return Image[ys, xs].reshape((len(Points), -1) + Image.shape[2:])
+
+	Frames = np.asarray(Frames, np.intp)[:,None,None]
+
+	return Image[Frames, ys, xs].reshape((len(Points), -1) + Image.shape[3:])
+
+#----------------------------------------------------------------------------------------------------------
+# SampleStickers - Median HSV value of a (2*Radius+1)x(2*Radius+1) patch around each point. The median
+#				 - ignores the few noisy pixels (glare, edges) a single pixel read would pick up.
+#----------------------------------------------------------------------------------------------------------
+
+def SampleStickers(hsv, Points, Radius=4):
+
+	return np.median(Patches(hsv, Points, Radius), axis=1)
+
+#----------------------------------------------------------------------------------------------------------
+# ClassifyStickers - Central point and color of every rectangle in one batch: centroids, patch medians and
+#				   - the stacked range comparison are each a single NumPy operation for all the stickers.
+#----------------------------------------------------------------------------------------------------------
+
+def ClassifyStickers(Rect_l, hsv, Table, Radius=4):
+
+	if len(Rect_l) == 0:
+		return np.array([], dtype='<U1'), np.zeros((0,2))
+
+	Points = Centroids(Rect_l).astype(int)
+	Labels = Table.ClassifyValues(SampleStickers(hsv, Points, Radius))
+
+	return np.array(COLORS)[Labels], Points
@@ -0,0 +1,248 @@
+
+##################################################
+## COLOR PROFILES
+
+# Color calibration profiles of the Visual Rubik's Cube Solver. Each profile
+# is a list of HSV ranges for one lighting (e.g. "default", "kiosk", "dim")
+# stored in a JSON file:
+
+# {"default": "kiosk",
+#  "profiles": {"kiosk": [["b", [93, 137, 114], [118, 255, 255]], ...]}}
+
+# The ranges are listed in priority order (see ColorTable). A profile is
+# compiled into its color table once, when it is selected, and the file is
+# reloaded when it changes on disk, so the lighting preset can be switched or
+# tuned without restarting the solver. The "default" profile is always the
+# ranges of CubeVision, so they are defined in one place: the file only adds
+# other profiles (e.g. a tuned copy of them under another name).
+
+# The automatic calibrations accepted by the user are saved in their own file
+# (AUTO_PROFILE_FILE, in the user's home), so the profiles file of the
+# solver is neither rewritten by each cube nor reloaded because of it.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import collections
+import json
+import os
+import time
+import numpy as np
+from ColorClassifier import COLORS, ColorTable
+from CubeVision import ColorRanges
+
+
+#----------------------------------------------------------------------------------------------------------
+# Profiles file - Default path (next to the solver, whatever the working directory) and name of the
+# built-in profile (the ranges of CubeVision).
+#----------------------------------------------------------------------------------------------------------
+
+PROFILE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ColorProfiles.json')
+DEFAULT_PROFILE = 'default'
+
+#----------------------------------------------------------------------------------------------------------
+# Automatic profiles file - Profiles of the automatic calibration (see Calibration), e.g. "auto".
+#----------------------------------------------------------------------------------------------------------
+
+AUTO_PROFILE_FILE = os.path.join(os.path.expanduser('~'), '.VisualRubiksSolver', 'AutoProfiles.json')
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# ColorProfile - Compiled profile: its Name, its Ranges (tuple of (color, lower, upper) with read-only
+#			   - arrays) and the color Table built from them. The table is read-only too, so a profile can be
+#			   - shared by the session and the tracker.
+#----------------------------------------------------------------------------------------------------------
+
+ColorProfile = collections.namedtuple('ColorProfile', ['Name', 'Ranges', 'Table'])
+
+#----------------------------------------------------------------------------------------------------------
+# ParseRanges - Ranges of a profile read from JSON ([color, [h, s, v], [h, s, v]] each). Raises ValueError
+#			  - when a range is not valid.
+#----------------------------------------------------------------------------------------------------------
+
+def ParseRanges(Name, Data):
+
+	Ranges = []
+	for Range in Data:
+		if (len(Range) != 3) or (Range[0] not in COLORS[1:]) or (len(Range[1]) != 3) or (len(Range[2]) != 3):
+			raise ValueError(f'Invalid range in the color profile {Name}: {Range}')
+		Lower, Upper = np.array(Range[1], np.int64), np.array(Range[2], np.int64)
+		Lower.setflags(write=False)
+		Upper.setflags(write=False)
+		Ranges.append((Range[0], Lower, Upper))
+
+	return tuple(Ranges)
+
+#----------------------------------------------------------------------------------------------------------
+# CompileProfile - Compiles the ranges of a profile into its color table.
+#----------------------------------------------------------------------------------------------------------
+
+def CompileProfile(Name, Ranges):
+
+	Table = ColorTable(Ranges)
+	Table.Table.setflags(write=False)
+
+	return ColorProfile(Name, Ranges, Table)
+
+#----------------------------------------------------------------------------------------------------------
+# ProfileStore - Profiles of a JSON file. Name selects the profile at startup (the "default" of the file when
+#			   - not given). Reload checks the file at most every Interval seconds.
+#----------------------------------------------------------------------------------------------------------
+
+class ProfileStore:
+
+	def __init__(self, Path=PROFILE_FILE, Name=None, Interval=1.0):
+
+		self.Path = Path
+		self.Interval = Interval
+		self.Profiles = {}
+		self.Default = DEFAULT_PROFILE
+		self.Stamp = None
+		self.Checked = time.monotonic()
+		self.Error = None
+
+		self.Load()
+		self.Current = self.Compile(self.Default if Name is None else Name)
+
+	#------------------------------------------------------------------------------------------------------
+	# Load - Reads the ranges of every profile from the file (they are compiled when selected). Raises
+	#	   - ValueError when the file redefines the built-in profile.
+	#------------------------------------------------------------------------------------------------------
+
+	def Load(self):
+
+		Profiles = {DEFAULT_PROFILE: ParseRanges(DEFAULT_PROFILE, [(c, l.tolist(), u.tolist()) for c, l, u in ColorRanges()])}
+		Default = DEFAULT_PROFILE
+		Stamp = None
+
+		if os.path.exists(self.Path):
+			Stamp = self.FileStamp()
+			with open(self.Path) as f:
+				Data = json.load(f)
+			for Name, Ranges in Data.get('profiles', {}).items():
+				if Name == DEFAULT_PROFILE:
+					raise ValueError(f'The color profile {DEFAULT_PROFILE} is the ranges of CubeVision, save the tuned ranges under another name')
+				Profiles[Name] = ParseRanges(Name, Ranges)
+			Default = Data.get('default', DEFAULT_PROFILE)
+
+		self.Profiles = Profiles
+		self.Default = Default
+		self.Stamp = Stamp
+
+	def FileStamp(self):
+
+		Stat = os.stat(self.Path)
+		return (Stat.st_mtime_ns, Stat.st_size)
+
+	#------------------------------------------------------------------------------------------------------
+	# Compile - Compiled profile of a name. Raises KeyError for an unknown profile.
+	#------------------------------------------------------------------------------------------------------
+
+	def Compile(self, Name):
+
+		if Name not in self.Profiles:
+			raise KeyError(f'Unknown color profile {Name}, the profiles are: {", ".join(self.Names())}')
+
+		return CompileProfile(Name, self.Profiles[Name])
+
+	def Names(self):
+		return sorted(self.Profiles)
+
+	#------------------------------------------------------------------------------------------------------
+	# Select - Switches to another profile. Returns the compiled profile.
+	#------------------------------------------------------------------------------------------------------
+
+	def Select(self, Name):
+
+		if Name != self.Current.Name:
+			self.Current = self.Compile(Name)
+
+		return self.Current
+
+	#------------------------------------------------------------------------------------------------------
+	# Reload - Reloads the file if it changed on disk and recompiles the current profile if its ranges
+	#		 - changed. Returns True when the current profile was replaced. A file that can not be read
+	#		 - (e.g. while it is being written) keeps the previous profiles and is reported in Error.
+	#------------------------------------------------------------------------------------------------------
+
+	def Reload(self):
+
+		Now = time.monotonic()
+		if Now - self.Checked < self.Interval:
+			return False
+		self.Checked = Now
+
+		try:
+			Stamp = self.FileStamp() if os.path.exists(self.Path) else None
+			if Stamp == self.Stamp:
+				return False
+			self.Load()
+		except (OSError, ValueError) as e:
+			self.Error = f'{type(e).__name__}: {e}'
+			return False
+		self.Error = None
+
+		Ranges = self.Profiles.get(self.Current.Name, self.Profiles[DEFAULT_PROFILE])
+		if RangesEqual(Ranges, self.Current.Ranges):
+			return False
+
+		self.Current = CompileProfile(self.Current.Name if self.Current.Name in self.Profiles else DEFAULT_PROFILE, Ranges)
+		return True
+
+	#------------------------------------------------------------------------------------------------------
+	# Save - Writes the ranges as a profile of the file (see SaveProfile).
+	#------------------------------------------------------------------------------------------------------
+
+	def Save(self, Name, Ranges):
+		SaveProfile(self.Path, Name, Ranges, self.Default)
+
+#----------------------------------------------------------------------------------------------------------
+# SaveProfile - Writes the ranges (e.g. the automatic calibration, see Calibration) as a profile of the file
+#			  - at Path, which is created with Default as its default profile when it does not exist. The
+#			  - file is replaced atomically so a running solver never reads it half written.
+#----------------------------------------------------------------------------------------------------------
+
+def SaveProfile(Path, Name, Ranges, Default=DEFAULT_PROFILE):
+
+	Data = {'default': Default, 'profiles': {}}
+	if os.path.exists(Path):
+		with open(Path) as f:
+			Data = json.load(f)
+	elif os.path.dirname(Path):
+		os.makedirs(os.path.dirname(Path), exist_ok=True)
+
+	Data.setdefault('profiles', {})[Name] = [[str(c), [int(v) for v in l], [int(v) for v in u]] for c, l, u in Ranges]
+
+	Temporary = Path + '.tmp'
+	with open(Temporary, 'w') as f:
+		f.write(ProfilesJson(Data))
+	os.replace(Temporary, Path)
+
+#----------------------------------------------------------------------------------------------------------
+# ProfilesJson - Text of the profiles file, one range per line so it is easy to tune by hand.
+#----------------------------------------------------------------------------------------------------------
+
+def ProfilesJson(Data):
+
+	Profiles = []
+	for Name, Ranges in Data.get('profiles', {}).items():
+		Lines = ',\n'.join('   ' + json.dumps(Range) for Range in Ranges)
+		Profiles.append(f'  {json.dumps(Name)}: [\n{Lines}\n  ]')
+	Profiles = ',\n'.join(Profiles)
+
+	return f'{{\n "default": {json.dumps(Data.get("default", DEFAULT_PROFILE))},\n "profiles": {{\n{Profiles}\n }}\n}}\n'
+
+#----------------------------------------------------------------------------------------------------------
+# RangesEqual - True when two lists of ranges are the same.
+#----------------------------------------------------------------------------------------------------------
+
+def RangesEqual(a, b):
+
+	return (len(a) == len(b)) and all((ca == cb) and np.array_equal(la, lb) and np.array_equal(ua, ub) for (ca, la, ua), (cb, lb, ub) in zip(a, b))
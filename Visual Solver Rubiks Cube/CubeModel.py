@@ -0,0 +1,322 @@
+
+##################################################
+## CUBE MODEL
+
+# Facelet model of the cube. The state is an array of the 54 facelets in the
+# order of sKociemba (U, L, F, R, B, D, see the net in RubiksCube.py) and
+# every movement is a permutation of these facelets: new = old[MOVES[Move]].
+# The tables are generated once from the geometry of the cube, so the face
+# turns (U, D, L, R, F, B) and the whole cube rotations (x, y, z) of the
+# notation (https://ruwix.com/the-rubiks-cube/notation/) share the same code.
+
+# The compact state of a cube is an uint8 array of its 54 facelets, each one
+# coded by the face of its color (0 to 5 in FACE_ORDER, see Encode), and a
+# batch of cubes is a (N, 54) array: the movements are applied to every cube
+# of the batch at once. The cubie level encoding (permutation and orientation
+# of the corners and edges, see Cubies) is read from the same array.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import numpy as np
+
+
+#----------------------------------------------------------------------------------------------------------
+# Faces - Order of the faces in sKociemba and, for each face, its outward normal and the directions of its
+# columns (right) and rows (down) as seen from outside the cube (x right, y up, z towards the camera).
+#----------------------------------------------------------------------------------------------------------
+
+FACE_ORDER = 'ULFRBD'
+
+FACE_AXES = {'U': ((0,1,0), (1,0,0), (0,0,1)),
+			 'L': ((-1,0,0), (0,0,1), (0,-1,0)),
+			 'F': ((0,0,1), (1,0,0), (0,-1,0)),
+			 'R': ((1,0,0), (0,0,-1), (0,-1,0)),
+			 'B': ((0,0,-1), (-1,0,0), (0,-1,0)),
+			 'D': ((0,-1,0), (1,0,0), (0,0,-1))}
+
+#----------------------------------------------------------------------------------------------------------
+# Whole cube rotations - Each one turns the whole cube as the face turn of the same axis.
+#----------------------------------------------------------------------------------------------------------
+
+ROTATION_AXES = {'x': 'R', 'y': 'U', 'z': 'F'}
+
+#----------------------------------------------------------------------------------------------------------
+# Cubies - Corners and edges in the order of the Kociemba's algorithm, each one named by its faces. The
+# faces of a corner are listed clockwise, and the first face of each cubie (U or D, else F or B) is the
+# one that defines its orientation.
+#----------------------------------------------------------------------------------------------------------
+
+CORNERS = ('URF', 'UFL', 'ULB', 'UBR', 'DFR', 'DLF', 'DBL', 'DRB')
+EDGES = ('UR', 'UF', 'UL', 'UB', 'DR', 'DF', 'DL', 'DB', 'FR', 'FL', 'BL', 'BR')
+
+#----------------------------------------------------------------------------------------------------------
+# Invalid - Code of a facelet whose color is not the color of any centre.
+#----------------------------------------------------------------------------------------------------------
+
+INVALID = 255
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# Facelets - Position (x3, so the coordinates are integers) and normal of each of the 54 facelets.
+#----------------------------------------------------------------------------------------------------------
+
+def Facelets():
+
+	Positions = np.zeros((54,3), np.int64)
+	Normals = np.zeros((54,3), np.int64)
+
+	for f, Face in enumerate(FACE_ORDER):
+		n, r, d = (np.array(v) for v in FACE_AXES[Face])
+		for row in range(3):
+			for col in range(3):
+				Positions[9*f + 3*row + col] = 3*n + 2*(col-1)*r + 2*(row-1)*d
+				Normals[9*f + 3*row + col] = n
+
+	return Positions, Normals
+
+#----------------------------------------------------------------------------------------------------------
+# Permutation - Permutation of a clockwise quarter turn (seen from outside) about the normal of Face of the
+#			  - facelets in its layer (or of the whole cube when Whole is set).
+#----------------------------------------------------------------------------------------------------------
+
+def Permutation(Face, Whole=False):
+
+	Positions, Normals = Facelets()
+	n = np.array(FACE_AXES[Face][0])
+
+	# Rotation of -90 degrees about n (Rodrigues' formula)
+	K = np.array([[0,-n[2],n[1]],[n[2],0,-n[0]],[-n[1],n[0],0]])
+	Rotation = np.eye(3, dtype=np.int64) - K + K @ K
+
+	Index = {(tuple(p), tuple(m)): i for i, (p, m) in enumerate(zip(Positions, Normals))}
+	Perm = np.arange(54)
+
+	for i in range(54):
+		if Whole or (Positions[i] @ n > 0):
+			j = Index[(tuple(Rotation @ Positions[i]), tuple(Rotation @ Normals[i]))]
+			Perm[j] = i
+
+	return Perm
+
+#----------------------------------------------------------------------------------------------------------
+# MoveTables - Permutation of every movement: the quarter turns, their inverses (') and half turns (2).
+#----------------------------------------------------------------------------------------------------------
+
+def MoveTables():
+
+	Moves = {}
+	for Name in FACE_ORDER:
+		Moves[Name] = Permutation(Name)
+	for Name, Face in ROTATION_AXES.items():
+		Moves[Name] = Permutation(Face, Whole=True)
+
+	for Name in list(Moves):
+		Perm = Moves[Name]
+		Moves[Name + '2'] = Perm[Perm]
+		Moves[Name + "'"] = Perm[Perm][Perm]
+
+	return Moves
+
+MOVES = MoveTables()
+
+#----------------------------------------------------------------------------------------------------------
+# Move table - Permutations of MOVES as one (moves, 54) array, so a batch of cubes can take a different
+# movement each (see ApplyBatch). MOVE_INDEX is the row of each movement; the first FACE_MOVES rows are the
+# face turns and the last ones the whole cube rotations.
+#----------------------------------------------------------------------------------------------------------
+
+MOVE_NAMES = tuple(Name + Suffix for Name in FACE_ORDER + ''.join(ROTATION_AXES) for Suffix in ('', "'", '2'))
+FACE_MOVES = 3*len(FACE_ORDER)
+MOVE_INDEX = {Name: i for i, Name in enumerate(MOVE_NAMES)}
+MOVE_TABLE = np.array([MOVES[Name] for Name in MOVE_NAMES], np.uint8)
+
+#----------------------------------------------------------------------------------------------------------
+# Apply - State (array of 54 facelets, or (N, 54) batch) after the movements (e.g. "R", ["R", "U'", "y"]).
+#		- The permutations of the movements are composed first, so the state is permuted only once.
+#----------------------------------------------------------------------------------------------------------
+
+def Apply(State, Moves):
+
+	if isinstance(Moves, str):
+		Moves = [Moves]
+	if not Moves:
+		return State
+
+	Perm = MOVES[Moves[0]]
+	for Move in Moves[1:]:
+		Perm = Perm[MOVES[Move]]
+
+	return State[..., Perm]
+
+#----------------------------------------------------------------------------------------------------------
+# ApplyBatch - Batch of states (N, 54) after one movement each: Moves is an array of N rows of MOVE_TABLE
+#			 - (see MOVE_INDEX).
+#----------------------------------------------------------------------------------------------------------
+
+def ApplyBatch(States, Moves):
+
+	return np.take_along_axis(States, MOVE_TABLE[Moves], axis=1)
+
+#----------------------------------------------------------------------------------------------------------
+# Inverse - Inverse of a movement (R --> R', R' --> R, R2 --> R2).
+#----------------------------------------------------------------------------------------------------------
+
+def Inverse(Move):
+
+	if Move.endswith("'"):
+		return Move[0]
+	if Move.endswith('2'):
+		return Move
+
+	return Move + "'"
+
+#----------------------------------------------------------------------------------------------------------
+# RotatedFace - Name of the face that is at the place of Face after the whole cube Rotation (e.g. after
+#			  - y' the front face is at the right, so RotatedFace('F', "y'") is 'R').
+#----------------------------------------------------------------------------------------------------------
+
+def RotatedFace(Face, Rotation):
+
+	Center = 9*FACE_ORDER.index(Face) + 4
+	Place = int(np.flatnonzero(MOVES[Rotation] == Center)[0])
+
+	return FACE_ORDER[Place//9]
+
+#----------------------------------------------------------------------------------------------------------
+# Orientations - The 24 orientations of the whole cube, each one as the shortest list of rotations (x, y)
+#			   - that reaches it from the current one (the first is the current one, []).
+#----------------------------------------------------------------------------------------------------------
+
+def Orientations():
+
+	Found = {np.arange(54).tobytes(): []}
+	Queue = [[]]
+
+	for Rotations in Queue:
+		for Rotation in ('y', "y'", 'y2', 'x', "x'", 'x2'):
+			Key = Apply(np.arange(54), Rotations + [Rotation]).tobytes()
+			if Key not in Found:
+				Found[Key] = Rotations + [Rotation]
+				Queue.append(Found[Key])
+
+	return Queue
+
+ORIENTATIONS = Orientations()
+
+#----------------------------------------------------------------------------------------------------------
+# Encode - Compact state (uint8 array of 54 facelets) of sKociemba, or (N, 54) batch of a list of them.
+#		 - Each facelet is coded by the face whose central sticker has its color, and a color without
+#		 - centre is coded as INVALID.
+#----------------------------------------------------------------------------------------------------------
+
+def Encode(sKociemba):
+
+	Batch = not isinstance(sKociemba, str)
+	Letters = np.frombuffer(''.join(sKociemba if Batch else [sKociemba]).encode(), np.uint8).reshape(-1,54)
+
+	Match = Letters[:,:,None] == Letters[:,None,4::9]
+	State = np.where(Match.any(axis=2), Match.argmax(axis=2), INVALID).astype(np.uint8)
+
+	return State if Batch else State[0]
+
+#----------------------------------------------------------------------------------------------------------
+# Decode - sKociemba of a compact state, with the color of each face given by Colors (the central colors,
+#		 - e.g. 'ybrgow' or the ones of the scanned sKociemba[4::9]). A batch returns a list.
+#----------------------------------------------------------------------------------------------------------
+
+def Decode(State, Colors):
+
+	Letters = np.frombuffer((Colors + '?'*(256 - len(Colors))).encode(), np.uint8)[State]
+
+	if Letters.ndim == 1:
+		return Letters.tobytes().decode()
+
+	return [Row.tobytes().decode() for Row in Letters]
+
+#----------------------------------------------------------------------------------------------------------
+# IsSolved - True (for each state of a batch) when every face has a single color.
+#----------------------------------------------------------------------------------------------------------
+
+def IsSolved(State):
+
+	Faces = State.reshape(State.shape[:-1] + (6,9))
+
+	return (Faces == Faces[...,4:5]).all(axis=(-2,-1))
+
+#----------------------------------------------------------------------------------------------------------
+# CubieFacelets - Facelets of each cubie (CORNERS or EDGES), in the order of the faces of its name.
+#----------------------------------------------------------------------------------------------------------
+
+def CubieFacelets(Names):
+
+	Positions, Normals = Facelets()
+	Axes = {Face: np.array(FACE_AXES[Face][0]) for Face in FACE_ORDER}
+
+	Table = []
+	for Name in Names:
+		Center = 2*sum(Axes[Face] for Face in Name)
+		Table.append([int(np.flatnonzero((Normals == Axes[Face]).all(axis=1) & (Positions - Normals == Center).all(axis=1))[0]) for Face in Name])
+
+	return np.array(Table)
+
+CORNER_FACELETS = CubieFacelets(CORNERS)
+EDGE_FACELETS = CubieFacelets(EDGES)
+
+#----------------------------------------------------------------------------------------------------------
+# Cubie codes - Cubie with each set of faces (as a mask of bits 1 << face; an INVALID facelet is bit 6),
+# -1 for the sets that are not a cubie.
+#----------------------------------------------------------------------------------------------------------
+
+def CubieCodes(Names):
+
+	Codes = np.full(256, -1, np.int8)
+	for i, Name in enumerate(Names):
+		Codes[sum(1 << FACE_ORDER.index(Face) for Face in Name)] = i
+
+	return Codes
+
+CORNER_CODES = CubieCodes(CORNERS)
+EDGE_CODES = CubieCodes(EDGES)
+
+#----------------------------------------------------------------------------------------------------------
+# Cubies - Cubie level encoding of a compact state (or batch): for each place of CORNERS and EDGES, the cubie
+#		 - that is there and its orientation. Returns (CornerPermutation, CornerTwist, EdgePermutation,
+#		 - EdgeFlip); the twist is the place of the U or D color among the faces of the corner (clockwise)
+#		 - and the flip is 1 when the first color of the edge is not on the first face of its place. A set
+#		 - of colors that is not a cubie is -1 in both arrays.
+#----------------------------------------------------------------------------------------------------------
+
+def Cubies(State):
+
+	Bits = np.left_shift(1, np.minimum(State, 6).astype(np.int64))
+
+	Corners = State[..., CORNER_FACELETS]
+	CornerPermutation = CORNER_CODES[Bits[..., CORNER_FACELETS].sum(axis=-1)].astype(np.int64)
+	UpDown = (Corners == FACE_ORDER.index('U')) | (Corners == FACE_ORDER.index('D'))
+	CornerTwist = np.where(CornerPermutation >= 0, UpDown.argmax(axis=-1), -1)
+
+	Edges = State[..., EDGE_FACELETS]
+	EdgePermutation = EDGE_CODES[Bits[..., EDGE_FACELETS].sum(axis=-1)].astype(np.int64)
+	First = np.array([FACE_ORDER.index(Name[0]) for Name in EDGES])[EdgePermutation]
+	EdgeFlip = np.where(EdgePermutation >= 0, (Edges[...,0] != First).astype(np.int64), -1)
+
+	return CornerPermutation, CornerTwist, EdgePermutation, EdgeFlip
+
+#----------------------------------------------------------------------------------------------------------
+# FaceMatrix - 3x3 colors of a face of the state, as seen from outside (the front one is the one seen by
+#			 - the camera).
+#----------------------------------------------------------------------------------------------------------
+
+def FaceMatrix(State, Face='F'):
+
+	f = FACE_ORDER.index(Face)
+
+	return State[9*f:9*f+9].reshape(3,3)
@@ -0,0 +1,266 @@
+
+##################################################
+## CUBE MOVEMENTS
+
+# Guided movements of the Visual Rubik's Cube Solver. MoveGuide draws the
+# arrows of each movement over the cube's face and detects when the user has
+# completed it. For reference please see:
+# https://ruwix.com/the-rubiks-cube/notation/
+
+# The whole cube is tracked with the facelet tables of CubeModel, so the face
+# expected after each movement is known exactly: a movement is completed when
+# the camera sees that face, and any other change is not accepted.
+
+# The cube can be held in any orientation: it is located from the face seen
+# by the camera (its centre and the stickers around it), and each movement of
+# the solution is turned into the face of the cube as it is held. The whole
+# cube rotations of the guide are not undone, and the cube is located again
+# whenever the user turns it on their own.
+
+# The face observed is given by the colors voted over the last frames (see
+# FaceVoter) and the central points of the stickers in the current frame.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import cv2
+import numpy as np
+from CubeModel import FACE_ORDER, ORIENTATIONS, Apply, RotatedFace, FaceMatrix
+
+
+#----------------------------------------------------------------------------------------------------------
+# Arrows - (row, col) --> (row, col) of the stickers joined by each arrow of the clockwise movements that
+# can be shown on the front face. The arrows of the inverse movements are reversed. y turns the whole cube
+# to the left.
+#----------------------------------------------------------------------------------------------------------
+
+ARROWS = {'R': [((2,2),(0,2))],
+		  'L': [((0,0),(2,0))],
+		  'U': [((0,2),(0,0))],
+		  'D': [((2,0),(2,2))],
+		  'F': [((0,0),(0,2)), ((0,2),(2,2)), ((2,2),(2,0)), ((2,0),(0,0))],
+		  'y': [((0,2),(0,0)), ((1,2),(1,0)), ((2,2),(2,0))]}
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# DisaggregatedSolution - Disaggregates the Cubiks solution into a simplied form (e.g. R2 --> R R)
+#----------------------------------------------------------------------------------------------------------
+
+def DisaggregatedSolution(Solution):
+
+	for i, ele in enumerate(Solution):
+		if ele == 'R2':
+			Solution[i] = 'R'
+			Solution.insert(i,'R')
+		elif ele == 'D2':
+			Solution[i] = 'D'
+			Solution.insert(i,'D')
+		elif ele == 'U2':
+			Solution[i] = 'U'
+			Solution.insert(i,'U')	
+		elif ele == 'L2':
+			Solution[i] = 'L'
+			Solution.insert(i,'L')
+		elif ele == 'B2':
+			Solution[i] = 'B'
+			Solution.insert(i,'B')
+		elif ele == 'F2':
+			Solution[i] = 'F'
+			Solution.insert(i,'F')
+
+	return Solution
+
+#----------------------------------------------------------------------------------------------------------
+# Plans - Ways of guiding a movement of the cube as it is held (e.g. "B"), the preferred first: the movement
+#		- itself when its arrows can be shown, then the movement turned to another face by whole cube
+#		- rotations (y, y', y y), preferring R and the fewest steps. E.g. B --> [y', R], [y, L], [y, y, F].
+#----------------------------------------------------------------------------------------------------------
+
+def Plans(Move):
+
+	Found = []
+	for Rotations in ([], ["y'"], ["y"], ["y", "y"]):
+		Turned = Move
+		for Rotation in Rotations:
+			Turned = RotatedFace(Turned[0], Rotation) + Turned[1:]
+		if Turned[0] in ARROWS:
+			Found.append(Rotations + [Turned])
+	Found.sort(key=lambda Plan: (len(Plan), Plan[-1][0] != 'R'))
+
+	return Found
+
+#----------------------------------------------------------------------------------------------------------
+# Move costs - Cost of a quarter turn of each face of the cube as it is held: by default the guided steps of
+# its preferred plan (see Plans: U, D, L, R and F are guided directly, B after a y rotation). Half turns are
+# guided as two quarter turns. Any other table can be given to the solver and the guide (see SolutionCost).
+#----------------------------------------------------------------------------------------------------------
+
+MOVE_COSTS = {Face: len(Plans(Face)[0]) for Face in FACE_ORDER}
+HALF_TURN = 2
+
+#----------------------------------------------------------------------------------------------------------
+# SolutionCost - Cost of the Moves of a solution on the faces of the cube as it is held when each one is
+#			   - guided (see MoveGuide.HeldMoves) with the cost model Costs (quarter turn cost of each face).
+#----------------------------------------------------------------------------------------------------------
+
+def SolutionCost(Moves, Costs=MOVE_COSTS, HalfTurn=HALF_TURN):
+
+	return sum(Costs[Move[0]]*(HalfTurn if Move.endswith('2') else 1) for Move in Moves)
+
+#----------------------------------------------------------------------------------------------------------
+# DrawArrows - Draws the arrows of a movement (e.g. "R", "F'", "y") over the face.
+#----------------------------------------------------------------------------------------------------------
+
+def DrawArrows(f_c, Move, MatrixPoints):
+
+	for Ini, End in ARROWS[Move[0]]:
+		if Move.endswith("'"):
+			Ini, End = End, Ini
+		cv2.arrowedLine(f_c, tuple(int(v) for v in MatrixPoints[Ini]), tuple(int(v) for v in MatrixPoints[End]), (0,255,0), 5)
+
+#----------------------------------------------------------------------------------------------------------
+# MoveGuide - Guides the movements of the solution over the state scanned (sKociemba). State is the cube as
+#			- it is held, once it is located (see Locate).
+#			- Each movement is split in steps that change the face seen by the camera, e.g. B is guided as
+#			- y R (the cube stays turned and the next movements follow it).
+#----------------------------------------------------------------------------------------------------------
+
+class MoveGuide:
+
+	def __init__(self, sKociemba):
+
+		self.State = np.array(list(sKociemba))
+		self.Centers = {Face: sKociemba[9*f + 4] for f, Face in enumerate(FACE_ORDER)}
+		self.Located = False
+		self.Steps = []
+		self.Current = None
+		self.Expected = None
+
+	#------------------------------------------------------------------------------------------------------
+	# Locate - Orientation of the cube from the face seen (3x3 colors). Returns True when only one
+	#		 - orientation of the cube shows that face, and State becomes the cube as it is held.
+	#------------------------------------------------------------------------------------------------------
+
+	def Locate(self, MatrixColors):
+
+		Held = {}
+		for Rotations in ORIENTATIONS:
+			State = Apply(self.State, Rotations)
+			if (FaceMatrix(State) == MatrixColors).all():
+				Held[State.tobytes()] = State
+
+		if len(Held) != 1:
+			return False
+
+		self.State = Held.popitem()[1]
+		self.Located = True
+		self.Steps = []
+		self.Expected = None
+
+		return True
+
+	#------------------------------------------------------------------------------------------------------
+	# Held - Movement of the solution (faces of sKociemba) turned into the face of the cube as it is held
+	#	   - (State, the current one by default), the one with the same central color.
+	#------------------------------------------------------------------------------------------------------
+
+	def Held(self, Move, State=None):
+
+		State = self.State if State is None else State
+		f = int(np.flatnonzero(State[4::9] == self.Centers[Move[0]])[0])
+
+		return FACE_ORDER[f] + Move[1:]
+
+	#------------------------------------------------------------------------------------------------------
+	# Plan - Steps of a movement of the solution: the first of its Plans whose steps all change the face
+	#	   - seen by the camera, or None when no plan can be seen (a step that does not change the face
+	#	   - could never be checked). Held is the cube as it is held (State by default).
+	#------------------------------------------------------------------------------------------------------
+
+	def Plan(self, Move, Held=None):
+
+		Held = self.State if Held is None else Held
+		for Plan in Plans(self.Held(Move, Held)):
+			State = Held
+			Visible = True
+			for Step in Plan:
+				Next = Apply(State, Step)
+				Visible = Visible and (FaceMatrix(Next) != FaceMatrix(State)).any()
+				State = Next
+			if Visible:
+				return Plan
+
+		return None
+
+	#------------------------------------------------------------------------------------------------------
+	# HeldMoves - Moves of a solution (e.g. ["R", "B2"]) on the faces of the cube as it is held when each one
+	#			- is guided, from the cube as it is held now and following the whole cube rotations of the
+	#			- plans.
+	#------------------------------------------------------------------------------------------------------
+
+	def HeldMoves(self, Solution):
+
+		State = self.State
+		Moves = []
+		for Move in Solution:
+			Moves.append(self.Held(Move, State))
+			for Quarter in DisaggregatedSolution([Move]):
+				State = Apply(State, self.Plan(Quarter, State) or Plans(self.Held(Quarter, State))[0])
+
+		return Moves
+
+	#------------------------------------------------------------------------------------------------------
+	# Cost - Cost of a solution guided from the cube as it is held now with the cost model Costs (see
+	#	   - SolutionCost).
+	#------------------------------------------------------------------------------------------------------
+
+	def Cost(self, Solution, Costs=MOVE_COSTS, HalfTurn=HALF_TURN):
+
+		return SolutionCost(self.HeldMoves(Solution), Costs, HalfTurn)
+
+	#------------------------------------------------------------------------------------------------------
+	# Update - Guides the movement on the current frame. MatrixColors are the colors voted for the face
+	#		 - (None when there are no votes) and Accepted tells if the vote is clear; the arrows are drawn
+	#		 - over MatrixPoints (None when the face is not found in this frame). Returns True when the user
+	#		 - has completed the movement. A clear face that is neither the current nor the expected one
+	#		 - means the cube was turned, so it is located again and the movement is planned again. A
+	#		 - movement without a visible plan is never accepted.
+	#------------------------------------------------------------------------------------------------------
+
+	def Update(self, Move, MatrixColors, Accepted, MatrixPoints, f_c):
+
+		if not self.Steps:
+			self.Steps = self.Plan(Move) or []
+			self.Expected = None
+			if not self.Steps:
+				return False
+
+		if self.Expected is None:
+			self.Current = FaceMatrix(self.State)
+			self.Expected = FaceMatrix(Apply(self.State, self.Steps[0]))
+
+		if MatrixColors is None:
+			return False
+
+		if Accepted and (MatrixColors == self.Expected).all():
+			self.State = Apply(self.State, self.Steps.pop(0))
+			self.Expected = None
+			if not self.Steps:
+				print('movement complete')
+				return True
+
+		elif (MatrixColors == self.Current).all():
+			if MatrixPoints is not None:
+				DrawArrows(f_c, self.Steps[0], MatrixPoints)
+
+		elif Accepted:
+			self.Locate(MatrixColors)
+
+		return False
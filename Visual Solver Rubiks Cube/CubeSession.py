@@ -0,0 +1,597 @@
+
+##################################################
+## CUBE SESSION
+
+# State machine of the Visual Rubik's Cube Solver: face scanning, solving
+# with the Kociemba's algorithm and guided movements. The session receives
+# one frame at a time and draws its visual alerts over it, but it never opens
+# a window or a message box, so the same pipeline runs in the real-time
+# solver (RubiksCube.py) and in the headless mode (Headless.py).
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import cv2
+import numpy as np
+from ColorClassifier import ColorTable, SampleStickers
+from CubeVision import CROP, FrameDetection, StringFace
+from StageProfiler import NULL_PROFILER
+from FrameBuffers import NO_BUFFERS
+from FaceVoter import FaceVoter
+from CubeSolver import Ranked, SolveCandidates, SolveError
+from CubeMovements import DisaggregatedSolution, MoveGuide
+from CubeModel import FACE_ORDER, FaceMatrix
+from CubeSimulator import Solves
+from CubeValidator import ValidateState
+from Calibration import BrightnessTable, CalibrateScan, HsvToLab, StickerSampler
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# Faces - Center color of each face and the text of its visual alert: (face, color, text, position, BGR)
+#----------------------------------------------------------------------------------------------------------
+
+FACES = [('F', 'r', 'RED READY!', (180, 210), (0, 0, 255)),
+		 ('D', 'w', 'WHITE READY!', (165, 210), (255, 255, 255)),
+		 ('R', 'g', 'GREEN READY!', (150, 210), (0, 255, 0)),
+		 ('L', 'b', 'BLUE READY!', (170, 210), (255, 0, 0)),
+		 ('B', 'o', 'ORANGE READY!', (140, 210), (0, 165, 255)),
+		 ('U', 'y', 'YELLOW READY!', (140, 210), (0, 255, 255))]
+
+#----------------------------------------------------------------------------------------------------------
+# Automatic calibration - Minimum distance (Lab units) between the central sticker of a new face and the
+# ones already sampled.
+#----------------------------------------------------------------------------------------------------------
+
+MIN_CENTER_DISTANCE = 12.0
+
+#----------------------------------------------------------------------------------------------------------
+# Unknown colors - Faces voted with a cell without color ('Z') in a row before the user is asked to
+# calibrate the colors ("CALIBRATE COLORS!" instead of "UNKNOWN COLOR!").
+#----------------------------------------------------------------------------------------------------------
+
+UNKNOWN_LIMIT = 5
+
+#----------------------------------------------------------------------------------------------------------
+# CubeSession - Processes the frames of one cube. The duration of the visual alerts is given in frames:
+#			  - BannerFrames - "<COLOR> READY!" after each face is scanned
+#			  - ReadyFrames  - "READY?" before the guided movements start
+#			  - SolvedFrames - "CUBE SOLVED!" before the session is finished
+#			  - The stages of each frame are timed by the Profiler (see StageProfiler) and the solutions are
+#			  - looked up in the Cache first (see SolutionCache).
+#			  - With a Solver (see AsyncSolver) the Kociemba's search runs in the background and the frames
+#			  - keep being processed ("SOLVING...") until its first solution is ready. Without a Solver,
+#			  - Costs is the cost model of the moves (see SolveCandidates). Once the cube is located, the
+#			  - cheapest candidate solution from the way it is held is guided (see MoveGuide.Cost).
+#			  - With a Tracker (see CubeTracker) the cube is followed over the frame instead of being
+#			  - searched in the fixed crop.
+#			  - The faces and the movements are accepted once the colors voted over the last frames are
+#			  - clear enough (see FaceVoter), instead of after a fixed number of frames.
+#			  - With AutoCalibrate the faces are scanned without the color ranges: the stickers of each
+#			  - face are sampled once they are stable, and after the sixth face the colors are calibrated
+#			  - from them (see Calibration) and Table is replaced by the calibrated one.
+#			  - With Buffers (see FrameBuffers) the images of each frame are written into preallocated
+#			  - buffers instead of new arrays (the contours and the grid fit are still allocated).
+#			  - Scale < 1 finds the stickers in a downscaled copy of the region (pyramid detection, see
+#			  - FindRectangles) and reads their colors at full resolution.
+#			  - The margin of the vote of each face is kept as its Confidence: while the faces are scanned,
+#			  - a face seen again with a clearer vote replaces its colors, and any face can be scanned
+#			  - again alone until the movements are guided (see Invalidate). A face with an unknown color ('Z') is not accepted; the
+#			  - votes are restarted until a better frame is read.
+#----------------------------------------------------------------------------------------------------------
+
+class CubeSession:
+
+	def __init__(self, Table, BannerFrames=50, ReadyFrames=100, SolvedFrames=200, Profiler=NULL_PROFILER, Cache=None, Solver=None, Tracker=None, Voter=None, AutoCalibrate=False, Buffers=NO_BUFFERS, Scale=1.0, Costs=None):
+
+		self.Table = Table
+		self.Profiler = Profiler
+		self.Cache = Cache
+		self.Solver = Solver
+		self.Costs = Costs
+		self.Tracker = Tracker
+		self.Buffers = Buffers
+		self.Scale = Scale
+		self.BannerFrames = BannerFrames
+		self.ReadyFrames = ReadyFrames
+		self.SolvedFrames = SolvedFrames
+		self.Voter = FaceVoter() if Voter is None else Voter
+		self.AutoCalibrate = AutoCalibrate
+		self.Sampler = StickerSampler()
+		self.Sampled = []
+		self.Calibration = None
+		self.Reference = Table
+
+		if AutoCalibrate:
+			self.SetTable(BrightnessTable())
+
+		#--------------------------------------------------------------
+		# Variables and Flags definition
+		#--------------------------------------------------------------
+
+		self.Pending = set('FDRLBU')
+		self.Faces = {}
+		self.Confidence = {}
+		self.Unknown = 0
+		self.Visual = None
+		self.SolveFlag = 0
+		self.sKociemba = ''
+		self.Searching = 0
+		self.calculate = 1
+		self.Solution = []
+		self.Candidates = []
+		self.Stored = False
+		self.PositionCubeFlag = 0
+		self.VisualSolveFlag = 0
+		self.t = 0
+		self.Guide = None
+		self.CubeSolved = 0
+		self.Finished = False
+
+		self.FrameCount = 0
+		self.Events = []
+		self.Detection = None
+		self.f_c = None
+		self.Labels = None
+		self.mask = None
+
+	#------------------------------------------------------------------------------------------------------
+	# Event - Records what happened in the current frame. Returns the event so it can be reported.
+	#------------------------------------------------------------------------------------------------------
+
+	def Event(self, Name, **Data):
+
+		Data = dict(frame=self.FrameCount, event=Name, **Data)
+		self.Events.append(Data)
+		return Data
+
+	#------------------------------------------------------------------------------------------------------
+	# SetTable - Classifies the next frames with another color table (also in the Tracker).
+	#------------------------------------------------------------------------------------------------------
+
+	def SetTable(self, Table):
+
+		self.Table = Table
+		if self.Tracker is not None:
+			self.Tracker.Table = Table
+
+	#------------------------------------------------------------------------------------------------------
+	# ProcessFrame - Runs the whole pipeline on one frame (BGR image from the camera). The visual alerts
+	#			   - are drawn on the frame. Returns the list of events of this frame.
+	#------------------------------------------------------------------------------------------------------
+
+	def ProcessFrame(self, frame):
+
+		self.FrameCount = self.FrameCount + 1
+		First = len(self.Events)
+
+		Profiler = self.Profiler
+
+		Region = CROP if self.Tracker is None else self.Tracker.Region(frame)
+		Detection = FrameDetection(frame, self.Table, Profiler, Region, self.Buffers, self.Scale)
+		if self.Tracker is not None:
+			self.Tracker.Update(Detection)
+		f_c = Detection.f_c
+		self.Detection = Detection
+		self.f_c = f_c
+		self.Labels = Detection.Labels
+		self.mask = Detection.mask
+
+		#--------------------------------------------------------------
+		# The colors read on every frame where a 3x3 grid is found are
+		# voted. The face is accepted when the vote is clear; a cell
+		# that is clearly out of the calibrated colors restarts the vote.
+		#--------------------------------------------------------------
+
+		if self.AutoCalibrate and (self.Calibration is None):
+
+			with Profiler.Stage('calibration'):
+				self.Sample(Detection)
+			Accepted, MatrixColors, MatrixPoints = False, None, None
+
+		else:
+
+			with Profiler.Stage('vote'):
+				Reading = Detection.Read()
+				if Reading is None:
+					self.Voter.Miss()
+				else:
+					self.Voter.Add(Reading[0], Reading[1])
+
+				Accepted = self.Voter.Accepted()
+				MatrixColors = self.Voter.Colors()
+				MatrixPoints = None if Reading is None else Reading[2]
+
+		if Accepted and ('Z' in MatrixColors):
+			Accepted = False
+			self.Unknown = self.Unknown + 1
+			self.Voter.Reset()
+			self.Event('unknown', colors=StringFace(MatrixColors), count=self.Unknown)
+			if self.Visual is None:
+				Text = 'CALIBRATE COLORS!' if self.Unknown >= UNKNOWN_LIMIT else 'UNKNOWN COLOR!'
+				self.Visual = (Text, (320 - 14*len(Text), 210), (0, 0, 255))
+		elif Accepted:
+			self.Unknown = 0
+
+		#--------------------------------------------------------------
+		# Once a face is accepted, read its colors. This identification
+		# is repeated until all the faces were identified. A face seen
+		# again with a clearer vote replaces the colors read before.
+		#--------------------------------------------------------------
+
+		if Accepted and self.Pending:
+
+			Confidence = float(self.Voter.Margin().min())
+			for Face, Color, Text, Position, BGR in FACES:
+				if (MatrixColors[1][1] == Color) and (Face in self.Pending):
+					self.Faces[Face] = StringFace(MatrixColors)
+					self.Confidence[Face] = Confidence
+					self.Pending.discard(Face)
+					self.Visual = (Text, Position, BGR)
+					self.Event('face', face=Face, colors=self.Faces[Face], confidence=Confidence)
+					break
+				if (MatrixColors[1][1] == Color) and (Confidence > self.Confidence.get(Face, np.inf)):
+					self.Confidence[Face] = Confidence
+					if StringFace(MatrixColors) != self.Faces[Face]:
+						self.Faces[Face] = StringFace(MatrixColors)
+						self.Event('face', face=Face, colors=self.Faces[Face], confidence=Confidence, replaced=True)
+					break
+
+		#--------------------------------------------------------------
+		# Show the visual alert once a face has being identified.
+		#--------------------------------------------------------------
+
+		if self.Visual is not None:
+			self.t = self.t+1
+			if self.t < self.BannerFrames:
+				Text, Position, BGR = self.Visual
+				cv2.putText(frame, Text, Position, cv2.FONT_HERSHEY_SIMPLEX, 1.5, BGR, 3, cv2.LINE_AA)
+			else:
+				self.Visual = None
+				self.SolveFlag = 1
+				self.t = 0
+
+		#--------------------------------------------------------------
+		# Calculate the cube's current configuration in a string sKociemba
+		# Please see: https://pypi.org/project/rubik-solver/
+		# A configuration that can not be solved is not given to the
+		# solver: the faces most likely misread are scanned again.
+		#--------------------------------------------------------------
+
+		if (not self.sKociemba) and (not self.Pending):
+			sKociemba = ''.join(self.Faces[Face] for Face in 'ULFRBD')
+			with Profiler.Stage('validation'):
+				Validation = ValidateState(sKociemba)
+			if Validation.Valid:
+				self.sKociemba = sKociemba
+			else:
+				self.Rescan(Validation)
+
+		#--------------------------------------------------------------
+		# Solve cube using Kociemba algorithm
+		# Please see: https://pypi.org/project/rubik-solver/
+		# Solution storaged in variable with the same name
+		#--------------------------------------------------------------
+
+		if ((self.SolveFlag == 1) and (len(self.sKociemba)==54)) and (self.Solver is None):
+
+			with Profiler.Stage('utils.solve'):
+				self.Candidates = SolveCandidates(self.sKociemba, self.Cache, self.Costs)
+			self.Solution = DisaggregatedSolution(list(self.Candidates[0]))
+			self.Verify()
+
+			self.SolveFlag = 0
+			self.calculate = 0
+			self.Event('solution', sKociemba=self.sKociemba, solution=list(self.Solution))
+
+		elif ((self.SolveFlag == 1) and (len(self.sKociemba)==54)):
+
+			with Profiler.Stage('utils.solve'):
+				self.Search(frame)
+
+		#--------------------------------------------------------------
+		# Locate the cube from the face seen by the camera, in any
+		# orientation (see MoveGuide.Locate). A face that looks the same
+		# in several orientations can not tell which one is held.
+		#--------------------------------------------------------------
+
+		if (self.calculate==0) and Accepted and (self.PositionCubeFlag == 0):
+
+			if self.Guide is None:
+				self.Guide = MoveGuide(self.sKociemba)
+			if self.Guide.Locate(MatrixColors):
+				self.PositionCubeFlag = 1
+				self.Event('positioned', front=str(FaceMatrix(self.Guide.State)[1][1]), up=str(FaceMatrix(self.Guide.State, 'U')[1][1]))
+				self.Choose()
+
+		if (self.calculate==0) and (self.PositionCubeFlag == 0):
+			cv2.putText(frame,'SHOW ANOTHER FACE OF THE CUBE TO THE CAMERA', (45, 50),cv2.FONT_HERSHEY_SIMPLEX, 0.7,(0, 0, 255),2,cv2.LINE_AA)
+
+		if (self.calculate==0) and (self.PositionCubeFlag == 1) and (self.VisualSolveFlag == 0):
+			self.t = self.t+1
+			if self.t < self.ReadyFrames:
+				cv2.putText(frame,'READY?', (220, 220),cv2.FONT_HERSHEY_SIMPLEX, 2,(0, 0, 255),4,cv2.LINE_AA)
+			else:
+				self.VisualSolveFlag = 1
+				self.t = 0
+
+		#--------------------------------------------------------------
+		# Visual movements
+		#--------------------------------------------------------------
+
+		if (self.VisualSolveFlag==1) and (len(self.Solution)>0):
+			with Profiler.Stage('movements'):
+				self.Move(MatrixColors, Accepted, MatrixPoints, f_c)
+
+		if self.calculate == 0:
+			self.Store()
+
+		#--------------------------------------------------------------
+		# Once the cube is solved, show the visual alert.
+		#--------------------------------------------------------------
+
+		if self.CubeSolved == 1:
+			self.t = self.t+1
+			if self.t < self.SolvedFrames:
+				cv2.putText(frame,'CUBE SOLVED!', (165, 210),cv2.FONT_HERSHEY_SIMPLEX, 1.5,(255, 0, 255),3,cv2.LINE_AA)
+			else:
+				self.t = 0
+				self.Finished = True
+
+		return self.Events[First:]
+
+	#------------------------------------------------------------------------------------------------------
+	# Rescan - Forgets the faces suspected by the Validation of the scanned cube (see ValidateState), so they
+	#		 - are scanned again while the other faces are kept.
+	#------------------------------------------------------------------------------------------------------
+
+	def Rescan(self, Validation):
+
+		self.Invalidate(*Validation.Suspects)
+		self.Event('invalid', errors=Validation.Errors, faces=list(Validation.Suspects))
+
+	#------------------------------------------------------------------------------------------------------
+	# Recover - Scans the cube again after a SolveError: the faces suspected by the validation of the
+	#		  - scanned cube (see Rescan), or every face when it is valid.
+	#------------------------------------------------------------------------------------------------------
+
+	def Recover(self):
+
+		Validation = ValidateState(self.sKociemba)
+		if Validation.Valid:
+			self.Invalidate(*FACE_ORDER)
+		else:
+			self.Rescan(Validation)
+
+	#------------------------------------------------------------------------------------------------------
+	# Invalidate - Forgets the colors of the given faces (e.g. 'R'), so they are scanned again while the
+	#			 - other faces are kept. The solution of the cube scanned before, if any, is dropped and its
+	#			 - search stopped. Once the movements are guided the faces scanned no longer match the cube,
+	#			 - so they are kept and False is returned.
+	#------------------------------------------------------------------------------------------------------
+
+	def Invalidate(self, *Faces):
+
+		if self.VisualSolveFlag == 1:
+			return False
+
+		if (self.Solver is not None) and self.Solver.Busy():
+			self.Solver.Stop()
+
+		Names = []
+		for Face, Color, Text, Position, BGR in FACES:
+			if Face in Faces:
+				self.Faces.pop(Face, None)
+				self.Confidence.pop(Face, None)
+				self.Pending.add(Face)
+				Names.append(Text.split()[0])
+
+		self.sKociemba = ''
+		self.Solution = []
+		self.Candidates = []
+		self.Stored = False
+		self.SolveFlag = 0
+		self.Searching = 0
+		self.calculate = 1
+		self.Guide = None
+		self.PositionCubeFlag = 0
+		self.VisualSolveFlag = 0
+
+		self.Voter.Reset()
+		Text = 'SCAN ' + ' '.join(Names) + ' AGAIN'
+		self.Visual = (Text, (max(10, 320 - 14*len(Text)), 210), (0, 0, 255))
+		self.t = 0
+		self.Event('rescan', faces=[Face for Face in 'FDRLBU' if Face in Faces])
+
+		return True
+
+	#------------------------------------------------------------------------------------------------------
+	# Sample - Samples the stickers of the face shown (automatic calibration). A stable face whose central
+	#		 - sticker differs from the ones already sampled is kept, and the colors are calibrated once
+	#		 - the six faces are sampled.
+	#------------------------------------------------------------------------------------------------------
+
+	def Sample(self, Detection):
+
+		Lattice = Detection.Lattice()
+		if Lattice is None:
+			self.Sampler.Miss()
+			return
+
+		self.Sampler.Add(SampleStickers(Detection.hsv, Lattice.MatrixPoints.reshape(-1,2).astype(int)))
+		if not self.Sampler.Stable():
+			return
+
+		Face = self.Sampler.Face()
+		Center = HsvToLab(Face[4:5])
+		if any(np.linalg.norm(Center - HsvToLab(s[4:5])) < MIN_CENTER_DISTANCE for s in self.Sampled):
+			return
+
+		self.Sampled.append(Face)
+		self.Visual = (f'FACE {len(self.Sampled)} READY!', (150, 210), (255, 255, 255))
+		self.Event('sampled', count=len(self.Sampled))
+
+		if len(self.Sampled) == 6:
+			self.Calibrate()
+
+	#------------------------------------------------------------------------------------------------------
+	# Calibrate - Colors of the six sampled faces and the calibrated Table (see CalibrateScan). The colors
+	#			- of the stickers are named with the Table given to the session.
+	#------------------------------------------------------------------------------------------------------
+
+	def Calibrate(self):
+
+		Letters, Ranges = CalibrateScan(self.Sampled, self.Reference)
+
+		for Colors in Letters:
+			for Face, Color, Text, Position, BGR in FACES:
+				if Colors[4] == Color:
+					self.Faces[Face] = Colors
+					self.Pending.discard(Face)
+					self.Event('face', face=Face, colors=Colors)
+
+		self.Calibration = Ranges
+		self.SetTable(ColorTable(Ranges))
+		self.Event('calibrated', ranges=[(Color, Lower.tolist(), Upper.tolist()) for Color, Lower, Upper in Ranges])
+
+	#------------------------------------------------------------------------------------------------------
+	# Search - Solves sKociemba with the Solver without blocking: the search is submitted once and polled
+	#		 - on every frame until its first solution is found. The search goes on in the background for
+	#		 - the other candidates (see Choose). A cached solution is used at once, and when it is only the
+	#		 - best so far of an incomplete search, the search is run again in the background.
+	#------------------------------------------------------------------------------------------------------
+
+	def Search(self, frame):
+
+		if self.Searching == 0:
+			Cached = self.Cache.Get(self.sKociemba, self.Solver.Model) if self.Cache is not None else None
+			if Cached is not None:
+				self.Candidates = Cached[3]
+				self.Stored = Cached[2]
+				self.Solution = Cached[1]
+				self.SolveFlag = 0
+				self.Verify()
+				self.calculate = 0
+				if not Cached[2]:
+					self.Solver.Submit(self.sKociemba)
+				self.Event('solution', sKociemba=self.sKociemba, solution=list(self.Solution))
+				return
+
+			self.Solver.Submit(self.sKociemba)
+			self.Searching = 1
+
+		Result = self.Solver.Poll()
+
+		if Result is None:
+			cv2.putText(frame,'SOLVING...', (200, 220),cv2.FONT_HERSHEY_SIMPLEX, 1.5,(0, 0, 255),3,cv2.LINE_AA)
+			return
+
+		self.Searching = 0
+		self.SolveFlag = 0
+
+		if Result['error'] is not None:
+			self.Event('error', **Result['error'].Info())
+			raise Result['error']
+
+		self.Candidates = Result['solutions']
+		self.Solution = DisaggregatedSolution(list(Result['solution']))
+		self.Verify()
+
+		self.calculate = 0
+		self.Event('solution', sKociemba=self.sKociemba, solution=list(self.Solution), seconds=Result['seconds'], complete=Result['complete'])
+
+	#------------------------------------------------------------------------------------------------------
+	# Choose - Once the cube is located, the cheapest candidate solution from the way it is held (see
+	#		 - MoveGuide.Cost, with the cost model of the search) replaces the one found first. The
+	#		 - candidates are the ones found so far by the Solver, which are cached then (as the best so far
+	#		 - while the search goes on, see Store).
+	#------------------------------------------------------------------------------------------------------
+
+	def Choose(self):
+
+		Costs = self.Costs if self.Solver is None else self.Solver.Costs
+		if (self.Solver is not None) and (self.Solver.sKociemba == self.sKociemba):
+			Result = self.Solver.Poll()
+			if (Result is not None) and Result['solutions']:
+				self.Candidates = Ranked(Result['solutions'] + [Candidate for Candidate in self.Candidates if Candidate not in Result['solutions']], Costs)
+				if (self.Cache is not None) and not self.Stored:
+					self.Cache.Put(self.sKociemba, self.Candidates[0], DisaggregatedSolution(list(self.Candidates[0])), self.Solver.Model, False, self.Candidates)
+
+		if (not Costs) or (len(self.Candidates) < 2):
+			return
+
+		Cost = [self.Guide.Cost(Candidate, Costs) for Candidate in self.Candidates]
+		Solution = DisaggregatedSolution(list(self.Candidates[int(np.argmin(Cost))]))
+		if Solution != self.Solution:
+			self.Solution = Solution
+			self.Verify()
+			self.Event('solution', sKociemba=self.sKociemba, solution=list(self.Solution), cost=min(Cost))
+
+	#------------------------------------------------------------------------------------------------------
+	# Store - Caches the candidates of the Solver once its search of the scanned cube is over (it goes on in
+	#		- the background while the first solution is guided).
+	#------------------------------------------------------------------------------------------------------
+
+	def Store(self):
+
+		if self.Stored or (self.Cache is None) or (self.Solver is None) or (self.Solver.sKociemba != self.sKociemba):
+			return
+
+		Result = self.Solver.Poll()
+		if (Result is not None) and Result['complete'] and Result['solutions']:
+			Candidates = Ranked(Result['solutions'] + [Candidate for Candidate in self.Candidates if Candidate not in Result['solutions']], self.Solver.Costs)
+			self.Cache.Put(self.sKociemba, Candidates[0], DisaggregatedSolution(list(Candidates[0])), self.Solver.Model, True, Candidates)
+			self.Stored = True
+
+	#------------------------------------------------------------------------------------------------------
+	# Verify - Checks with the simulator (see CubeSimulator) that the solution solves the scanned cube before
+	#		 - the user is guided through it. Raises a SolveError ('UnverifiedSolution') otherwise.
+	#------------------------------------------------------------------------------------------------------
+
+	def Verify(self):
+
+		if not Solves(self.sKociemba, self.Solution):
+			Error = SolveError(Type='UnverifiedSolution', Detail=f'{" ".join(self.Solution)} does not solve the scanned cube', sKociemba=self.sKociemba)
+			self.Event('error', **Error.Info())
+			raise Error
+
+	#------------------------------------------------------------------------------------------------------
+	# Move - Guides the next movement of the solution (see MoveGuide). A 'move' event is recorded when the user
+	#	   - completes it.
+	#------------------------------------------------------------------------------------------------------
+
+	def Move(self, MatrixColors, Accepted, MatrixPoints, f_c):
+
+		if self.Guide is None:
+			self.Guide = MoveGuide(self.sKociemba)
+
+		Next = self.Solution[0]
+		if self.Guide.Update(Next, MatrixColors, Accepted, MatrixPoints, f_c):
+			self.Solution.pop(0)
+			self.Event('move', move=Next, remaining=len(self.Solution))
+
+		if len(self.Solution)==0:
+			self.CubeSolved = 1
+			self.Event('solved')
+			print('Cube Solved')
+
+	#------------------------------------------------------------------------------------------------------
+	# Result - Structured result of the session.
+	#------------------------------------------------------------------------------------------------------
+
+	def Result(self):
+
+		return {'frames': self.FrameCount,
+				'faces': dict(self.Faces),
+				'confidence': dict(self.Confidence),
+				'sKociemba': self.sKociemba,
+				'solution': next((e['solution'] for e in reversed(self.Events) if e['event'] == 'solution'), []),
+				'moves': [e for e in self.Events if e['event'] == 'move'],
+				'events': list(self.Events),
+				'solved': self.CubeSolved == 1}
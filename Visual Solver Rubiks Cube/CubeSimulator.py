@@ -0,0 +1,210 @@
+
+##################################################
+## CUBE SIMULATOR
+
+# Software cube of the Visual Rubik's Cube Solver. The movements of a
+# solution are applied to the compact state of the scanned cube (see
+# CubeModel.Encode) to confirm that it ends solved before the user is guided
+# through it, which takes a few microseconds.
+
+# The same simulation runs over batches of cubes: thousands of random
+# scrambles are generated and their solutions checked at once, so the whole
+# solver path (search, orientations, disaggregation) can be tested and timed
+# offline.
+
+# Usage: python CubeSimulator.py [--scrambles 100] [--cheapest] [--output results.json]
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import argparse
+import json
+import time
+import numpy as np
+from CubeModel import FACE_ORDER, MOVE_INDEX, MOVE_NAMES, MOVE_TABLE, Apply, Decode, Encode, Inverse, IsSolved
+from CubeMovements import DisaggregatedSolution, MoveGuide
+from CubeSolver import FACE_COLORS, MOVE_COSTS, SolveCandidates, SolveError
+
+
+#----------------------------------------------------------------------------------------------------------
+# Simulation table - Permutations of the movements (see MOVE_TABLE) plus the identity, which pads the
+# shorter solutions of a batch.
+#----------------------------------------------------------------------------------------------------------
+
+NO_MOVE = len(MOVE_TABLE)
+SIMULATION_TABLE = np.vstack([MOVE_TABLE, np.arange(54, dtype=MOVE_TABLE.dtype)])
+
+#----------------------------------------------------------------------------------------------------------
+# Solved cube - Central colors (in FACE_ORDER) and sKociemba of the solved cube.
+#----------------------------------------------------------------------------------------------------------
+
+CENTER_COLORS = ''.join(FACE_COLORS[Face] for Face in FACE_ORDER)
+SOLVED_CUBE = ''.join(9*Color for Color in CENTER_COLORS)
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# Solves - True when the movements of Solution (e.g. ["R", "U'", "F2"]) solve sKociemba.
+#----------------------------------------------------------------------------------------------------------
+
+def Solves(sKociemba, Solution):
+
+	return bool(IsSolved(Apply(Encode(sKociemba), list(Solution))))
+
+#----------------------------------------------------------------------------------------------------------
+# MoveIds - (N, L) array of the rows of SIMULATION_TABLE of N solutions (lists of movements), the shorter
+#		  - ones padded with NO_MOVE.
+#----------------------------------------------------------------------------------------------------------
+
+def MoveIds(Solutions):
+
+	Ids = np.full((len(Solutions), max((len(Solution) for Solution in Solutions), default=0)), NO_MOVE)
+	for i, Solution in enumerate(Solutions):
+		Ids[i,:len(Solution)] = [MOVE_INDEX[Move] for Move in Solution]
+
+	return Ids
+
+#----------------------------------------------------------------------------------------------------------
+# Simulate - Batch of compact states (N, 54) after the movements of each one (N, L) (see MoveIds).
+#----------------------------------------------------------------------------------------------------------
+
+def Simulate(States, Moves):
+
+	for Column in np.asarray(Moves).T:
+		States = np.take_along_axis(States, SIMULATION_TABLE[Column], axis=1)
+
+	return States
+
+#----------------------------------------------------------------------------------------------------------
+# SolvesBatch - For each sKociemba of a list, True when its solution solves it.
+#----------------------------------------------------------------------------------------------------------
+
+def SolvesBatch(sKociembas, Solutions):
+
+	return IsSolved(Simulate(Encode(sKociembas), MoveIds(Solutions)))
+
+#----------------------------------------------------------------------------------------------------------
+# Scrambles - N random scrambles of Length face turns (a face is never turned twice in a row). Returns the
+#			- compact states (N, 54) and the movements (N, Length) of the scrambles.
+#----------------------------------------------------------------------------------------------------------
+
+def Scrambles(N, Length=25, Rng=None):
+
+	if Rng is None:
+		Rng = np.random.default_rng()
+
+	Faces = np.zeros((N, Length), np.int64)
+	Faces[:,0] = Rng.integers(0, 6, N)
+	for i in range(1, Length):
+		Faces[:,i] = (Faces[:,i-1] + Rng.integers(1, 6, N)) % 6
+
+	Moves = 3*Faces + Rng.integers(0, 3, (N, Length))
+	States = Simulate(np.tile(Encode(SOLVED_CUBE), (N, 1)), Moves)
+
+	return States, Moves
+
+#----------------------------------------------------------------------------------------------------------
+# InverseMoves - Movements (N, L) that undo the movements of each row.
+#----------------------------------------------------------------------------------------------------------
+
+def InverseMoves(Moves):
+
+	Inverses = np.array([MOVE_INDEX[Inverse(Move)] for Move in MOVE_NAMES] + [NO_MOVE])
+
+	return Inverses[np.asarray(Moves)[:,::-1]]
+
+#----------------------------------------------------------------------------------------------------------
+# SelfTest - Checks the simulator itself on N scrambles: every scramble followed by its inverse must be
+#		   - solved. Returns (passed, microseconds per cube).
+#----------------------------------------------------------------------------------------------------------
+
+def SelfTest(N=10000, Length=25, Rng=None):
+
+	States, Moves = Scrambles(N, Length, Rng)
+
+	Start = time.perf_counter()
+	Solved = IsSolved(Simulate(States, InverseMoves(Moves)))
+	Seconds = time.perf_counter() - Start
+
+	return bool(Solved.all()), 1e6*Seconds/N
+
+#----------------------------------------------------------------------------------------------------------
+# Regression - Solves N random scrambles with SolveCandidates (with the cost model Costs, see CubeSolver),
+#			 - keeps the cheapest candidate when the cube is held as it was scanned (see MoveGuide.Cost,
+#			 - with MOVE_COSTS without Costs), and checks every disaggregated solution with the simulator.
+#			 - Returns the failures (scrambles not solved, with the error of the search when there is one),
+#			 - the guided cost and the timings.
+#----------------------------------------------------------------------------------------------------------
+
+def Regression(N=100, Length=25, Seed=0, Costs=None, Budget=20.0):
+
+	States, Moves = Scrambles(N, Length, np.random.default_rng(Seed))
+	sKociembas = Decode(States, CENTER_COLORS)
+
+	Solutions = []
+	GuidedCosts = []
+	Errors = {}
+	SolveTimes = []
+
+	for i, sKociemba in enumerate(sKociembas):
+		Start = time.perf_counter()
+		try:
+			Candidates = SolveCandidates(sKociemba, Costs=Costs, Budget=Budget)
+			Guide = MoveGuide(sKociemba)
+			Guided = [Guide.Cost(Candidate, Costs or MOVE_COSTS) for Candidate in Candidates]
+			Disaggregated = DisaggregatedSolution(list(Candidates[int(np.argmin(Guided))]))
+			GuidedCosts.append(min(Guided))
+		except SolveError as e:
+			Disaggregated = []
+			Errors[i] = e.Info()
+		SolveTimes.append(time.perf_counter() - Start)
+		Solutions.append(Disaggregated)
+
+	Start = time.perf_counter()
+	Solved = SolvesBatch(sKociembas, Solutions)
+	Seconds = time.perf_counter() - Start
+	Solved[list(Errors)] = False
+
+	Failures = [{'sKociemba': sKociembas[i], 'solution': Solutions[i], 'error': Errors.get(i)} for i in np.flatnonzero(~Solved)]
+
+	return {'scrambles': N,
+			'solved': int(Solved.sum()),
+			'failures': Failures,
+			'moves': float(np.mean([len(Solution) for Solution in Solutions])),
+			'cost': float(np.mean(GuidedCosts)) if GuidedCosts else 0.0,
+			'solve_ms': 1e3*float(np.median(SolveTimes)),
+			'verify_us': 1e6*Seconds/N}
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# MAIN
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+if __name__ == '__main__':
+
+	Parser = argparse.ArgumentParser(description="Regression test of the Visual Rubik's Cube Solver with random scrambles")
+	Parser.add_argument('--scrambles', type=int, default=100, help='random scrambles solved and verified')
+	Parser.add_argument('--length', type=int, default=25, help='face turns of each scramble')
+	Parser.add_argument('--seed', type=int, default=0)
+	Parser.add_argument('--cheapest', action='store_true', help='collect candidates in the orientations one rotation away and keep the cheapest one (see MOVE_COSTS)')
+	Parser.add_argument('--budget', type=float, default=20.0, help='seconds of each search with the cost model')
+	Parser.add_argument('--output', default=None, help='write the results to this JSON file')
+	Args = Parser.parse_args()
+
+	Passed, Microseconds = SelfTest(Length=Args.length, Rng=np.random.default_rng(Args.seed))
+	print(f"simulator self test {'passed' if Passed else 'FAILED'} ({Microseconds:.2f} us/cube)")
+
+	Results = Regression(Args.scrambles, Args.length, Args.seed, MOVE_COSTS if Args.cheapest else None, Args.budget)
+	print(f"{Results['solved']}/{Results['scrambles']} scrambles solved, {Results['moves']:.1f} moves, {Results['cost']:.1f} guided cost, search {Results['solve_ms']:.0f} ms, verification {Results['verify_us']:.2f} us/cube")
+	for Failure in Results['failures']:
+		print(f"FAILED {Failure['sKociemba']}: {Failure['error']['type'] if Failure['error'] else ' '.join(Failure['solution'])}")
+
+	if Args.output:
+		with open(Args.output, 'w') as f:
+			json.dump(Results, f, indent=2)
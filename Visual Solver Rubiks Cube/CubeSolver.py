@@ -0,0 +1,393 @@
+
+##################################################
+## CUBE SOLVER
+
+# Solves the scanned cube (sKociemba) with the Kociemba's algorithm of the
+# rubik_solver library. Please see: https://pypi.org/project/rubik-solver/
+
+# The search can take seconds, so AsyncSolver runs it in a worker process with
+# a time budget while the video loop keeps rendering.
+
+# The number of moves is not what the user pays for: a half turn is guided as
+# two quarter turns (see DisaggregatedSolution) and the movements of the back
+# face through a whole cube rotation (see MoveGuide.Plan). A cost model (e.g.
+# MOVE_COSTS) gives the cost of a quarter turn of each face of the cube as it
+# is held. With a cost model the first solution is returned at once, and the
+# cube is also solved in the orientations one whole cube rotation away (a
+# short search each) to collect other candidates. They are ranked for the
+# cube held as it was scanned, and once the guide locates the cube the
+# session guides the cheapest one from the way it is held (see
+# MoveGuide.Cost), with the same cost model.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import multiprocessing
+import queue
+import time
+import numpy as np
+from rubik_solver import utils
+from CubeMovements import DisaggregatedSolution, HALF_TURN, MOVE_COSTS, Plans, SolutionCost
+from CubeModel import FACE_ORDER, ORIENTATIONS, Apply, Inverse
+
+#----------------------------------------------------------------------------------------------------------
+# Face colors - Color of the central sticker of each face expected by the Kociemba's algorithm.
+#----------------------------------------------------------------------------------------------------------
+
+FACE_COLORS = dict(zip(FACE_ORDER, 'ybrgow'))
+
+#----------------------------------------------------------------------------------------------------------
+# Search timeout - Seconds allowed to a search without deadline (the default of rubik_solver).
+#----------------------------------------------------------------------------------------------------------
+
+SEARCH_TIMEOUT = 100
+
+#----------------------------------------------------------------------------------------------------------
+# Orientation timeout - Seconds allowed to the search of each orientation after the first one (see
+# Solutions), so the candidates of the cost model are collected within a few seconds each.
+#----------------------------------------------------------------------------------------------------------
+
+ORIENTATION_TIMEOUT = 1.0
+
+#----------------------------------------------------------------------------------------------------------
+# Search orientations - Orientations of the whole cube solved with a cost model: the scanned one and the
+# ones a single rotation away, so the search of each one fits in the budget.
+#----------------------------------------------------------------------------------------------------------
+
+SEARCH_ORIENTATIONS = [Rotations for Rotations in ORIENTATIONS if len(Rotations) <= 1]
+
+#----------------------------------------------------------------------------------------------------------
+# Worker context - The worker process of AsyncSolver is spawned, never forked: the program already runs the
+# capture thread and Tk when a worker is (re)started, and a forked copy of their locks can deadlock it.
+#----------------------------------------------------------------------------------------------------------
+
+WORKER_CONTEXT = multiprocessing.get_context('spawn')
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# SolveError - Raised when the Kociemba's algorithm can not find a solution for the scanned faces.
+#			 - Type   - name of the error of the search (e.g. 'DupedFacelet', 'NoSolution', 'Timeout')
+#			 - Detail - message of the search
+#----------------------------------------------------------------------------------------------------------
+
+SOLVE_ERROR = "In the way the faces were shown, it is impossible to find a solution according to the Kociemba's Algorithm. Please bear in mind the algorithm requires a specific order."
+
+class SolveError(Exception):
+
+	def __init__(self, Message=SOLVE_ERROR, Type='SolveError', Detail='', sKociemba=''):
+		super().__init__(Message)
+		self.Type = Type
+		self.Detail = Detail
+		self.sKociemba = sKociemba
+
+	def Info(self):
+		return {'type': self.Type, 'detail': self.Detail, 'message': str(self), 'sKociemba': self.sKociemba}
+
+#----------------------------------------------------------------------------------------------------------
+# SearchModel - Maximum length and cost model of a search, which identify its solutions in the
+#			  - SolutionCache (a solution ranked with one cost model is not the one of another).
+#----------------------------------------------------------------------------------------------------------
+
+def SearchModel(Costs=None, MaxDepth=23):
+
+	Model = f'depth={MaxDepth}'
+	if Costs:
+		Model = Model + ' costs=' + ','.join(f'{Face}{Costs[Face]}' for Face in sorted(Costs)) + f' half={HALF_TURN}'
+
+	return Model
+
+#----------------------------------------------------------------------------------------------------------
+# Ranked - Solutions sorted from the best one: the cheapest with Costs (see SolutionCost) for the cube held
+#		 - after the whole cube Rotations (as it was scanned by default), the shortest without it.
+#----------------------------------------------------------------------------------------------------------
+
+def Ranked(Solutions, Costs=None, Rotations=[]):
+
+	return sorted(Solutions, key=lambda Solution: SolutionCost(HeldMoves(Solution, Rotations), Costs) if Costs else len(Solution))
+
+#----------------------------------------------------------------------------------------------------------
+# Reoriented - sKociemba of the cube after the whole cube Rotations, with the colors renamed so each
+#			 - central sticker has the color expected on its face (see FACE_COLORS).
+#----------------------------------------------------------------------------------------------------------
+
+def Reoriented(sKociemba, Rotations):
+
+	State = Apply(np.array(list(sKociemba)), Rotations)
+	Names = {State[9*f + 4]: FACE_COLORS[Face] for f, Face in enumerate(FACE_ORDER)}
+
+	return ''.join(Names.get(Color, Color) for Color in State)
+
+#----------------------------------------------------------------------------------------------------------
+# PhysicalMoves - Moves of a solution of the Reoriented cube turned into the faces of the cube as it is
+#				- held (the face that the Rotations take to the place of each face of the solution).
+#----------------------------------------------------------------------------------------------------------
+
+def PhysicalMoves(Solution, Rotations):
+
+	Places = Apply(np.arange(54), Rotations)
+	Faces = {FACE_ORDER[f]: FACE_ORDER[Places[9*f + 4]//9] for f in range(6)}
+
+	return [Faces[Move[0]] + Move[1:] for Move in Solution]
+
+#----------------------------------------------------------------------------------------------------------
+# HeldMoves - Moves of a solution on the faces of the cube held after the whole cube Rotations, following
+#			- the rotations of the preferred plan of each movement (see Plans), as MoveGuide.HeldMoves does
+#			- once the cube is located.
+#----------------------------------------------------------------------------------------------------------
+
+def HeldMoves(Solution, Rotations=[]):
+
+	Rotations = list(Rotations)
+	Moves = []
+	for Move in Solution:
+		Held = PhysicalMoves([Move], [Inverse(Rotation) for Rotation in reversed(Rotations)])[0]
+		Moves.append(Held)
+		Rotations = Rotations + Plans(Held)[0][:-1]
+
+	return Moves
+
+#----------------------------------------------------------------------------------------------------------
+# Solutions - Yields the solutions of sKociemba found before the Deadline (time.time(), None for no limit).
+#			- Without Costs each one is shorter than the previous one: when Improve is set the search is
+#			- repeated with a shorter maximum length. With Costs the cube is then solved in each other
+#			- orientation of SEARCH_ORIENTATIONS (ORIENTATION_TIMEOUT seconds each), and every different
+#			- solution is yielded as a candidate (see Ranked). Raises SolveError when no solution is found.
+#----------------------------------------------------------------------------------------------------------
+
+def Solutions(sKociemba, MaxDepth=23, Deadline=None, Improve=False, Costs=None):
+
+	Best = None
+	Found = set()
+	Error = None
+
+	for i, Rotations in enumerate(SEARCH_ORIENTATIONS if Costs else [[]]):
+		Depth = MaxDepth
+		while True:
+			Timeout = SEARCH_TIMEOUT if Deadline is None else max(Deadline - time.time(), 0)
+			if i > 0:
+				Timeout = min(Timeout, ORIENTATION_TIMEOUT)
+			try:
+				Solution = PhysicalMoves([str(Move) for Move in utils.solve(Reoriented(sKociemba, Rotations), 'Kociemba', Depth, Timeout)], Rotations)
+			except Exception as e:
+				Error = Error or e
+				break
+
+			if (Best is None) or (len(Solution) < Best) or (Costs and (tuple(Solution) not in Found)):
+				Best = len(Solution) if Best is None else min(Best, len(Solution))
+				Found.add(tuple(Solution))
+				yield Solution
+			Depth = len(Solution) - 1
+			if (not Improve) or (Depth < 1) or ((Deadline is not None) and (time.time() >= Deadline)):
+				break
+
+		if (Best is None) or ((Deadline is not None) and (time.time() >= Deadline)):
+			break
+
+	if Best is None:
+		raise SolveError(Type=type(Error).__name__, Detail=str(Error), sKociemba=sKociemba) from Error
+
+#----------------------------------------------------------------------------------------------------------
+# SolveCandidates - Solutions of sKociemba as lists of moves ("R", "U'", ...), the best first (see Ranked).
+#				  - Without Costs there is only the shortest one. With Costs the candidates found within
+#				  - Budget seconds are returned (see Solutions): a search stopped by the Budget is as
+#				  - complete as a search of this cost model gets. When a SolutionCache is given, a state
+#				  - already solved by a complete search is not searched again, and the candidates are cached.
+#----------------------------------------------------------------------------------------------------------
+
+def SolveCandidates(sKociemba, Cache=None, Costs=None, Budget=20.0):
+
+	Model = SearchModel(Costs)
+	if Cache is not None:
+		Cached = Cache.Get(sKociemba, Model)
+		if (Cached is not None) and Cached[2]:
+			return Cached[3]
+
+	Deadline = time.time() + Budget if Costs else None
+	Candidates = Ranked(Solutions(sKociemba, Deadline=Deadline, Costs=Costs), Costs)
+
+	if Cache is not None:
+		Cache.Put(sKociemba, Candidates[0], DisaggregatedSolution(list(Candidates[0])), Model, Candidates=Candidates)
+
+	return Candidates
+
+#----------------------------------------------------------------------------------------------------------
+# SolveCube - Returns the best solution of sKociemba (see SolveCandidates) and its disaggregated form
+#			- (e.g. R2 --> R R) as lists of moves.
+#----------------------------------------------------------------------------------------------------------
+
+def SolveCube(sKociemba, Cache=None, Costs=None, Budget=20.0):
+
+	Solution = SolveCandidates(sKociemba, Cache, Costs, Budget)[0]
+
+	return Solution, DisaggregatedSolution(list(Solution))
+
+#----------------------------------------------------------------------------------------------------------
+# SearchWorker - Body of the worker process. For each job (Id, sKociemba, Budget, MaxDepth, Improve, Costs)
+#			   - it sends ('solution', Id, moves) for each solution found (see Solutions) and ('done', Id) or
+#			   - ('error', Id, type, detail) at the end.
+#----------------------------------------------------------------------------------------------------------
+
+def SearchWorker(Jobs, Results):
+
+	while True:
+		Job = Jobs.get()
+		if Job is None:
+			break
+
+		Id, sKociemba, Budget, MaxDepth, Improve, Costs = Job
+
+		try:
+			for Solution in Solutions(sKociemba, MaxDepth, time.time() + Budget, Improve, Costs):
+				Results.put(('solution', Id, Solution))
+		except SolveError as e:
+			Results.put(('error', Id, e.Type, e.Detail))
+
+		Results.put(('done', Id))
+
+#----------------------------------------------------------------------------------------------------------
+# AsyncSolver - Runs the Kociemba's search in a worker process so the caller never blocks.
+#			  - Budget   - seconds allowed for each search. When it runs out the search is stopped, with a
+#			  -			   'Timeout' error when no solution was found, and the worker is replaced by a new one.
+#			  - MaxDepth - maximum length of the first solution
+#			  - Improve  - keep searching shorter solutions until the budget runs out
+#			  - Costs	 - cost model (e.g. MOVE_COSTS): keep collecting candidates in the other
+#			  -			   orientations of the cube until the budget runs out (see Solutions)
+#			  - Model	 - key of its solutions in the SolutionCache (see SearchModel)
+#			  - Usage: Submit(sKociemba) once, then Poll() every frame until it returns a result. The
+#			  - first solution is returned as soon as it is found and the search goes on in the
+#			  - background: the next calls to Poll return the candidates found so far.
+#----------------------------------------------------------------------------------------------------------
+
+class AsyncSolver:
+
+	def __init__(self, Budget=20.0, MaxDepth=23, Improve=False, Costs=None):
+
+		self.Budget = Budget
+		self.MaxDepth = MaxDepth
+		self.Improve = Improve
+		self.Costs = Costs
+		self.Model = SearchModel(Costs, MaxDepth)
+		self.Job = 0
+		self.Start = None
+		self.sKociemba = ''
+		self.Found = []
+		self.Error = None
+		self.Result = None
+		self.Process = None
+		self.StartWorker()
+
+	#------------------------------------------------------------------------------------------------------
+	# StartWorker - Starts a new worker process. The rubik_solver tables are loaded while the cube is
+	#			  - scanned, so the first search does not pay for it.
+	#------------------------------------------------------------------------------------------------------
+
+	def StartWorker(self):
+
+		self.Jobs = WORKER_CONTEXT.Queue()
+		self.Results = WORKER_CONTEXT.Queue()
+		self.Process = WORKER_CONTEXT.Process(target=SearchWorker, args=(self.Jobs, self.Results), daemon=True)
+		self.Process.start()
+
+	#------------------------------------------------------------------------------------------------------
+	# Busy - True while a search is running.
+	#------------------------------------------------------------------------------------------------------
+
+	def Busy(self):
+		return self.Start is not None
+
+	#------------------------------------------------------------------------------------------------------
+	# Submit - Starts the search of sKociemba. A search still running is stopped first.
+	#------------------------------------------------------------------------------------------------------
+
+	def Submit(self, sKociemba):
+
+		if self.Busy():
+			self.Stop()
+
+		self.Job = self.Job + 1
+		self.Start = time.time()
+		self.sKociemba = sKociemba
+		self.Found = []
+		self.Error = None
+		self.Result = None
+		self.Jobs.put((self.Job, sKociemba, self.Budget, self.MaxDepth, self.Improve, self.Costs))
+
+	#------------------------------------------------------------------------------------------------------
+	# Poll - Never blocks. Returns None while no solution was found yet, otherwise a dictionary with:
+	#	   - 'solution'  - best solution found (list of moves) or None
+	#	   - 'solutions' - every solution found, the best first (see Ranked)
+	#	   - 'complete'	 - True once the search is over (finished or stopped by the budget), False while it
+	#	   -			   goes on in the background
+	#	   - 'error'	 - None or the SolveError of the search
+	#	   - 'seconds'	 - duration of the search so far
+	#------------------------------------------------------------------------------------------------------
+
+	def Poll(self):
+
+		if self.Start is None:
+			return self.Result
+
+		Done = False
+
+		while not Done:
+			try:
+				Message = self.Results.get_nowait()
+			except queue.Empty:
+				break
+
+			if Message[1] != self.Job:
+				continue
+			if Message[0] == 'solution':
+				self.Found.append(Message[2])
+			elif Message[0] == 'error':
+				self.Error = SolveError(Type=Message[2], Detail=Message[3], sKociemba=self.sKociemba)
+			elif Message[0] == 'done':
+				Done = True
+
+		Seconds = time.time() - self.Start
+		Solutions = Ranked(self.Found, self.Costs)
+		Result = {'solution': Solutions[0] if Solutions else None, 'solutions': Solutions, 'complete': Done, 'error': None if Solutions else self.Error, 'seconds': Seconds}
+
+		if (not Done) and (Seconds >= self.Budget):
+			# Budget exhausted: stop the search and keep the solutions found so far
+			self.Stop()
+			if not Solutions:
+				Result['error'] = SolveError(Type='Timeout', Detail=f'No solution within {self.Budget} seconds', sKociemba=self.sKociemba)
+			Result['complete'] = True
+			Done = True
+
+		if Done:
+			self.Start = None
+			self.Result = Result
+			return Result
+
+		return Result if Solutions else None
+
+	#------------------------------------------------------------------------------------------------------
+	# Stop - Stops the search: the worker is replaced by a new one.
+	#------------------------------------------------------------------------------------------------------
+
+	def Stop(self):
+
+		self.Process.terminate()
+		self.Process.join()
+		self.StartWorker()
+		self.Start = None
+
+	#------------------------------------------------------------------------------------------------------
+	# Close - Stops the worker process.
+	#------------------------------------------------------------------------------------------------------
+
+	def Close(self):
+
+		if self.Process is not None:
+			self.Process.terminate()
+			self.Process.join()
+			self.Process = None
@@ -0,0 +1,151 @@
+
+##################################################
+## CUBE TRACKER
+
+# Region of interest of the Visual Rubik's Cube Solver. The cube is searched
+# once in a downscaled copy of the whole frame; after that, only a box around
+# the last detected stickers (plus a margin) is processed, so the cost of each
+# frame depends on the size of the cube and not on the size of the frame.
+# When the cube is lost for a few frames the whole frame is searched again.
+
+# Usage:
+# Region = Tracker.Region(frame)
+# Detection = FrameDetection(frame, Table, Profiler, Region)
+# Tracker.Update(Detection)
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import cv2
+import numpy as np
+from ColorClassifier import Mask
+from CubeVision import CROP, MIN_AREA, MAX_AREA
+from StageProfiler import NULL_PROFILER
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# CubeTracker - Scale	  - downscale of the frame for the full frame search
+#			  - Margin	  - margin around the face, as a fraction of the size of the face
+#			  - MinStickers - stickers needed to start (or keep) tracking the cube
+#			  - LostFrames - frames without stickers before the whole frame is searched again
+#			  - Fallback  - region used while the cube is not found (the fixed crop by default)
+#----------------------------------------------------------------------------------------------------------
+
+class CubeTracker:
+
+	def __init__(self, Table, Scale=0.25, Margin=0.25, MinStickers=3, LostFrames=5, Fallback=CROP, Profiler=NULL_PROFILER):
+
+		self.Table = Table
+		self.Scale = Scale
+		self.Margin = Margin
+		self.MinStickers = MinStickers
+		self.LostFrames = LostFrames
+		self.Fallback = Fallback
+		self.Profiler = Profiler
+
+		self.Box = None
+		self.Lost = 0
+		self.Searches = 0
+
+	#------------------------------------------------------------------------------------------------------
+	# Region - Region (x0, y0, x1, y1) of the frame to process: the box around the tracked cube or, when
+	#		 - it is not tracked, the one found by the full frame search (or Fallback).
+	#------------------------------------------------------------------------------------------------------
+
+	def Region(self, frame):
+
+		Height, Width = frame.shape[:2]
+
+		if self.Box is None:
+			with self.Profiler.Stage('fullSearch'):
+				self.Box = self.Search(frame)
+			self.Lost = 0
+			if self.Box is None:
+				return self.Fallback
+
+		return self.Expand(self.Box, Width, Height)
+
+	#------------------------------------------------------------------------------------------------------
+	# Update - Follows the stickers found in the region. The box is kept while the cube is missing (e.g.
+	#		 - while the user turns it) up to LostFrames frames.
+	#------------------------------------------------------------------------------------------------------
+
+	def Update(self, Detection):
+
+		if len(Detection.Rectangles) >= self.MinStickers:
+			x, y = Detection.Origin
+			self.Box = Bounds(Detection.Rectangles, x, y)
+			self.Lost = 0
+			return
+
+		self.Lost = self.Lost + 1
+		if self.Lost >= self.LostFrames:
+			self.Box = None
+
+	#------------------------------------------------------------------------------------------------------
+	# Search - Finds the stickers in a downscaled copy of the whole frame, with the area thresholds scaled
+	#		 - accordingly. Returns the bounds of the stickers in the frame, or None.
+	#------------------------------------------------------------------------------------------------------
+
+	def Search(self, frame):
+
+		self.Searches = self.Searches + 1
+		Scale = self.Scale
+
+		small = cv2.resize(frame, None, fx=Scale, fy=Scale, interpolation=cv2.INTER_AREA)
+		Labels = self.Table.Classify(cv2.cvtColor(small, cv2.COLOR_BGR2HSV))
+		contours = cv2.findContours(Mask(Labels), cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)[0]
+
+		Stickers = []
+		for i in contours:
+			if MIN_AREA*Scale*Scale < cv2.contourArea(i) < MAX_AREA*Scale*Scale:
+				approx = cv2.approxPolyDP(i, 0.11*cv2.arcLength(i, True), True)
+				if len(approx) == 4:
+					Stickers.append(approx)
+
+		if len(Stickers) < self.MinStickers:
+			return None
+
+		# Keep the stickers close to the median one, far away contours are not part of the face
+		Centers = np.array([s.reshape(-1,2).mean(axis=0) for s in Stickers])
+		Side = np.sqrt(MAX_AREA)*Scale
+		Near = np.abs(Centers - np.median(Centers, axis=0)).max(axis=1) < 3*Side
+		Stickers = [s for s, n in zip(Stickers, Near) if n]
+
+		if len(Stickers) < self.MinStickers:
+			return None
+
+		return tuple(v/Scale for v in Bounds(Stickers, 0, 0))
+
+	#------------------------------------------------------------------------------------------------------
+	# Expand - Region around the box of the stickers: the box is grown to the size of a whole face (the
+	#		 - stickers found may be only part of it) plus the margin, and clipped to the frame.
+	#------------------------------------------------------------------------------------------------------
+
+	def Expand(self, Box, Width, Height):
+
+		x0, y0, x1, y1 = Box
+		Face = 3*np.sqrt(MAX_AREA)
+		dx = max(Face - (x1 - x0), 0) + self.Margin*Face
+		dy = max(Face - (y1 - y0), 0) + self.Margin*Face
+
+		return (int(max(x0 - dx, 0)), int(max(y0 - dy, 0)), int(min(x1 + dx, Width)), int(min(y1 + dy, Height)))
+
+#----------------------------------------------------------------------------------------------------------
+# Bounds - Bounding box (x0, y0, x1, y1) of a list of contours, shifted by (x, y).
+#----------------------------------------------------------------------------------------------------------
+
+def Bounds(Contours, x, y):
+
+	Points = np.concatenate([c.reshape(-1,2) for c in Contours])
+	x0, y0 = Points.min(axis=0)
+	x1, y1 = Points.max(axis=0)
+
+	return (x0 + x, y0 + y, x1 + x, y1 + y)
@@ -0,0 +1,169 @@
+
+##################################################
+## CUBE VALIDATOR
+
+# Validation of the scanned cube (sKociemba) before it is given to the
+# Kociemba's algorithm. A cube that can not be reached by turning the faces
+# is rejected in microseconds with the reason, and with the faces that were
+# most likely misread, so only those faces are scanned again:
+
+# - every color has 9 facelets and the 6 centres are different
+# - every corner and edge is a real cubie and appears exactly once
+# - the corner twists add up to a multiple of 3, the edge flips to a multiple
+#   of 2, and the corner and edge permutations have the same parity
+
+# The cubies are read from the compact state of CubeModel (see Cubies).
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import collections
+import numpy as np
+from CubeModel import FACE_ORDER, CORNER_FACELETS, EDGE_FACELETS, INVALID, Cubies, Encode
+
+
+#----------------------------------------------------------------------------------------------------------
+# Suspect weights - Weight of a facelet whose color is not the one of any centre, of a facelet of a color
+# with more than 9 facelets, and of a facelet of a cubie that does not exist or appears twice.
+#----------------------------------------------------------------------------------------------------------
+
+INVALID_WEIGHT = 3
+EXCESS_WEIGHT = 1
+CUBIE_WEIGHT = 1
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# Validation - Result of ValidateState:
+#			 - Valid	- True when the cube can be solved
+#			 - Errors	- list of {'type', 'detail'} (e.g. 'FaceletCount', 'IllegalCubie', 'Parity')
+#			 - Suspects - faces most likely misread, the most likely first (empty when the cube is valid)
+#			 - Scores	- weight of the suspect facelets of each face (see the suspect weights)
+#----------------------------------------------------------------------------------------------------------
+
+Validation = collections.namedtuple('Validation', ['Valid', 'Errors', 'Suspects', 'Scores'])
+
+#----------------------------------------------------------------------------------------------------------
+# CubieErrors - Errors of the cubie level encoding of a compact state whose colors are right, and the
+#			  - facelets of the cubies that do not exist or appear more than once.
+#----------------------------------------------------------------------------------------------------------
+
+def CubieErrors(State):
+
+	Errors = []
+	Facelets = []
+	CornerPermutation, CornerTwist, EdgePermutation, EdgeFlip = Cubies(State)
+
+	for Name, Permutation, Table, Count in (('corner', CornerPermutation, CORNER_FACELETS, 8), ('edge', EdgePermutation, EDGE_FACELETS, 12)):
+		Illegal = Permutation < 0
+		Repeated = np.bincount(Permutation[~Illegal], minlength=Count)[np.maximum(Permutation, 0)] > 1
+		if Illegal.any():
+			Errors.append({'type': 'IllegalCubie', 'detail': f'{Illegal.sum()} {Name}(s) with colors that no {Name} has'})
+		if (Repeated & ~Illegal).any():
+			Errors.append({'type': 'DupedCubie', 'detail': f'Some {Name}s appear more than once'})
+		Facelets.extend(Table[Illegal | Repeated].ravel().tolist())
+
+	if Errors:
+		return Errors, Facelets
+
+	if CornerTwist.sum() % 3:
+		Errors.append({'type': 'CornerTwist', 'detail': 'One corner is twisted'})
+	if EdgeFlip.sum() % 2:
+		Errors.append({'type': 'EdgeFlip', 'detail': 'One edge is flipped'})
+	if Parity(CornerPermutation) != Parity(EdgePermutation):
+		Errors.append({'type': 'Parity', 'detail': 'Two corners or two edges are exchanged'})
+
+	return Errors, Facelets
+
+#----------------------------------------------------------------------------------------------------------
+# Parity - Parity (0 or 1) of a permutation.
+#----------------------------------------------------------------------------------------------------------
+
+def Parity(Permutation):
+
+	Permutation = np.asarray(Permutation)
+
+	return int(np.triu(Permutation[:,None] > Permutation[None,:], 1).sum() % 2)
+
+#----------------------------------------------------------------------------------------------------------
+# RotatedFaces - Faces whose 3x3 colors, turned by 90, 180 or 270 degrees, make the cube valid (a face
+#			   - shown turned while it was scanned).
+#----------------------------------------------------------------------------------------------------------
+
+def RotatedFaces(State):
+
+	Faces = []
+	for f in range(6):
+		for Turns in (1, 2, 3):
+			Turned = State.copy()
+			Turned[9*f:9*f+9] = np.rot90(State[9*f:9*f+9].reshape(3,3), Turns).ravel()
+			if not CubieErrors(Turned)[0]:
+				Faces.append(FACE_ORDER[f])
+				break
+
+	return Faces
+
+#----------------------------------------------------------------------------------------------------------
+# RepairedFaces - Faces with a facelet of the Candidates (indexes) whose color, replaced by a color with less
+#				- than 9 facelets, makes the cube valid (a single sticker misread).
+#----------------------------------------------------------------------------------------------------------
+
+def RepairedFaces(State, Counts, Candidates):
+
+	Faces = []
+	for i in Candidates:
+		for Color in np.flatnonzero(Counts < 9):
+			Repaired = State.copy()
+			Repaired[i] = Color
+			if (np.bincount(Repaired, minlength=6)[:6] == 9).all() and not CubieErrors(Repaired)[0]:
+				Faces.append(FACE_ORDER[i//9])
+
+	return sorted(set(Faces), key=FACE_ORDER.index)
+
+#----------------------------------------------------------------------------------------------------------
+# ValidateState - Validation of sKociemba (see Validation). The suspect faces are, in this order: the faces
+#				- where changing one sticker makes the cube valid, the faces that make it valid when turned,
+#				- the faces with the highest score, or every face.
+#----------------------------------------------------------------------------------------------------------
+
+def ValidateState(sKociemba):
+
+	State = Encode(sKociemba)
+	Errors = []
+	Weights = np.zeros(54)
+
+	Centers = State[4::9]
+	if (Centers != np.arange(6)).any():
+		Repeated = [FACE_ORDER[f] for f in range(6) if Centers[f] != f] + [FACE_ORDER[Centers[f]] for f in range(6) if Centers[f] != f]
+		Errors.append({'type': 'DupedCenter', 'detail': f'Several centres have the same color (faces {", ".join(sorted(set(Repeated)))})'})
+		Scores = np.array([float(Face in Repeated) for Face in FACE_ORDER])
+		return Validation(False, Errors, sorted(set(Repeated), key=FACE_ORDER.index), Scores)
+
+	Counts = np.bincount(State[State != INVALID], minlength=6)
+	if (State == INVALID).any() or (Counts != 9).any():
+		Errors.append({'type': 'FaceletCount', 'detail': 'Not every color has 9 facelets: ' + ', '.join(f'{sKociemba[9*f+4]} {Counts[f]}' for f in range(6))})
+		Weights[State == INVALID] += INVALID_WEIGHT
+		Weights[(State != INVALID) & (Counts[np.minimum(State, 5)] > 9)] += EXCESS_WEIGHT
+
+	Cubie, Facelets = CubieErrors(State)
+	Errors.extend(Cubie)
+	np.add.at(Weights, Facelets, CUBIE_WEIGHT)
+
+	if not Errors:
+		return Validation(True, [], [], np.zeros(6))
+
+	Scores = Weights.reshape(6,9).sum(axis=1)
+	if (Counts == 9).all() and not (State == INVALID).any():
+		Suspects = RotatedFaces(State)
+	else:
+		Suspects = RepairedFaces(State, Counts, np.flatnonzero(Weights))
+	if not Suspects:
+		Suspects = [FACE_ORDER[f] for f in np.flatnonzero(Scores == Scores.max())] if Scores.max() > 0 else list(FACE_ORDER)
+
+	return Validation(False, Errors, Suspects, Scores)
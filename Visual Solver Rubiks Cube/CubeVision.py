@@ -0,0 +1,415 @@
+
+##################################################
+## CUBE VISION
+
+# Computer vision stage of the Visual Rubik's Cube Solver: finds the
+# rectangles of the cube's face in a frame and reads the color and central
+# point of each sticker. It has no GUI so it can be used by the real-time
+# solver (RubiksCube.py) and by the headless mode (Headless.py).
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import cv2
+import numpy as np
+from ColorClassifier import COLORS, Mask, ClassifyStickers, Centroids, Patches
+from LatticeFit import FitLattice, ClassifyLattice
+from StageProfiler import NULL_PROFILER
+from FrameBuffers import FrameBuffers, NO_BUFFERS
+
+
+#----------------------------------------------------------------------------------------------------------
+# Color Ranges - Each user has their own color calibration.
+# 			   - this must be done according to light conditions
+#----------------------------------------------------------------------------------------------------------
+
+#BLUE - Tuned
+lower_blue = np.array([93,137,114])
+upper_blue = np.array([118,255,255])
+#GREEN - Tuned
+lower_green = np.array([52,90,105])
+upper_green = np.array([87,255,255])
+#YELLOW - Tuned
+lower_yellow = np.array([28,46,126])
+upper_yellow = np.array([65,255,255])
+#ORANGE - Tuned
+lower_orange = np.array([0,0,228])
+upper_orange = np.array([28,255,255])
+#WHITE - Tuned
+lower_white1 = np.array([0,0,172])
+upper_white1 = np.array([0,21,255])
+lower_white2 = np.array([71,0,132])
+upper_white2 = np.array([109,170,255])
+#RED - Tuned
+lower_red = np.array([146,60,126])
+upper_red = np.array([178,255,255])
+
+#----------------------------------------------------------------------------------------------------------
+# Crop - Region (x0, y0, x1, y1) of the frame where the cube is searched when it is not tracked (see
+#	   - CubeTracker). The cube's face must be shown inside it.
+#----------------------------------------------------------------------------------------------------------
+
+CROP = (150, 100, 500, 350)
+
+#----------------------------------------------------------------------------------------------------------
+# Sticker area - Area (pixels) of the contours accepted as stickers (this was tunned).
+#----------------------------------------------------------------------------------------------------------
+
+MIN_AREA = 1117
+MAX_AREA = 2441
+
+#----------------------------------------------------------------------------------------------------------
+# ColorRanges - Calibrated ranges in the format expected by ColorTable. The order of the list is the
+#			  - priority when two ranges overlap.
+#----------------------------------------------------------------------------------------------------------
+
+def ColorRanges():
+	return [('b', lower_blue, upper_blue),
+			('g', lower_green, upper_green),
+			('y', lower_yellow, upper_yellow),
+			('o', lower_orange, upper_orange),
+			('r', lower_red, upper_red),
+			('w', lower_white1, upper_white1),
+			('w', lower_white2, upper_white2)]
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# CalibrationError - Raised when the color of a sticker can not be identified with the current calibration.
+#----------------------------------------------------------------------------------------------------------
+
+class CalibrationError(Exception):
+	pass
+
+#----------------------------------------------------------------------------------------------------------
+# FindRectangles - Crops the Region of the frame, converts it to HSV, builds the color mask and finds the
+#				 - rectangles of the cube. Only contours with an area between MIN_AREA and MAX_AREA and 4
+#				 - edges are useful. The rectangles are drawn on the cropped frame f_c (a view of the frame)
+#				 - and their coordinates are relative to it.
+#				 - Each step is timed as a stage of the Profiler (see StageProfiler). The images are written
+#				 - into Buffers (see FrameBuffers), so they are only valid until the next frame.
+#				 - With Scale < 1 (pyramid detection) the stickers are found in a copy of the crop downscaled
+#				 - by Scale, with the area thresholds scaled accordingly, and the rectangles are mapped back
+#				 - to the crop. The mask is then the downscaled one, while hsv and Labels are full resolution
+#				 - images only calculated where they are read (see LazyImage), so the colors of the stickers
+#				 - are still read at full resolution. The small stickers lose their corners when downscaled:
+#				 - on the synthetic frames of Benchmark, Scale = 0.5 is about 2x faster but finds the face
+#				 - in 86% of the tilted frames (96% at full resolution) and 97% of the noisy ones (100%),
+#				 - and the lattice is not faster. Scale = 1 is the default.
+#----------------------------------------------------------------------------------------------------------
+
+def FindRectangles(frame, Table, Profiler=NULL_PROFILER, Region=CROP, Buffers=NO_BUFFERS, Scale=1.0):
+
+	#--------------------------------------------------------------
+	# Crop the frame as not all the information read by the camera
+	# is useful.
+	#--------------------------------------------------------------
+
+	with Profiler.Stage('crop'):
+		x0, y0, x1, y1 = Region
+		f_c= frame[y0:y1, x0:x1]
+
+	#--------------------------------------------------------------
+	# Pyramid detection: the stickers are searched in a downscaled
+	# copy of the crop.
+	#--------------------------------------------------------------
+
+	Source = f_c
+	if Scale != 1:
+		with Profiler.Stage('resize'):
+			Size = (max(int(round(f_c.shape[1]*Scale)), 1), max(int(round(f_c.shape[0]*Scale)), 1))
+			Source = cv2.resize(f_c, Size, dst=Buffers.View('small', (Size[1], Size[0], 3)), interpolation=cv2.INTER_AREA)
+
+	#--------------------------------------------------------------
+	# Convert BGR to HSV for color isolation
+	#--------------------------------------------------------------
+
+	with Profiler.Stage('cvtColor'):
+		hsv = cv2.cvtColor(Source,cv2.COLOR_BGR2HSV,dst=Buffers.View('hsv', Source.shape))
+
+	#--------------------------------------------------------------
+	# Classify every pixel with the color lookup table. The label
+	# image gives the final mask (any color) and the mask of each
+	# individual color in a single pass.
+	#--------------------------------------------------------------
+
+	with Profiler.Stage('mask'):
+		Labels = Table.Classify(hsv, Buffers)
+		mask = Mask(Labels, Buffers.View('mask', Labels.shape))
+
+	#--------------------------------------------------------------
+	# Apply filter to smoothe the image 
+	#--------------------------------------------------------------
+
+	with Profiler.Stage('bilateralFilter'):
+		mask = cv2.bilateralFilter(mask,1,50,120,dst=Buffers.View('filtered', mask.shape))
+
+	#--------------------------------------------------------------
+	# Find the contours in the image, this includes the rectangles
+	# of the Rubiks cube.
+	#--------------------------------------------------------------
+
+	with Profiler.Stage('findContours'):
+		contours = cv2.findContours(mask,cv2.RETR_TREE,cv2.CHAIN_APPROX_SIMPLE)[0]
+
+	#--------------------------------------------------------------
+	# Contours filtering.
+	#--------------------------------------------------------------
+
+	with Profiler.Stage('contourFilter'):
+		Rectangles = FilterContours(contours, Scale)
+		if Scale != 1:
+			# Centre of the downscaled pixel in the crop
+			Rectangles = [np.round((r + 0.5)/Scale - 0.5).astype(np.int32) for r in Rectangles]
+			hsv = LazyImage(f_c, HsvPixels)
+			Labels = LazyImage(f_c, lambda Pixels: LabelPixels(Pixels, Table))
+		cv2.drawContours(f_c, Rectangles, -1,(255,0,255),2)
+
+	return f_c, hsv, Labels, mask, Rectangles
+
+#----------------------------------------------------------------------------------------------------------
+# FilterContours - The contours that can be stickers: an area between MIN_AREA and MAX_AREA (times Scale^2
+#				 - for a downscaled image) and 4 edges once approximated. Returns the approximated
+#				 - quadrilaterals.
+#----------------------------------------------------------------------------------------------------------
+
+def FilterContours(contours, Scale=1.0):
+
+	Rectangles=[]
+	MinArea, MaxArea = MIN_AREA*Scale*Scale, MAX_AREA*Scale*Scale
+
+	for i in contours: 
+		if (cv2.contourArea(i)>MinArea) and (cv2.contourArea(i)<MaxArea):
+			epsilon = 0.11*cv2.arcLength(i, True)
+			approx = cv2.approxPolyDP(i, epsilon,True)
+
+			if len(approx)==4:
+				Rectangles.append(approx)
+
+	return Rectangles
+
+#----------------------------------------------------------------------------------------------------------
+# LazyImage - Image calculated from Source (e.g. the HSV image of the BGR crop) only at the pixels that are
+#			- read: Image[ys, xs] converts Source[ys, xs] with Convert, which maps an array of BGR pixels to
+#			- an array of the same shape (or without the last axis for labels).
+#----------------------------------------------------------------------------------------------------------
+
+class LazyImage:
+
+	def __init__(self, Source, Convert):
+
+		self.Source = Source
+		self.Convert = Convert
+		self.shape = Source.shape[:2] + Convert(Source[:1,:1]).shape[2:]
+
+	def __getitem__(self, Index):
+		return self.Convert(self.Source[Index])
+
+#----------------------------------------------------------------------------------------------------------
+# HsvPixels - HSV values of an array of BGR pixels (any shape ending in 3).
+#----------------------------------------------------------------------------------------------------------
+
+def HsvPixels(Pixels):
+
+	Pixels = np.ascontiguousarray(Pixels)
+
+	return cv2.cvtColor(Pixels.reshape(1,-1,3), cv2.COLOR_BGR2HSV).reshape(Pixels.shape)
+
+#----------------------------------------------------------------------------------------------------------
+# LabelPixels - Labels (see ColorTable) of an array of BGR pixels (any shape ending in 3).
+#----------------------------------------------------------------------------------------------------------
+
+def LabelPixels(Pixels, Table):
+
+	return Table.Classify(HsvPixels(Pixels).reshape(1,-1,3)).reshape(Pixels.shape[:-1])
+
+#----------------------------------------------------------------------------------------------------------
+# CreateMatrix - Considering a list of colors and central points observed from CV2, this function  
+#			   - shapes the data into a matrix form to be equal to the Cube's face itself.
+#----------------------------------------------------------------------------------------------------------
+
+def CreateMatrix(Points, Colors):
+
+	Pointsc1 = Points[0:3]
+	Pointsc2 = Points[3:6]
+	Pointsc3 = Points[6:9]
+
+	Colorsc1 = np.array(Colors[0:3])
+	Colorsc2 = np.array(Colors[3:6])
+	Colorsc3 = np.array(Colors[6:9])
+
+	Outc1 = np.argsort(Pointsc1 ,axis=0)
+	Outc2 = np.argsort(Pointsc2 ,axis=0)
+	Outc3 = np.argsort(Pointsc3 ,axis=0)
+
+	Colorsc1 = Colorsc1[Outc1[:,1]]
+	Colorsc2 = Colorsc2[Outc2[:,1]]
+	Colorsc3 = Colorsc3[Outc3[:,1]]
+
+	Pointsc1 = Pointsc1[Outc1[:,1]]
+	Pointsc2 = Pointsc2[Outc2[:,1]]
+	Pointsc3 = Pointsc3[Outc3[:,1]]
+	
+	MatrixPoints = np.concatenate((Pointsc1, Pointsc2, Pointsc3),axis=1)
+	MatrixPoints = MatrixPoints.reshape((3,3,2))
+	MatrixColors = np.array([Colorsc1,Colorsc2,Colorsc3]).T
+
+	return MatrixColors, MatrixPoints
+
+#----------------------------------------------------------------------------------------------------------
+# IdentifyPosCol - From the list of rectangles indentified, this function calculates the central point of 
+#				 - each one and the associated color. All the rectangles are classified in one batch using
+#				 - the median color of a small patch around each central point.
+#----------------------------------------------------------------------------------------------------------
+
+def IdentifyPosCol(Rect_l, hsv, Table):
+
+	Colors, Points = ClassifyStickers(Rect_l, hsv, Table)
+
+	if ('Z' in Colors) or (len(Colors) != 9):
+		print(f'Error en: {Colors}')
+		raise CalibrationError("Color calibration is required")
+
+	out = np.argsort(Points,axis=0)
+	Colors = Colors[out[:,0]]
+	Points = Points[out[:,0]]
+
+
+	return Colors, Points
+
+#----------------------------------------------------------------------------------------------------------
+# DetectBatch - IdentifyPosCol + CreateMatrix for a batch of frames (N, H, W, 3), e.g. a recorded session.
+#			  - The frames are cropped to Region and stacked into one image, so the HSV conversion runs once
+#			  - for the whole batch and the color table once every Chunk frames (through reused buffers, so
+#			  - the memory does not grow with the batch), and the stickers of all the frames are sampled and
+#			  - classified at once. Only the filter and the contours (which must not cross from one frame to
+#			  - the next) run frame by frame. Returns:
+#			  - MatrixColors - colors (N, 3, 3), 'Z' for the frames without a face
+#			  - MatrixPoints - central points (N, 3, 3, 2) relative to the crop, -1 without a face
+#			  - Found		 - True for the frames where the 9 stickers were found and identified
+#----------------------------------------------------------------------------------------------------------
+
+def DetectBatch(Frames, Table, Region=CROP, Radius=4, Chunk=32):
+
+	x0, y0, x1, y1 = Region
+	Crops = np.ascontiguousarray(Frames[:, y0:y1, x0:x1])
+	N, Height, Width = Crops.shape[:3]
+
+	hsv = cv2.cvtColor(Crops.reshape(N*Height, Width, 3), cv2.COLOR_BGR2HSV)
+	Masks = np.empty((N, Height, Width), np.uint8)
+	Buffers = FrameBuffers()
+	for n in range(0, N, Chunk):
+		Mask(Table.Classify(hsv[n*Height:(n+Chunk)*Height], Buffers), Masks[n:n+Chunk].reshape(-1, Width))
+	hsv = hsv.reshape(N, Height, Width, 3)
+
+	Rect_l = []
+	Owner = []
+	for n in range(N):
+		contours = cv2.findContours(cv2.bilateralFilter(Masks[n],1,50,120),cv2.RETR_TREE,cv2.CHAIN_APPROX_SIMPLE)[0]
+		Rectangles = FilterContours(contours)
+		Rect_l += Rectangles
+		Owner += [n]*len(Rectangles)
+
+	MatrixColors = np.full((N,3,3), 'Z')
+	MatrixPoints = np.full((N,3,3,2), -1)
+	Found = np.zeros(N, bool)
+	if len(Rect_l) == 0:
+		return MatrixColors, MatrixPoints, Found
+
+	Owner = np.array(Owner)
+	Points = Centroids(Rect_l).astype(int)
+	Colors = np.array(COLORS)[Table.ClassifyValues(np.median(Patches(hsv, Points, Radius, Owner), axis=1))]
+
+	for n in np.flatnonzero(np.bincount(Owner, minlength=N) == 9):
+		FacePoints, FaceColors = Points[Owner == n], Colors[Owner == n]
+		if 'Z' in FaceColors:
+			continue
+		out = np.argsort(FacePoints,axis=0)
+		MatrixColors[n], MatrixPoints[n] = CreateMatrix(FacePoints[out[:,0]], FaceColors[out[:,0]])
+		Found[n] = True
+
+	return MatrixColors, MatrixPoints, Found
+
+#----------------------------------------------------------------------------------------------------------
+# StringFace - This function takes the a matrix of observed colors and shape it into a concatenated string  
+#			 - required for the Kociemba's algorithm (see CubeModel.Encode for its compact form)
+#----------------------------------------------------------------------------------------------------------
+
+def StringFace(Matrix):
+	return ''.join(np.ravel(Matrix))
+
+#----------------------------------------------------------------------------------------------------------
+# FrameDetection - Detection of one frame shared by every consumer of the frame (face voting, guided
+#				 - movements, calibration view). The rectangles are found in the Region when it is created;
+#				 - the 3x3 grid (see LatticeFit) and its colors are only calculated the first time they are
+#				 - needed. The points are relative to f_c, whose top left corner is at Origin in the frame.
+#				 - Scale < 1 finds the rectangles in a downscaled image (see FindRectangles).
+#----------------------------------------------------------------------------------------------------------
+
+class FrameDetection:
+
+	def __init__(self, frame, Table, Profiler=NULL_PROFILER, Region=CROP, Buffers=NO_BUFFERS, Scale=1.0):
+
+		self.Table = Table
+		self.Profiler = Profiler
+		self.Region = Region
+		self.Origin = (Region[0], Region[1])
+		self.f_c, self.hsv, self.Labels, self.mask, self.Rectangles = FindRectangles(frame, Table, Profiler, Region, Buffers, Scale)
+		self.Fit = None
+		self.Fitted = False
+		self.Reading = None
+		self.Classified = False
+
+	#------------------------------------------------------------------------------------------------------
+	# Lattice - 3x3 grid fitted to the rectangles (see FaceLattice), or None when no face was found.
+	#------------------------------------------------------------------------------------------------------
+
+	def Lattice(self):
+
+		if not self.Fitted:
+			with self.Profiler.Stage('FitLattice'):
+				self.Fit = FitLattice(self.Rectangles)
+			self.Fitted = True
+
+		return self.Fit
+
+	#------------------------------------------------------------------------------------------------------
+	# Read - (MatrixColors, Confidence, MatrixPoints) of the face, or None when no face was found. The
+	#	   - cells without color are 'Z' with no confidence.
+	#------------------------------------------------------------------------------------------------------
+
+	def Read(self):
+
+		if not self.Classified:
+			Lattice = self.Lattice()
+			if Lattice is not None:
+				with self.Profiler.Stage('ClassifyLattice'):
+					MatrixColors, Confidence = ClassifyLattice(Lattice, self.hsv, self.Labels, self.Table)
+				self.Reading = (MatrixColors, Confidence, Lattice.MatrixPoints)
+			self.Classified = True
+
+		return self.Reading
+
+	#------------------------------------------------------------------------------------------------------
+	# Detect - (MatrixColors, MatrixPoints) of the face read from this frame only. Raises a CalibrationError
+	#		 - when there is no face or a cell has no color.
+	#------------------------------------------------------------------------------------------------------
+
+	def Detect(self):
+
+		Reading = self.Read()
+		if Reading is None:
+			raise CalibrationError("The cube's face was not found")
+
+		MatrixColors, Confidence, MatrixPoints = Reading
+		if 'Z' in MatrixColors:
+			print(f'Error en: {MatrixColors.ravel()}')
+			raise CalibrationError("Color calibration is required")
+
+		return MatrixColors, MatrixPoints
@@ -0,0 +1,121 @@
+
+##################################################
+## FACE VOTER
+
+# Temporal accumulator of the colors of the face seen by the camera. Every
+# frame where the 3x3 grid was found votes for the color of each cell with
+# its confidence (see ClassifyLattice); the older votes decay. A face is
+# accepted as soon as every cell is far enough ahead of its runner-up, so a
+# clear face is accepted after a few frames, a doubtful one needs more, and a
+# single bad frame can not change the result. Frames without a grid (e.g. a
+# glare or a dropped frame) are skipped, up to MaxGap in a row.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import numpy as np
+from ColorClassifier import COLORS
+
+
+#----------------------------------------------------------------------------------------------------------
+# Indexes - Letter --> index of COLORS (through the sorted letters) and the cell of each vote.
+#----------------------------------------------------------------------------------------------------------
+
+COLOR_ORDER = np.array(sorted(COLORS))
+COLOR_INDEX = np.array([COLORS.index(c) for c in COLOR_ORDER])
+ROWS, COLS = np.indices((3,3))
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# FaceVoter - Threshold		- votes the winner of every cell must have over its runner-up
+#			- Decay			- weight kept by the previous votes on each new frame
+#			- MaxGap		- frames in a row without a grid before the votes are forgotten
+#			- UnknownWeight - vote of a cell without color ('Z'), so a sticker out of the calibrated
+#			-				  ranges ends up winning as 'Z' instead of never being accepted
+#----------------------------------------------------------------------------------------------------------
+
+class FaceVoter:
+
+	def __init__(self, Threshold=2.0, Decay=0.8, MaxGap=5, UnknownWeight=0.5):
+
+		self.Threshold = Threshold
+		self.Decay = Decay
+		self.MaxGap = MaxGap
+		self.UnknownWeight = UnknownWeight
+		self.Votes = np.zeros((3,3,len(COLORS)))
+		self.Reset()
+
+	#------------------------------------------------------------------------------------------------------
+	# Reset - Forgets the votes (e.g. when another face is shown).
+	#------------------------------------------------------------------------------------------------------
+
+	def Reset(self):
+
+		self.Votes[:] = 0
+		self.Frames = 0
+		self.Gap = 0
+
+	#------------------------------------------------------------------------------------------------------
+	# Add - Votes of one frame: the colors (3x3 letters) and their confidence (3x3). A confident central
+	#	  - color different from the current winner means another face is shown, so the votes are reset.
+	#------------------------------------------------------------------------------------------------------
+
+	def Add(self, MatrixColors, Confidence):
+
+		Labels = COLOR_INDEX[np.searchsorted(COLOR_ORDER, np.asarray(MatrixColors))]
+
+		if self.Frames and (Confidence[1][1] >= 0.5) and (Labels[1][1] != self.Votes[1][1].argmax()):
+			self.Reset()
+
+		Weight = np.where(Labels == 0, self.UnknownWeight, Confidence)
+
+		self.Votes *= self.Decay
+		self.Votes[ROWS, COLS, Labels] += Weight
+		self.Frames = self.Frames + 1
+		self.Gap = 0
+
+	#------------------------------------------------------------------------------------------------------
+	# Miss - A frame without a grid.
+	#------------------------------------------------------------------------------------------------------
+
+	def Miss(self):
+
+		self.Gap = self.Gap + 1
+		if self.Gap > self.MaxGap:
+			self.Reset()
+
+	#------------------------------------------------------------------------------------------------------
+	# Colors - Winning color of each cell (3x3 letters), or None before the first vote.
+	#------------------------------------------------------------------------------------------------------
+
+	def Colors(self):
+
+		if self.Frames == 0:
+			return None
+
+		return np.array(COLORS)[self.Votes.argmax(axis=2)]
+
+	#------------------------------------------------------------------------------------------------------
+	# Margin - Votes of the winner of each cell over its runner-up (3x3).
+	#------------------------------------------------------------------------------------------------------
+
+	def Margin(self):
+
+		Sorted = np.sort(self.Votes, axis=2)
+
+		return Sorted[...,-1] - Sorted[...,-2]
+
+	#------------------------------------------------------------------------------------------------------
+	# Accepted - True when the winner of every cell has at least Threshold votes over its runner-up.
+	#------------------------------------------------------------------------------------------------------
+
+	def Accepted(self):
+
+		return (self.Frames > 0) and (self.Margin().min() >= self.Threshold)
@@ -0,0 +1,79 @@
+
+##################################################
+## FRAME BUFFERS
+
+# Preallocated images of the Visual Rubik's Cube Solver main loop. Every
+# per-frame image (HSV, lookup index, labels, masks, preview) is written into
+# a buffer that is allocated once and reused through the dst= outputs of
+# OpenCV and the out= outputs of NumPy, so the steady-state frames do not
+# allocate images. The buffers grow when a larger region is processed (e.g.
+# when the tracked cube comes closer), which is counted in Allocations.
+
+# Only the images are preallocated. Each frame still allocates the contours
+# returned by findContours (about 5 KB) and the small arrays of the grid fit
+# and of the colors of the stickers (about 30 KB more for the whole
+# detection), against about 1 MB per frame without buffers (see
+# Benchmark.BenchmarkAllocations).
+
+# Usage:
+# hsv = cv2.cvtColor(f_c, cv2.COLOR_BGR2HSV, dst=Buffers.View('hsv', f_c.shape))
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import numpy as np
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# FrameBuffers - Named buffers. View returns a contiguous array of the given shape over the buffer, which
+#			   - is zero filled when it is (re)allocated.
+#----------------------------------------------------------------------------------------------------------
+
+class FrameBuffers:
+
+	def __init__(self):
+
+		self.Buffers = {}
+		self.Allocations = 0
+
+	def View(self, Name, Shape, dtype=np.uint8):
+
+		Size = int(np.prod(Shape))
+		Buffer = self.Buffers.get(Name)
+
+		if (Buffer is None) or (Buffer.size < Size) or (Buffer.dtype != dtype):
+			Buffer = np.zeros(Size, dtype)
+			self.Buffers[Name] = Buffer
+			self.Allocations = self.Allocations + 1
+
+		return Buffer[:Size].reshape(Shape)
+
+	#------------------------------------------------------------------------------------------------------
+	# Bytes - Memory held by the buffers.
+	#------------------------------------------------------------------------------------------------------
+
+	def Bytes(self):
+		return sum(Buffer.nbytes for Buffer in self.Buffers.values())
+
+#----------------------------------------------------------------------------------------------------------
+# NullBuffers - No buffers: View returns None, so OpenCV and NumPy allocate a new output (dst=None).
+#----------------------------------------------------------------------------------------------------------
+
+class NullBuffers:
+
+	Allocations = 0
+
+	def View(self, Name, Shape, dtype=np.uint8):
+		return None
+
+	def Bytes(self):
+		return 0
+
+NO_BUFFERS = NullBuffers()
@@ -0,0 +1,144 @@
+
+##################################################
+## FRAME CAPTURE
+
+# Capture stage of the Visual Rubik's Cube Solver. A background thread owns
+# the cv2.VideoCapture and keeps only the newest frames, so the processing
+# loop always works on the freshest image and a slow frame never makes the
+# camera driver queue stale ones.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import collections
+import threading
+import cv2
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# LatestFrameCapture - Reads the camera in its own thread into a small ring buffer (latest frame wins).
+#					 - Source is anything accepted by cv2.VideoCapture (camera index or file).
+#					 - Counters:
+#					 - Captured  - frames read from the camera
+#					 - Processed - frames handed to the processing loop
+#					 - Dropped   - frames replaced by a newer one before being processed
+#					 - With Reuse the frames are read into a pool of preallocated images (vid.read(image=...)):
+#					 - the frame returned by Read is only valid until the next call to Read.
+#----------------------------------------------------------------------------------------------------------
+
+class LatestFrameCapture:
+
+	def __init__(self, Source=0, BufferSize=2, Reuse=False):
+
+		self.vid = cv2.VideoCapture(Source)
+		self.Buffer = collections.deque(maxlen=BufferSize)
+		self.Reuse = Reuse
+		self.Free = collections.deque()
+		self.Current = None
+		self.Condition = threading.Condition()
+		self.Running = False
+		self.Thread = None
+
+		self.Captured = 0
+		self.Processed = 0
+		self.Dropped = 0
+
+	#------------------------------------------------------------------------------------------------------
+	# Start - Launches the capture thread.
+	#------------------------------------------------------------------------------------------------------
+
+	def Start(self):
+
+		self.Running = True
+		self.Thread = threading.Thread(target=self.Capture, daemon=True)
+		self.Thread.start()
+		return self
+
+	#------------------------------------------------------------------------------------------------------
+	# Capture - Body of the capture thread. It never waits for the processing loop, when the ring buffer is
+	#		  - full the oldest frame is discarded.
+	#------------------------------------------------------------------------------------------------------
+
+	def Capture(self):
+
+		while self.Running:
+			with self.Condition:
+				Image = self.Free.popleft() if (self.Reuse and self.Free) else None
+			ret, frame = self.vid.read(image=Image) if Image is not None else self.vid.read()
+
+			with self.Condition:
+				if not ret:
+					self.Running = False
+				else:
+					if len(self.Buffer) == self.Buffer.maxlen:
+						self.Dropped = self.Dropped + 1
+						self.Recycle(self.Buffer[0])
+					self.Buffer.append(frame)
+					self.Captured = self.Captured + 1
+				self.Condition.notify_all()
+
+	#------------------------------------------------------------------------------------------------------
+	# Read - Returns (ret, frame) like cv2.VideoCapture.read with the newest frame. The older frames still
+	#	   - in the buffer are counted as dropped. Waits up to Timeout seconds when no new frame is available,
+	#	   - so the same frame is never processed twice.
+	#------------------------------------------------------------------------------------------------------
+
+	def Read(self, Timeout=1.0):
+
+		with self.Condition:
+			if not self.Buffer:
+				self.Condition.wait_for(lambda: self.Buffer or not self.Running, Timeout)
+
+			if not self.Buffer:
+				return False, None
+
+			frame = self.Buffer.pop()
+			self.Dropped = self.Dropped + len(self.Buffer)
+			for Old in self.Buffer:
+				self.Recycle(Old)
+			self.Buffer.clear()
+			self.Processed = self.Processed + 1
+
+			# The previous frame is no longer used by the processing loop
+			if self.Current is not None:
+				self.Recycle(self.Current)
+			self.Current = frame
+
+		return True, frame
+
+	#------------------------------------------------------------------------------------------------------
+	# Alive - True while the capture thread is still reading the camera (it stops when the camera fails or
+	#		- the file ends).
+	#------------------------------------------------------------------------------------------------------
+
+	def Alive(self):
+
+		return self.Running and (self.Thread is not None) and self.Thread.is_alive()
+
+	#------------------------------------------------------------------------------------------------------
+	# Recycle - Returns an image to the pool of the capture thread (with Reuse). Called with the Condition
+	#		  - held.
+	#------------------------------------------------------------------------------------------------------
+
+	def Recycle(self, Image):
+
+		if self.Reuse:
+			self.Free.append(Image)
+
+	#------------------------------------------------------------------------------------------------------
+	# Release - Stops the capture thread and releases the camera.
+	#------------------------------------------------------------------------------------------------------
+
+	def Release(self):
+
+		self.Running = False
+		if self.Thread is not None:
+			self.Thread.join()
+		self.vid.release()
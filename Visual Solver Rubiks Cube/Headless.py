@@ -0,0 +1,148 @@
+
+##################################################
+## VISUAL RUBIK'S CUBE SOLVER - HEADLESS MODE
+
+# Runs the detection --> scan --> solve --> movement tracking pipeline of the
+# Visual Rubik's Cube Solver without any window, camera or message box, as
+# fast as the CPU allows. The frames come from a video file, a folder of
+# images or any iterator of BGR frames.
+
+# Usage: python Headless.py <video file | image folder> [--output result.json]
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import argparse
+import json
+import os
+import cv2
+from ColorClassifier import ColorTable
+from CubeVision import ColorRanges, CalibrationError
+from CubeSession import CubeSession, SolveError
+from StageProfiler import StageProfiler, NULL_PROFILER
+from SolutionCache import SolutionCache
+from CubeTracker import CubeTracker
+from ColorProfiles import PROFILE_FILE as COLORS_FILE, ProfileStore
+from CubeSolver import MOVE_COSTS
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+#----------------------------------------------------------------------------------------------------------
+# Frames - Iterates over the frames of a source: a video file, a folder of images (in name order) or an
+#		 - iterator of BGR frames, which is returned as it is. An integer is the index of a camera.
+#----------------------------------------------------------------------------------------------------------
+
+def Frames(Source):
+
+	if not isinstance(Source, (str, int)):
+		yield from Source
+
+	elif os.path.isdir(Source):
+		for Name in sorted(os.listdir(Source)):
+			if Name.lower().endswith(IMAGE_EXTENSIONS):
+				frame = cv2.imread(os.path.join(Source, Name))
+				if frame is not None:
+					yield frame
+
+	else:
+		vid = cv2.VideoCapture(Source)
+		try:
+			while True:
+				ret, frame = vid.read()
+				if not ret:
+					break
+				yield frame
+		finally:
+			vid.release()
+
+#----------------------------------------------------------------------------------------------------------
+# RunHeadless - Processes all the frames of the source with a CubeSession and returns its structured result
+#			  - (see CubeSession.Result). Errors are returned in the 'error' field instead of stopping the
+#			  - program. The visual alerts are shortened to one frame as nobody is watching them.
+#			  - Reading the frames is timed as the 'capture' stage of the Profiler. The solutions are looked
+#			  - up in the Cache first (see SolutionCache). With Track set the cube is followed over the
+#			  - whole frame (see CubeTracker) instead of being searched in the fixed crop. With AutoCalibrate
+#			  - the colors are calibrated from the scanned faces (see Calibration). Scale < 1 finds the
+#			  - stickers in a downscaled image (pyramid detection, see FindRectangles). With Costs the
+#			  - cheapest candidate with that cost model is guided instead of the shortest solution (see
+#			  - SolveCandidates and CubeSession.Choose).
+#----------------------------------------------------------------------------------------------------------
+
+def RunHeadless(Source, Table=None, MaxFrames=None, BannerFrames=1, ReadyFrames=1, SolvedFrames=1, Profiler=NULL_PROFILER, Cache=None, Track=False, AutoCalibrate=False, Scale=1.0, Costs=None):
+
+	if Table is None:
+		Table = ColorTable(ColorRanges())
+
+	Tracker = CubeTracker(Table, Profiler=Profiler) if Track else None
+	Session = CubeSession(Table, BannerFrames, ReadyFrames, SolvedFrames, Profiler, Cache, Tracker=Tracker, AutoCalibrate=AutoCalibrate, Scale=Scale, Costs=Costs)
+	Error = None
+	Reader = iter(Frames(Source))
+
+	while True:
+		with Profiler.Stage('capture'):
+			frame = next(Reader, None)
+		if frame is None:
+			break
+
+		try:
+			Session.ProcessFrame(frame)
+		except (CalibrationError, SolveError) as e:
+			Error = {'type': type(e).__name__, 'message': str(e), 'frame': Session.FrameCount}
+			if isinstance(e, SolveError):
+				Error['search'] = e.Type
+				Error['detail'] = e.Detail
+			break
+
+		if Session.Finished or (MaxFrames is not None and Session.FrameCount >= MaxFrames):
+			break
+
+	Result = Session.Result()
+	Result['error'] = Error
+
+	return Result
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# MAIN
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+if __name__ == '__main__':
+
+	Parser = argparse.ArgumentParser(description="Visual Rubik's Cube Solver without GUI")
+	Parser.add_argument('source', help='video file or folder of images')
+	Parser.add_argument('--max-frames', type=int, default=None, help='stop after this number of frames')
+	Parser.add_argument('--output', default=None, help='write the result to this JSON file')
+	Parser.add_argument('--profile', default=None, help='write the latency of each stage to this CSV or JSON file')
+	Parser.add_argument('--cache', default=None, help='SQLite file of the solution cache')
+	Parser.add_argument('--track', action='store_true', help='follow the cube over the whole frame instead of the fixed crop')
+	Parser.add_argument('--colors', default=None, help='color profile (lighting preset) of the colors file')
+	Parser.add_argument('--colors-file', default=COLORS_FILE, help='JSON file of the color profiles (see ColorProfiles)')
+	Parser.add_argument('--scale', type=float, default=1.0, help='find the stickers in the frame downscaled by this factor (e.g. 0.5): about 2x faster, but misses more tilted and noisy faces (see FindRectangles)')
+	Parser.add_argument('--auto-calibrate', action='store_true', help='calibrate the colors from the scanned faces')
+	Parser.add_argument('--cheapest', action='store_true', help='guide the cheapest solution with MOVE_COSTS (B takes a rotation more)')
+	Args = Parser.parse_args()
+
+	Profiler = StageProfiler() if Args.profile else NULL_PROFILER
+	Cache = SolutionCache(Args.cache) if Args.cache else None
+	Table = ProfileStore(Args.colors_file, Args.colors).Current.Table
+	Result = RunHeadless(Args.source, Table, MaxFrames=Args.max_frames, Profiler=Profiler, Cache=Cache, Track=Args.track, AutoCalibrate=Args.auto_calibrate, Scale=Args.scale, Costs=MOVE_COSTS if Args.cheapest else None)
+
+	if Cache is not None:
+		Cache.Close()
+
+	if Args.profile:
+		Profiler.Dump(Args.profile)
+
+	if Args.output:
+		with open(Args.output, 'w') as f:
+			json.dump(Result, f, indent=2)
+	else:
+		print(json.dumps(Result, indent=2))
@@ -0,0 +1,215 @@
+
+##################################################
+## LATTICE FIT
+
+# Face detector of the Visual Rubik's Cube Solver. Instead of requiring the
+# 9 stickers to be found and sorting them by x and y, a 3x3 grid of stickers
+# is fitted to whatever candidate rectangles were found:
+# 1. Each candidate gives a hypothesis of the grid (its own position and the
+#    directions of its sides), and the hypothesis placing the most candidates
+#    on distinct cells of a 3x3 window wins (RANSAC consensus).
+# 2. A homography (or an affine model when there are few candidates) is
+#    fitted to the cells of the winning hypothesis with RANSAC.
+# 3. The central points of the 9 cells are predicted with the model, so the
+#    missing stickers are inferred, and each cell gets a confidence.
+# The grid follows the face when the cube is rotated or tilted.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import cv2
+import numpy as np
+from ColorClassifier import COLORS, Centroids, Patches, SampleStickers
+
+
+#----------------------------------------------------------------------------------------------------------
+# Grid - Distance between the centres of two neighbour stickers divided by the side of a sticker, used
+# when the candidates have no neighbours to measure it from.
+#----------------------------------------------------------------------------------------------------------
+
+PITCH_RATIO = 1.18
+
+#----------------------------------------------------------------------------------------------------------
+# Confidence - Weight of the cells inferred by the model (no candidate was found on them).
+#----------------------------------------------------------------------------------------------------------
+
+INFERRED_WEIGHT = 0.6
+
+#----------------------------------------------------------------------------------------------------------
+# Cells - Grid coordinates (col, row) of the 9 cells in row-major order.
+#----------------------------------------------------------------------------------------------------------
+
+CELLS = np.array([(col, row) for row in range(3) for col in range(3)], np.float64)
+
+#----------------------------------------------------------------------------------------------------------
+# Windows - Offsets of the 3x3 windows that contain the cell (0, 0) of a hypothesis, and the number of
+# cells occupied in a window given as a 9 bit mask.
+#----------------------------------------------------------------------------------------------------------
+
+WINDOWS = np.array([(ou, ov) for ou in (-2, -1, 0) for ov in (-2, -1, 0)], np.float64)
+BIT_COUNT = np.array([bin(Mask).count('1') for Mask in range(512)])
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# FaceLattice - 3x3 grid fitted to the candidates of a frame:
+#			  - MatrixPoints - central point of each cell (3x3x2), rows downward and columns rightward
+#			  - Observed	 - True for the cells where a candidate was found
+#			  - Residual	 - distance between the candidate and the cell, in pitches (0 when inferred)
+#			  - Inliers		 - number of observed cells
+#			  - Pitch		 - mean distance between neighbour cells (pixels)
+#----------------------------------------------------------------------------------------------------------
+
+class FaceLattice:
+
+	def __init__(self, MatrixPoints, Observed, Residual, Pitch):
+
+		self.MatrixPoints = MatrixPoints
+		self.Observed = Observed
+		self.Residual = Residual
+		self.Inliers = int(Observed.sum())
+		self.Pitch = Pitch
+
+#----------------------------------------------------------------------------------------------------------
+# SideVectors - The two side vectors of each quadrilateral (mean of the opposite sides).
+#----------------------------------------------------------------------------------------------------------
+
+def SideVectors(Rect_l):
+
+	Quads = np.array([Rect.reshape(-1,2) for Rect in Rect_l], np.float64)
+	E1 = ((Quads[:,1] - Quads[:,0]) + (Quads[:,2] - Quads[:,3]))/2
+	E2 = ((Quads[:,3] - Quads[:,0]) + (Quads[:,2] - Quads[:,1]))/2
+
+	return E1, E2
+
+#----------------------------------------------------------------------------------------------------------
+# PitchRatio - Distance between neighbour stickers in sides of a sticker, measured from the candidates that
+#			 - have a neighbour along one of their sides (PITCH_RATIO when none has).
+#------------------------------------------------------------------------------------------------------------
+
+def PitchRatio(Coordinates):
+
+	a, b = np.abs(Coordinates[...,0]), np.abs(Coordinates[...,1])
+	Along = np.concatenate((a[(a > 0.8) & (a < 1.8) & (b < 0.3)], b[(b > 0.8) & (b < 1.8) & (a < 0.3)]))
+
+	return float(np.median(Along)) if len(Along) else PITCH_RATIO
+
+#----------------------------------------------------------------------------------------------------------
+# FitLattice - Fits the 3x3 grid to the candidate rectangles. Returns a FaceLattice, or None when fewer than
+#			 - MinStickers candidates agree on a grid. Tolerance is the distance (in pitches) allowed between
+#			 - a candidate and the centre of its cell.
+#----------------------------------------------------------------------------------------------------------
+
+def FitLattice(Rect_l, MinStickers=5, Tolerance=0.25):
+
+	n = len(Rect_l)
+	if n < MinStickers:
+		return None
+
+	Centers = Centroids(Rect_l)
+	E1, E2 = SideVectors(Rect_l)
+	Bases = np.stack((E1, E2), axis=2)
+	if (np.abs(np.linalg.det(Bases)) < 1e-6).any():
+		return None
+
+	# Coordinates of every candidate j in the sides of every candidate i: Coordinates[i, j]
+	Coordinates = np.einsum('iab,ijb->ija', np.linalg.inv(Bases), Centers[None,:,:] - Centers[:,None,:])
+	Ratio = PitchRatio(Coordinates)
+	Grid = Coordinates/Ratio
+	Cells = np.round(Grid)
+	Fits = np.abs(Grid - Cells).max(axis=2) < Tolerance
+
+	#--------------------------------------------------------------
+	# Consensus: hypothesis i with the 3x3 window (offset) holding
+	# the most distinct cells, all of them evaluated at once.
+	#--------------------------------------------------------------
+
+	u = Cells[:,None,:,0] - WINDOWS[None,:,None,0]
+	v = Cells[:,None,:,1] - WINDOWS[None,:,None,1]
+	Inside = Fits[:,None,:] & (u >= 0) & (u <= 2) & (v >= 0) & (v <= 2)
+	Occupied = np.bitwise_or.reduce(np.where(Inside, 1 << np.clip(3*v + u, 0, 8).astype(np.int64), 0), axis=2)
+	Distinct = BIT_COUNT[Occupied]
+
+	i, w = np.unravel_index(np.argmax(Distinct), Distinct.shape)
+	if Distinct[i,w] < MinStickers:
+		return None
+	ou, ov = WINDOWS[w]
+	Inside = Inside[i,w]
+
+	#--------------------------------------------------------------
+	# Model of the grid: grid coordinates --> image. One candidate
+	# per cell, the closest to the centre of the cell.
+	#--------------------------------------------------------------
+
+	Members = {}
+	for j in np.flatnonzero(Inside):
+		Cell = (int(Cells[i,j,0] - ou), int(Cells[i,j,1] - ov))
+		Error = np.abs(Grid[i,j] - Cells[i,j]).max()
+		if (Cell not in Members) or (Error < Members[Cell][1]):
+			Members[Cell] = (j, Error)
+
+	Source = np.array([Cell for Cell in Members], np.float64)
+	Target = np.array([Centers[j] for j, Error in Members.values()], np.float64)
+	Pitch = Ratio*np.mean([np.linalg.norm(E1[i]), np.linalg.norm(E2[i])])
+
+	Model = None
+	if len(Source) >= 5:
+		Model = cv2.findHomography(Source, Target, cv2.RANSAC, Tolerance*Pitch)[0]
+	if Model is None:
+		Affine = cv2.estimateAffine2D(Source, Target, method=cv2.RANSAC, ransacReprojThreshold=Tolerance*Pitch)[0]
+		if Affine is None:
+			return None
+		Model = np.vstack((Affine, (0, 0, 1)))
+
+	Points = cv2.perspectiveTransform(CELLS.reshape(-1,1,2), Model).reshape(3,3,2)
+
+	Observed = np.zeros((3,3), bool)
+	Residual = np.zeros((3,3))
+	for (u, v), (j, Error) in Members.items():
+		Observed[v,u] = True
+		Residual[v,u] = np.linalg.norm(Centers[j] - Points[v,u])/Pitch
+
+	#--------------------------------------------------------------
+	# Canonical orientation: columns rightward and rows downward
+	# in the image, whatever the sides of the hypothesis were.
+	#--------------------------------------------------------------
+
+	Columns = Points[:,2] - Points[:,0]
+	Rows = Points[2,:] - Points[0,:]
+	if np.abs(Columns[:,0]).sum() < np.abs(Rows[:,0]).sum():
+		Points, Observed, Residual = Points.transpose(1,0,2), Observed.T, Residual.T
+		Columns, Rows = Rows, Columns
+	if Columns[:,0].sum() < 0:
+		Points, Observed, Residual = Points[:,::-1], Observed[:,::-1], Residual[:,::-1]
+	if Rows[:,1].sum() < 0:
+		Points, Observed, Residual = Points[::-1], Observed[::-1], Residual[::-1]
+
+	return FaceLattice(np.ascontiguousarray(Points), np.ascontiguousarray(Observed), np.ascontiguousarray(Residual), Pitch)
+
+#----------------------------------------------------------------------------------------------------------
+# ClassifyLattice - Color and confidence (0 - 1) of each cell of the lattice. The color is the median of a
+#				  - patch around the central point; the confidence is the fraction of the pixels of the
+#				  - patch labelled with that color, lowered by the residual of the observed cells and by
+#				  - INFERRED_WEIGHT for the inferred ones. Cells outside the image have no color ('Z').
+#----------------------------------------------------------------------------------------------------------
+
+def ClassifyLattice(Lattice, hsv, Labels, Table, Radius=4):
+
+	Points = Lattice.MatrixPoints.reshape(-1,2)
+	Inside = (Points[:,0] >= 0) & (Points[:,1] >= 0) & (Points[:,0] < hsv.shape[1]) & (Points[:,1] < hsv.shape[0])
+	Points = Points.astype(int)
+
+	Values = Table.ClassifyValues(SampleStickers(hsv, Points, Radius))
+	Values[~Inside] = 0
+
+	Agreement = (Patches(Labels, Points, Radius) == Values[:,None]).mean(axis=1)
+	Weight = np.where(Lattice.Observed.ravel(), np.clip(1 - 2*Lattice.Residual.ravel(), 0, 1), INFERRED_WEIGHT)
+	Confidence = np.where(Values > 0, Agreement*Weight, 0.0)
+
+	return np.array(COLORS)[Values].reshape(3,3), Confidence.reshape(3,3)
@@ -0,0 +1,170 @@
+
+##################################################
+## VISUAL RUBIK'S CUBE SOLVER - SESSION SERVER
+
+# Runs many solving stations (cameras, video files or folders of images) on
+# one multi-core machine. Each source is processed by its own CubeSession
+# (see Headless.RunHeadless) in a pool of worker processes, so the number of
+# sources processed at the same time scales with the number of cores, and
+# the structured result of each session is returned to the parent process as
+# soon as it finishes.
+
+# Usage: python SessionServer.py <source> [<source> ...] [--workers 4]
+#		 [--output results.json]
+# A source made of digits is a camera index (e.g. 0).
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import cv2
+from Headless import RunHeadless
+from ColorProfiles import PROFILE_FILE as COLORS_FILE, ProfileStore
+from SolutionCache import SolutionCache
+from CubeSolver import MOVE_COSTS
+
+
+#----------------------------------------------------------------------------------------------------------
+# Worker - State of each worker process, created once by StartWorker: the color table and the cache.
+#----------------------------------------------------------------------------------------------------------
+
+WORKER = {}
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# StartWorker - Initialization of a worker process. The color table is compiled once per process, and
+#			  - OpenCV runs on one thread so the workers do not compete for the cores.
+#----------------------------------------------------------------------------------------------------------
+
+def StartWorker(ColorsFile, Colors, CachePath):
+
+	cv2.setNumThreads(1)
+	WORKER['Table'] = ProfileStore(ColorsFile, Colors).Current.Table
+	WORKER['Cache'] = SolutionCache(CachePath) if CachePath else None
+
+#----------------------------------------------------------------------------------------------------------
+# RunSource - Body of a worker: processes one source and returns (Index, Result). An unexpected error of
+#			- one source is returned in its result, so it does not stop the other sessions. A source without
+#			- frames (e.g. a camera that can not be opened) is reported as a 'SourceError'.
+#----------------------------------------------------------------------------------------------------------
+
+def RunSource(Job):
+
+	Index, Source, Options = Job
+	Start = time.perf_counter()
+
+	try:
+		Result = RunHeadless(CameraIndex(Source), WORKER['Table'], Cache=WORKER['Cache'], **Options)
+	except Exception as e:
+		Result = {'frames': 0, 'solved': False, 'error': {'type': type(e).__name__, 'message': str(e)}}
+
+	if (Result['frames'] == 0) and (Result['error'] is None):
+		Result['error'] = {'type': 'SourceError', 'message': 'No frame could be read from the source'}
+
+	Result['source'] = Source
+	Result['worker'] = os.getpid()
+	Result['seconds'] = time.perf_counter() - Start
+
+	return Index, Result
+
+#----------------------------------------------------------------------------------------------------------
+# CameraIndex - A source made of digits is the index of a camera.
+#----------------------------------------------------------------------------------------------------------
+
+def CameraIndex(Source):
+	return int(Source) if Source.isdigit() else Source
+
+#----------------------------------------------------------------------------------------------------------
+# SessionServer - Pool of Workers processes (one per core by default) running the sessions. ColorsFile and
+#				- Colors select the color profile (see ColorProfiles), Cache is the SQLite file of the
+#				- solution cache shared by the workers, and the remaining Options are given to RunHeadless
+#				- (e.g. MaxFrames, Track, AutoCalibrate, Scale, Costs).
+#----------------------------------------------------------------------------------------------------------
+
+class SessionServer:
+
+	def __init__(self, Workers=None, ColorsFile=COLORS_FILE, Colors=None, Cache=None, **Options):
+
+		self.Workers = Workers if Workers else os.cpu_count()
+		self.Options = Options
+		self.Pool = multiprocessing.Pool(self.Workers, StartWorker, (ColorsFile, Colors, Cache))
+
+	#------------------------------------------------------------------------------------------------------
+	# Stream - Processes the sources and yields (Index, Result) as each session finishes.
+	#------------------------------------------------------------------------------------------------------
+
+	def Stream(self, Sources):
+
+		Jobs = [(Index, str(Source), self.Options) for Index, Source in enumerate(Sources)]
+		yield from self.Pool.imap_unordered(RunSource, Jobs, chunksize=1)
+
+	#------------------------------------------------------------------------------------------------------
+	# Run - Processes the sources and returns their results in the order of the sources.
+	#------------------------------------------------------------------------------------------------------
+
+	def Run(self, Sources):
+
+		Results = [None]*len(Sources)
+		for Index, Result in self.Stream(Sources):
+			Results[Index] = Result
+
+		return Results
+
+	#------------------------------------------------------------------------------------------------------
+	# Close - Waits for the workers to finish and stops them.
+	#------------------------------------------------------------------------------------------------------
+
+	def Close(self):
+
+		self.Pool.close()
+		self.Pool.join()
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# MAIN
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+if __name__ == '__main__':
+
+	Parser = argparse.ArgumentParser(description="Visual Rubik's Cube Solver for many cameras or videos at once")
+	Parser.add_argument('sources', nargs='+', help='camera indexes, video files or folders of images')
+	Parser.add_argument('--workers', type=int, default=None, help='worker processes (one per core by default)')
+	Parser.add_argument('--max-frames', type=int, default=None, help='stop each session after this number of frames')
+	Parser.add_argument('--output', default=None, help='write the results to this JSON file')
+	Parser.add_argument('--cache', default=None, help='SQLite file of the solution cache')
+	Parser.add_argument('--track', action='store_true', help='follow the cube over the whole frame instead of the fixed crop')
+	Parser.add_argument('--colors', default=None, help='color profile (lighting preset) of the colors file')
+	Parser.add_argument('--colors-file', default=COLORS_FILE, help='JSON file of the color profiles (see ColorProfiles)')
+	Parser.add_argument('--scale', type=float, default=1.0, help='find the stickers in the frame downscaled by this factor (e.g. 0.5): about 2x faster, but misses more tilted and noisy faces (see FindRectangles)')
+	Parser.add_argument('--auto-calibrate', action='store_true', help='calibrate the colors from the scanned faces')
+	Parser.add_argument('--cheapest', action='store_true', help='guide the cheapest solution with MOVE_COSTS (B takes a rotation more)')
+	Args = Parser.parse_args()
+
+	Server = SessionServer(Args.workers, Args.colors_file, Args.colors, Args.cache, MaxFrames=Args.max_frames, Track=Args.track, AutoCalibrate=Args.auto_calibrate, Scale=Args.scale, Costs=MOVE_COSTS if Args.cheapest else None)
+	Start = time.perf_counter()
+	Results = [None]*len(Args.sources)
+
+	for Index, Result in Server.Stream(Args.sources):
+		Results[Index] = Result
+		Error = Result['error']['type'] if Result['error'] else '-'
+		print(f"{Result['source']}: {Result['frames']} frames in {Result['seconds']:.1f}s, solved {Result['solved']}, error {Error}")
+
+	Server.Close()
+	Elapsed = time.perf_counter() - Start
+	Frames = sum(Result['frames'] for Result in Results)
+	print(f'{len(Results)} sessions, {Frames} frames in {Elapsed:.1f}s ({Frames/Elapsed:.1f} frames/s) with {Server.Workers} workers')
+
+	if Args.output:
+		with open(Args.output, 'w') as f:
+			json.dump(Results, f, indent=2)
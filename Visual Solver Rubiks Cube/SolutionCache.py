@@ -0,0 +1,153 @@
+
+##################################################
+## SOLUTION CACHE
+
+# Memoization of the Kociemba's solutions of the Visual Rubik's Cube Solver,
+# keyed by the 54 characters of sKociemba and the search that found them
+# (e.g. its maximum length and cost model, see CubeSolver.SearchModel), so
+# the solutions of different searches are not mixed. The recently used solutions are
+# kept in memory (LRU) on top of a SQLite file that survives restarts and is
+# limited in size (the least recently used solutions are evicted). Both the
+# solution and its disaggregated form (see DisaggregatedSolution) are stored,
+# with every candidate of the search (see CubeSolver.SolveCandidates) and
+# whether the search was complete: the candidates found while the search goes
+# on are kept as the best so far, which a later search may replace.
+
+# Several processes may share the file (e.g. the workers of SessionServer):
+# it is opened in WAL mode, so the readers do not block the writer, and a
+# write waits up to BUSY_TIMEOUT seconds for the lock of another process.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import collections
+import sqlite3
+import time
+
+
+#----------------------------------------------------------------------------------------------------------
+# Busy timeout - Seconds a process waits for the file locked by another one before "database is locked".
+#----------------------------------------------------------------------------------------------------------
+
+BUSY_TIMEOUT = 30.0
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# CacheKey - Key of the solution of a state found by the search Model ('' for any search).
+#----------------------------------------------------------------------------------------------------------
+
+def CacheKey(sKociemba, Model=''):
+	return f'{sKociemba} {Model}' if Model else sKociemba
+
+#----------------------------------------------------------------------------------------------------------
+# SolutionCache - MemoryEntries - solutions kept in memory
+#				- DiskEntries	- solutions kept in the file at Path (None keeps only the memory layer)
+#----------------------------------------------------------------------------------------------------------
+
+class SolutionCache:
+
+	def __init__(self, Path='SolutionCache.sqlite', MemoryEntries=256, DiskEntries=10000):
+
+		self.Memory = collections.OrderedDict()
+		self.MemoryEntries = MemoryEntries
+		self.DiskEntries = DiskEntries
+		self.Hits = 0
+		self.Misses = 0
+
+		self.Disk = None
+		if Path is not None:
+			self.Disk = sqlite3.connect(Path, timeout=BUSY_TIMEOUT)
+			self.Disk.execute('PRAGMA journal_mode=WAL')
+			self.Disk.execute('CREATE TABLE IF NOT EXISTS solutions (state TEXT PRIMARY KEY, solution TEXT, disaggregated TEXT, used REAL, complete INTEGER DEFAULT 1, candidates TEXT DEFAULT \'\')')
+			Columns = [Column[1] for Column in self.Disk.execute('PRAGMA table_info(solutions)')]
+			if 'complete' not in Columns:
+				self.Disk.execute('ALTER TABLE solutions ADD COLUMN complete INTEGER DEFAULT 1')
+			if 'candidates' not in Columns:
+				self.Disk.execute('ALTER TABLE solutions ADD COLUMN candidates TEXT DEFAULT \'\'')
+			self.Disk.execute('CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)')
+			self.Disk.commit()
+
+	#------------------------------------------------------------------------------------------------------
+	# Get - Returns (Solution, Disaggregated, Complete, Candidates): the moves as new lists (e.g. ["R", "U'",
+	#	  - "F2"]), False for the best solutions so far of an incomplete search, and the candidates of the
+	#	  - search, the best first (the Solution). None when the state was never solved by the search Model.
+	#------------------------------------------------------------------------------------------------------
+
+	def Get(self, sKociemba, Model=''):
+
+		Key = CacheKey(sKociemba, Model)
+		Entry = self.Memory.get(Key)
+
+		if Entry is not None:
+			self.Memory.move_to_end(Key)
+
+		elif self.Disk is not None:
+			Row = self.Disk.execute('SELECT solution, disaggregated, complete, candidates FROM solutions WHERE state = ?', (Key,)).fetchone()
+			if Row is not None:
+				Entry = (tuple(Row[0].split()), tuple(Row[1].split()), bool(Row[2]), tuple(tuple(Candidate.split()) for Candidate in Row[3].split(',') if Candidate) or (tuple(Row[0].split()),))
+				self.Disk.execute('UPDATE solutions SET used = ? WHERE state = ?', (time.time(), Key))
+				self.Disk.commit()
+				self.Remember(Key, Entry)
+
+		if Entry is None:
+			self.Misses = self.Misses + 1
+			return None
+
+		self.Hits = self.Hits + 1
+		return list(Entry[0]), list(Entry[1]), Entry[2], [list(Candidate) for Candidate in Entry[3]]
+
+	#------------------------------------------------------------------------------------------------------
+	# Put - Stores the solution of a state found by the search Model in memory and on disk, with the other
+	#	  - Candidates of the search (only the Solution by default). Complete is False for the best
+	#	  - solutions so far of a search still going on.
+	#------------------------------------------------------------------------------------------------------
+
+	def Put(self, sKociemba, Solution, Disaggregated, Model='', Complete=True, Candidates=None):
+
+		Key = CacheKey(sKociemba, Model)
+		Candidates = [Solution] if Candidates is None else Candidates
+		Entry = (tuple(str(Move) for Move in Solution), tuple(str(Move) for Move in Disaggregated), bool(Complete), tuple(tuple(str(Move) for Move in Candidate) for Candidate in Candidates))
+		self.Remember(Key, Entry)
+
+		if self.Disk is not None:
+			self.Disk.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?)', (Key, ' '.join(Entry[0]), ' '.join(Entry[1]), time.time(), int(Entry[2]), ','.join(' '.join(Candidate) for Candidate in Entry[3])))
+			self.Evict()
+			self.Disk.commit()
+
+	#------------------------------------------------------------------------------------------------------
+	# Remember - Adds an entry to the memory layer, forgetting the least recently used one when it is full.
+	#------------------------------------------------------------------------------------------------------
+
+	def Remember(self, Key, Entry):
+
+		self.Memory[Key] = Entry
+		self.Memory.move_to_end(Key)
+		while len(self.Memory) > self.MemoryEntries:
+			self.Memory.popitem(last=False)
+
+	#------------------------------------------------------------------------------------------------------
+	# Evict - Deletes the least recently used solutions of the file above DiskEntries.
+	#------------------------------------------------------------------------------------------------------
+
+	def Evict(self):
+
+		Excess = self.Disk.execute('SELECT COUNT(*) FROM solutions').fetchone()[0] - self.DiskEntries
+		if Excess > 0:
+			self.Disk.execute('DELETE FROM solutions WHERE state IN (SELECT state FROM solutions ORDER BY used LIMIT ?)', (Excess,))
+
+	#------------------------------------------------------------------------------------------------------
+	# Close - Closes the file.
+	#------------------------------------------------------------------------------------------------------
+
+	def Close(self):
+
+		if self.Disk is not None:
+			self.Disk.close()
+			self.Disk = None
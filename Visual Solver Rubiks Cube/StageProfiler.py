@@ -0,0 +1,175 @@
+
+##################################################
+## STAGE PROFILER
+
+# Timing of each stage of the Visual Rubik's Cube Solver main loop (capture,
+# crop, HSV conversion, mask, filter, contours, IdentifyPosCol, CreateMatrix,
+# solver, overlay...). The latencies of the last frames of each stage are kept
+# as a rolling window, shown as an on-screen HUD and dumped to a CSV or JSON
+# file.
+
+# Usage:
+# with Profiler.Stage('findContours'):
+#     contours = cv2.findContours(...)
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import collections
+import csv
+import json
+import time
+import cv2
+import numpy as np
+
+
+#----------------------------------------------------------------------------------------------------------
+# Histogram bins (ms) - Logarithmic from 10us to 10s, the same for every stage so they can be compared.
+#----------------------------------------------------------------------------------------------------------
+
+BINS_MS = np.logspace(-2, 4, 25)
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# StageTimer - Context manager that adds the time spent inside it to one stage of the profiler.
+#----------------------------------------------------------------------------------------------------------
+
+class StageTimer:
+
+	def __init__(self, Samples):
+		self.Samples = Samples
+		self.Start = 0.0
+
+	def __enter__(self):
+		self.Start = time.perf_counter()
+		return self
+
+	def __exit__(self, *Exception):
+		self.Samples.append(time.perf_counter() - self.Start)
+		return False
+
+#----------------------------------------------------------------------------------------------------------
+# NullTimer - Context manager that does nothing, used when the profiling is disabled.
+#----------------------------------------------------------------------------------------------------------
+
+class NullTimer:
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *Exception):
+		return False
+
+#----------------------------------------------------------------------------------------------------------
+# StageProfiler - Rolling window of the last Window latencies (seconds) of each stage, in the order the
+#				- stages were first seen.
+#----------------------------------------------------------------------------------------------------------
+
+class StageProfiler:
+
+	def __init__(self, Window=300):
+
+		self.Window = Window
+		self.Samples = collections.OrderedDict()
+		self.Timers = {}
+		self.Totals = collections.Counter()
+
+	#------------------------------------------------------------------------------------------------------
+	# Stage - Timer of a stage. The timers are reused so profiling a stage does not allocate.
+	#------------------------------------------------------------------------------------------------------
+
+	def Stage(self, Name):
+
+		if Name not in self.Timers:
+			self.Samples[Name] = collections.deque(maxlen=self.Window)
+			self.Timers[Name] = StageTimer(self.Samples[Name])
+
+		self.Totals[Name] += 1
+		return self.Timers[Name]
+
+	#------------------------------------------------------------------------------------------------------
+	# Summary - Count, mean and percentiles (ms) of each stage over the rolling window.
+	#------------------------------------------------------------------------------------------------------
+
+	def Summary(self):
+
+		Summary = collections.OrderedDict()
+
+		for Name, Samples in self.Samples.items():
+			if not Samples:
+				continue
+			ms = np.array(Samples)*1000
+			Summary[Name] = {'count': self.Totals[Name],
+							 'mean_ms': float(ms.mean()),
+							 'p50_ms': float(np.percentile(ms, 50)),
+							 'p90_ms': float(np.percentile(ms, 90)),
+							 'p99_ms': float(np.percentile(ms, 99)),
+							 'max_ms': float(ms.max())}
+
+		return Summary
+
+	#------------------------------------------------------------------------------------------------------
+	# Histograms - Latency histogram of each stage over the rolling window (counts per bin of BINS_MS).
+	#------------------------------------------------------------------------------------------------------
+
+	def Histograms(self):
+
+		return collections.OrderedDict((Name, np.histogram(np.array(Samples)*1000, BINS_MS)[0].tolist())
+									   for Name, Samples in self.Samples.items())
+
+	#------------------------------------------------------------------------------------------------------
+	# DrawHud - Draws the p50 / p99 latency of each stage on the frame.
+	#------------------------------------------------------------------------------------------------------
+
+	def DrawHud(self, frame, Origin=(10, 20)):
+
+		x, y = Origin
+		cv2.putText(frame, 'stage        p50 ms   p99 ms', (x, y), cv2.FONT_HERSHEY_PLAIN, 1, (0, 255, 255), 1, cv2.LINE_AA)
+
+		for Name, Stats in self.Summary().items():
+			y = y + 15
+			Text = f"{Name[:12]:<12} {Stats['p50_ms']:7.2f}  {Stats['p99_ms']:7.2f}"
+			cv2.putText(frame, Text, (x, y), cv2.FONT_HERSHEY_PLAIN, 1, (0, 255, 255), 1, cv2.LINE_AA)
+
+	#------------------------------------------------------------------------------------------------------
+	# Dump - Writes the summary to a CSV file (one row per stage) or, for any other extension, the summary
+	#	   - and the histograms to a JSON file.
+	#------------------------------------------------------------------------------------------------------
+
+	def Dump(self, Path):
+
+		Summary = self.Summary()
+
+		if Path.lower().endswith('.csv'):
+			with open(Path, 'w', newline='') as f:
+				Writer = csv.writer(f)
+				Writer.writerow(['stage', 'count', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'])
+				for Name, Stats in Summary.items():
+					Writer.writerow([Name] + [Stats[k] for k in ('count', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms')])
+		else:
+			with open(Path, 'w') as f:
+				json.dump({'window': self.Window,
+						   'bins_ms': BINS_MS.tolist(),
+						   'stages': Summary,
+						   'histograms': self.Histograms()}, f, indent=2)
+
+#----------------------------------------------------------------------------------------------------------
+# NullProfiler - Profiler that measures nothing. It is the default of the pipeline so the stages can always
+#			   - be wrapped in Profiler.Stage(...) at almost no cost.
+#----------------------------------------------------------------------------------------------------------
+
+class NullProfiler:
+
+	Timer = NullTimer()
+
+	def Stage(self, Name):
+		return self.Timer
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,159 @@
+
+##################################################
+## SYNTHETIC CUBE
+
+# Renders synthetic camera frames of a cube's face with known colors, so the
+# pipeline of the Visual Rubik's Cube Solver can be measured without a camera.
+# The pose (position, scale, rotation and tilt), the lighting, the noise and
+# the blur can be configured. Each frame comes with its ground truth.
+##################################################
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# LIBRARIES
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+import cv2
+import numpy as np
+from CubeVision import ColorRanges
+
+
+#----------------------------------------------------------------------------------------------------------
+# Geometry of the rendered face at Scale=1, in pixels. With these values the stickers have the area
+# expected by FindRectangles (1117 - 2441) and the face fits in its crop.
+#----------------------------------------------------------------------------------------------------------
+
+STICKER = 40
+PITCH = 47
+BORDER = 6
+FOCAL = 800
+
+#----------------------------------------------------------------------------------------------------------
+# Crop used by FindRectangles: frame[100:350, 150:500]. The face is rendered at its centre by default.
+#----------------------------------------------------------------------------------------------------------
+
+CROP_ORIGIN = (150, 100)
+CROP_CENTER = (325, 225)
+
+
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+# FUNCTIONS DEFINITIONS
+#//////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+#----------------------------------------------------------------------------------------------------------
+# NominalColors - BGR color of each sticker, the centre of the widest calibrated range of each color (e.g.
+#			   - the second white range, the first one only accepts a hue of 0).
+#----------------------------------------------------------------------------------------------------------
+
+def NominalColors(Ranges=None):
+
+	if Ranges is None:
+		Ranges = ColorRanges()
+
+	Widest = {}
+	for Color, Lower, Upper in Ranges:
+		Lower, Upper = np.asarray(Lower), np.asarray(Upper)
+		Volume = np.prod(Upper - Lower + 1)
+		if (Color not in Widest) or (Volume > Widest[Color][0]):
+			Widest[Color] = (Volume, (Lower + Upper)//2)
+
+	Colors = {}
+	for Color, (Volume, HSV) in Widest.items():
+		Colors[Color] = tuple(int(c) for c in cv2.cvtColor(np.uint8([[HSV]]), cv2.COLOR_HSV2BGR)[0,0])
+
+	return Colors
+
+#----------------------------------------------------------------------------------------------------------
+# Project - Projects points of the face plane (x right, y down, origin at the central sticker) into the
+#		  - image. The face is rotated Angle degrees in the image plane and tilted Tilt=(about x, about y)
+#		  - degrees towards the camera with a pinhole model.
+#----------------------------------------------------------------------------------------------------------
+
+def Project(Points, Center, Scale, Angle, Tilt):
+
+	ax, ay = np.radians(Tilt)
+	az = np.radians(Angle)
+
+	Rx = np.array([[1,0,0],[0,np.cos(ax),-np.sin(ax)],[0,np.sin(ax),np.cos(ax)]])
+	Ry = np.array([[np.cos(ay),0,np.sin(ay)],[0,1,0],[-np.sin(ay),0,np.cos(ay)]])
+	Rz = np.array([[np.cos(az),-np.sin(az),0],[np.sin(az),np.cos(az),0],[0,0,1]])
+
+	Points = np.asarray(Points, np.float64).reshape(-1,2)*Scale
+	P = np.column_stack((Points, np.zeros(len(Points)))) @ (Rz @ Ry @ Rx).T
+	Depth = FOCAL + P[:,2]
+
+	return np.column_stack((FOCAL*P[:,0]/Depth + Center[0], FOCAL*P[:,1]/Depth + Center[1]))
+
+#----------------------------------------------------------------------------------------------------------
+# RenderFace - Renders a frame with a face of the given 3x3 colors (e.g. [['r','w','g'],...]). Returns the
+#			 - BGR frame and the ground truth: the colors and the central point of each sticker (3x3x2,
+#			 - in the coordinates of the crop used by FindRectangles).
+#			 - Lighting - gain applied to the whole frame (1 = calibrated light)
+#			 - Gradient - extra gain from the left to the right of the face (e.g. 0.3 = +-15%)
+#			 - Noise	- standard deviation of the gaussian noise of each pixel
+#			 - Blur		- standard deviation of the gaussian blur (0 = sharp)
+#----------------------------------------------------------------------------------------------------------
+
+def RenderFace(Colors, Size=(640,480), Center=CROP_CENTER, Scale=1.0, Angle=0.0, Tilt=(0.0,0.0),
+			   Lighting=1.0, Gradient=0.0, Noise=0.0, Blur=0.0, Background=(35,35,35), Palette=None, Rng=None):
+
+	if Palette is None:
+		Palette = NominalColors()
+	if Rng is None:
+		Rng = np.random.default_rng()
+
+	frame = np.empty((Size[1], Size[0], 3), np.float32)
+	frame[:] = Background
+
+	# Black plastic of the cube
+	Half = 1.5*PITCH + BORDER
+	Body = Project([(-Half,-Half),(Half,-Half),(Half,Half),(-Half,Half)], Center, Scale, Angle, Tilt)
+	cv2.fillConvexPoly(frame, np.round(Body*16).astype(np.int32), (10,10,10), cv2.LINE_AA, 4)
+
+	# Stickers
+	Points = np.zeros((3,3,2))
+	h = STICKER/2
+	for row in range(3):
+		for col in range(3):
+			x, y = (col-1)*PITCH, (row-1)*PITCH
+			Quad = Project([(x-h,y-h),(x+h,y-h),(x+h,y+h),(x-h,y+h)], Center, Scale, Angle, Tilt)
+			cv2.fillConvexPoly(frame, np.round(Quad*16).astype(np.int32), Palette[Colors[row][col]], cv2.LINE_AA, 4)
+			Points[row][col] = Project([(x,y)], Center, Scale, Angle, Tilt)[0] - CROP_ORIGIN
+
+	# Lighting, noise and blur
+	if Gradient:
+		x = np.linspace(-0.5, 0.5, Size[0], dtype=np.float32)
+		frame *= (1 + Gradient*x)[None,:,None]
+	frame *= Lighting
+	if Blur > 0:
+		frame = cv2.GaussianBlur(frame, (0,0), Blur)
+	if Noise > 0:
+		frame += Rng.normal(0, Noise, frame.shape).astype(np.float32)
+
+	frame = np.clip(frame, 0, 255).astype(np.uint8)
+
+	return frame, {'colors': np.array(Colors), 'points': Points}
+
+#----------------------------------------------------------------------------------------------------------
+# RandomColors - Random 3x3 face with the given central color. Any sticker can have any color.
+#----------------------------------------------------------------------------------------------------------
+
+def RandomColors(Center, Rng):
+
+	Colors = Rng.choice(list('bgyorw'), size=(3,3))
+	Colors[1][1] = Center
+
+	return Colors
+
+#----------------------------------------------------------------------------------------------------------
+# RandomPose - Random position, scale, rotation and tilt that keep the face inside the crop and its
+#			 - stickers inside the area thresholds. Jitter in [0, 1] scales how far from the nominal pose
+#			 - it can go.
+#----------------------------------------------------------------------------------------------------------
+
+def RandomPose(Rng, Jitter=1.0):
+
+	return {'Center': (CROP_CENTER[0] + Rng.uniform(-20,20)*Jitter, CROP_CENTER[1] + Rng.uniform(-10,10)*Jitter),
+			'Scale': 1 + Rng.uniform(-0.1,0.1)*Jitter,
+			'Angle': Rng.uniform(-8,8)*Jitter,
+			'Tilt': (Rng.uniform(-15,15)*Jitter, Rng.uniform(-15,15)*Jitter)}
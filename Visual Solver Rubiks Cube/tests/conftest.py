@@ -0,0 +1,14 @@
+##################################################
+## TESTS
+
+# Unit tests of the parts of the Visual Rubik's Cube Solver that can be
+# checked without a camera. The modules of the solver are imported by name,
+# as its scripts do, so their folder is added to the path. Run with:
+
+# python -m pytest "Visual Solver Rubiks Cube/tests"
+##################################################
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
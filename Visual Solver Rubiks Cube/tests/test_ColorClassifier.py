@@ -0,0 +1,80 @@
+##################################################
+## COLOR CLASSIFIER TESTS
+
+# The lookup table of ColorTable must give every pixel the color of the first
+# range of the list that contains it (cv2.inRange in the priority order of
+# IdentifyPosCol), and 'Z' outside every range.
+##################################################
+
+import cv2
+import numpy as np
+from ColorClassifier import COLORS, ColorTable
+from CubeVision import ColorRanges
+
+
+#----------------------------------------------------------------------------------------------------------
+# InRangeLabels - Reference labels: cv2.inRange of each range, the first range of the list wins.
+#----------------------------------------------------------------------------------------------------------
+
+def InRangeLabels(hsv, Ranges):
+
+	Labels = np.zeros(hsv.shape[:2], np.uint8)
+	for Color, Lower, Upper in reversed(Ranges):
+		Labels[cv2.inRange(hsv, np.array(Lower), np.array(Upper)) > 0] = COLORS.index(Color)
+
+	return Labels
+
+#----------------------------------------------------------------------------------------------------------
+# Values - Random HSV image plus the corners of every range and their neighbours, where the priority order
+#		 - and the inclusive bounds matter.
+#----------------------------------------------------------------------------------------------------------
+
+def Values(Ranges, Rng):
+
+	Edges = []
+	for Color, Lower, Upper in Ranges:
+		for h in (Lower[0]-1, Lower[0], Upper[0], Upper[0]+1):
+			for s in (Lower[1]-1, Lower[1], Upper[1], Upper[1]+1):
+				for v in (Lower[2]-1, Lower[2], Upper[2], Upper[2]+1):
+					Edges.append((h, s, v))
+	Edges = np.clip(np.array(Edges), 0, 255).astype(np.uint8)
+
+	Random = Rng.integers(0, 256, (200*200, 3), dtype=np.uint8)
+	Random[:,0] = Random[:,0] % 180
+
+	return np.concatenate((Edges, Random)).reshape(1, -1, 3)
+
+
+def test_table_matches_inrange_priority():
+
+	Ranges = ColorRanges()
+	hsv = Values(Ranges, np.random.default_rng(0))
+
+	assert np.array_equal(ColorTable(Ranges).Classify(hsv), InRangeLabels(hsv, Ranges))
+
+
+def test_overlapping_ranges_first_wins():
+
+	Ranges = [('r', [0, 0, 0], [100, 255, 255]), ('b', [50, 0, 0], [179, 255, 255])]
+	hsv = np.array([[[40, 10, 10], [75, 10, 10], [150, 10, 10]]], np.uint8)
+
+	assert ''.join(COLORS[Label] for Label in ColorTable(Ranges).Classify(hsv)[0]) == 'rrb'
+	assert ''.join(COLORS[Label] for Label in ColorTable(Ranges[::-1]).Classify(hsv)[0]) == 'rbb'
+
+
+def test_classify_values_matches_table():
+
+	Ranges = ColorRanges()
+	Table = ColorTable(Ranges)
+	hsv = Values(Ranges, np.random.default_rng(1))
+
+	assert np.array_equal(Table.ClassifyValues(hsv[0]), Table.Classify(hsv)[0])
+
+
+def test_quantized_table_keeps_the_values_in_range():
+
+	Ranges = ColorRanges()
+	hsv = Values(Ranges, np.random.default_rng(2))
+	Inside = InRangeLabels(hsv, Ranges) > 0
+
+	assert (ColorTable(Ranges, Quantization=2).Classify(hsv)[Inside] > 0).all()
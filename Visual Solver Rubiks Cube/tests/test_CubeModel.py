@@ -0,0 +1,88 @@
+##################################################
+## CUBE MODEL TESTS
+
+# Compact cube state of CubeModel: Encode / Decode, the facelet permutations
+# of the movements (Apply, ApplyBatch) and the whole cube orientations.
+##################################################
+
+import numpy as np
+from rubik_solver import utils
+from CubeModel import FACE_MOVES, FACE_ORDER, INVALID, MOVE_NAMES, ORIENTATIONS, Apply, ApplyBatch, Decode, Encode, Inverse, IsSolved
+
+SOLVED = ''.join(9*Face for Face in FACE_ORDER)
+COLORS = 'ybrgow'
+
+
+def Scramble(Rng, Length=25):
+
+	return [MOVE_NAMES[i] for i in Rng.integers(0, FACE_MOVES, Length)]
+
+
+def test_encode_decode_round_trip():
+
+	State = Apply(Encode(SOLVED), Scramble(np.random.default_rng(0)))
+	sKociemba = Decode(State, COLORS)
+
+	assert np.array_equal(Encode(sKociemba), State)
+	assert Decode(Encode([sKociemba, sKociemba]), COLORS) == [sKociemba, sKociemba]
+
+
+def test_color_without_centre_is_invalid():
+
+	State = Encode('x' + SOLVED[1:])
+
+	assert State[0] == INVALID
+	assert (np.delete(State, 0) != INVALID).all()
+
+
+def test_every_move_has_order_four_and_an_inverse():
+
+	State = Apply(Encode(SOLVED), Scramble(np.random.default_rng(1)))
+
+	for Move in MOVE_NAMES:
+		assert np.array_equal(Apply(State, 4*[Move]), State)
+		assert np.array_equal(Apply(State, [Move, Inverse(Move)]), State)
+	for Face in FACE_ORDER + 'xyz':
+		assert np.array_equal(Apply(State, Face + '2'), Apply(State, [Face, Face]))
+
+
+def test_moves_are_composed_in_order():
+
+	Rng = np.random.default_rng(2)
+	State = Apply(Encode(SOLVED), Scramble(Rng))
+	Moves = Scramble(Rng, 10)
+
+	Step = State
+	for Move in Moves:
+		Step = Apply(Step, Move)
+
+	assert np.array_equal(Apply(State, Moves), Step)
+	assert np.array_equal(Apply(Encode(SOLVED), 6*['R', 'U', "R'", "U'"]), Encode(SOLVED))
+
+
+def test_batch_matches_single_states():
+
+	Rng = np.random.default_rng(3)
+	States = np.array([Apply(Encode(SOLVED), Scramble(Rng)) for i in range(20)])
+	Moves = Rng.integers(0, len(MOVE_NAMES), 20)
+
+	for State, Move, Row in zip(States, Moves, ApplyBatch(States, Moves)):
+		assert np.array_equal(Apply(State, MOVE_NAMES[Move]), Row)
+
+
+def test_orientations_are_the_24_rotations():
+
+	Solved = Encode(SOLVED)
+	Rotated = {Apply(np.arange(54), Rotations).tobytes() for Rotations in ORIENTATIONS}
+
+	assert len(ORIENTATIONS) == len(Rotated) == 24
+	assert all(IsSolved(Apply(Solved, Rotations)) for Rotations in ORIENTATIONS)
+
+
+def test_kociemba_solution_solves_the_state():
+
+	State = Apply(Encode(SOLVED), Scramble(np.random.default_rng(4)))
+	Solution = [str(Move) for Move in utils.solve(Decode(State, COLORS), 'Kociemba')]
+
+	assert not IsSolved(State)
+	assert IsSolved(Apply(State, Solution))
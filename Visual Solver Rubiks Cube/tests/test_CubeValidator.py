@@ -0,0 +1,92 @@
+##################################################
+## CUBE VALIDATOR TESTS
+
+# ValidateState accepts every cube reached by turning the faces, and rejects
+# the usual scanning mistakes with their reason and the faces most likely
+# misread.
+##################################################
+
+import numpy as np
+from CubeModel import CORNER_FACELETS, EDGE_FACELETS, FACE_MOVES, FACE_ORDER, MOVE_NAMES, Apply, Decode, Encode
+from CubeValidator import ValidateState
+
+SOLVED = Encode(''.join(9*Face for Face in FACE_ORDER))
+COLORS = 'ybrgow'
+
+
+def Scrambled(Seed):
+
+	Rng = np.random.default_rng(Seed)
+
+	return Apply(SOLVED, [MOVE_NAMES[i] for i in Rng.integers(0, FACE_MOVES, 25)])
+
+
+def Types(sKociemba):
+
+	return [Error['type'] for Error in ValidateState(sKociemba).Errors]
+
+
+def test_scrambled_cubes_are_valid():
+
+	for Seed in range(50):
+		Validation = ValidateState(Decode(Scrambled(Seed), COLORS))
+		assert Validation.Valid and (Validation.Errors == []) and (Validation.Suspects == [])
+
+
+def test_duplicated_centre():
+
+	State = Scrambled(0)
+	State[9*FACE_ORDER.index('R') + 4] = State[9*FACE_ORDER.index('L') + 4]
+	Validation = ValidateState(Decode(State, COLORS))
+
+	assert Types(Decode(State, COLORS)) == ['DupedCenter']
+	assert set(Validation.Suspects) == {'L', 'R'}
+
+
+def test_misread_sticker():
+
+	State = Scrambled(1)
+	Facelet = 9*FACE_ORDER.index('F') + 0
+	State[Facelet] = (State[Facelet] + 1) % 6
+	Validation = ValidateState(Decode(State, COLORS))
+
+	assert (not Validation.Valid) and ('FaceletCount' in Types(Decode(State, COLORS)))
+	assert 'F' in Validation.Suspects
+
+
+def test_unknown_color():
+
+	sKociemba = list(Decode(Scrambled(2), COLORS))
+	sKociemba[9*FACE_ORDER.index('D') + 8] = 'Z'
+	Validation = ValidateState(''.join(sKociemba))
+
+	assert (not Validation.Valid) and ('D' in Validation.Suspects)
+
+
+def test_twisted_corner_flipped_edge_and_parity():
+
+	State = Scrambled(3)
+	Corner = CORNER_FACELETS[0]
+	Twisted = State.copy()
+	Twisted[Corner] = State[np.roll(Corner, 1)]
+	assert Types(Decode(Twisted, COLORS)) == ['CornerTwist']
+
+	Edge = EDGE_FACELETS[0]
+	Flipped = State.copy()
+	Flipped[Edge] = State[Edge[::-1]]
+	assert Types(Decode(Flipped, COLORS)) == ['EdgeFlip']
+
+	Swapped = State.copy()
+	Swapped[EDGE_FACELETS[0]] = State[EDGE_FACELETS[1]]
+	Swapped[EDGE_FACELETS[1]] = State[EDGE_FACELETS[0]]
+	assert Types(Decode(Swapped, COLORS)) == ['Parity']
+
+
+def test_face_scanned_turned():
+
+	State = Scrambled(4)
+	f = FACE_ORDER.index('B')
+	State[9*f:9*f+9] = np.rot90(State[9*f:9*f+9].reshape(3,3)).ravel()
+	Validation = ValidateState(Decode(State, COLORS))
+
+	assert (not Validation.Valid) and ('B' in Validation.Suspects)
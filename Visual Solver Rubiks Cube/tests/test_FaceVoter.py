@@ -0,0 +1,84 @@
+##################################################
+## FACE VOTER TESTS
+
+# Acceptance of the faces voted over several frames (see FaceVoter): a clear
+# face needs a few frames, a single bad frame does not change the result, and
+# another face or too many frames without a grid restart the votes.
+##################################################
+
+import numpy as np
+from FaceVoter import FaceVoter
+
+FACE = np.array([['r','w','g'], ['b','r','o'], ['y','y','w']])
+SURE = np.ones((3,3))
+
+
+def Votes(Voter, Colors, Frames, Confidence=SURE):
+
+	Accepted = []
+	for i in range(Frames):
+		Voter.Add(Colors, Confidence)
+		Accepted.append(Voter.Accepted())
+
+	return Accepted
+
+
+def test_clear_face_is_accepted_after_three_frames():
+
+	Voter = FaceVoter()
+
+	assert Votes(Voter, FACE, 3) == [False, False, True]
+	assert (Voter.Colors() == FACE).all()
+
+
+def test_doubtful_face_needs_more_frames():
+
+	Voter = FaceVoter()
+
+	assert Votes(Voter, FACE, 8, 0.5*SURE).index(True) == 7
+
+
+def test_single_bad_frame_does_not_change_the_colors():
+
+	Voter = FaceVoter()
+	Votes(Voter, FACE, 5)
+	Bad = FACE.copy()
+	Bad[0][0] = 'o'
+	Voter.Add(Bad, SURE)
+
+	assert (Voter.Colors() == FACE).all()
+
+
+def test_another_central_color_restarts_the_votes():
+
+	Voter = FaceVoter()
+	Votes(Voter, FACE, 5)
+	Other = np.full((3,3), 'b')
+
+	assert Votes(Voter, Other, 2) == [False, False]
+	assert (Voter.Colors() == Other).all()
+
+
+def test_frames_without_grid():
+
+	Voter = FaceVoter(MaxGap=2)
+	Votes(Voter, FACE, 3)
+	Voter.Miss()
+	Voter.Miss()
+	assert Voter.Accepted()
+
+	Voter.Miss()
+	assert (not Voter.Accepted()) and (Voter.Colors() is None)
+
+
+def test_unknown_color_ends_up_winning():
+
+	Voter = FaceVoter()
+	Unknown = FACE.copy()
+	Unknown[2][2] = 'Z'
+	Confidence = SURE.copy()
+	Confidence[2][2] = 0
+
+	Accepted = Votes(Voter, Unknown, 8, Confidence)
+	assert Accepted.index(True) == 7
+	assert Voter.Colors()[2][2] == 'Z'
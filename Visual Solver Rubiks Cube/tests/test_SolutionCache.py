@@ -0,0 +1,78 @@
+##################################################
+## SOLUTION CACHE TESTS
+
+# Memory and disk layers of SolutionCache: least recently used eviction, the
+# search model of the key, the complete flag and the candidates, and the
+# files written before those columns existed.
+##################################################
+
+import sqlite3
+from SolutionCache import SolutionCache
+
+STATE = 'U'*9 + 'L'*9 + 'F'*9 + 'R'*9 + 'B'*9 + 'D'*9
+
+
+def test_memory_evicts_least_recently_used():
+
+	Cache = SolutionCache(None, MemoryEntries=2)
+	Cache.Put('a', ['R'], ['R'])
+	Cache.Put('b', ['U'], ['U'])
+	Cache.Get('a')
+	Cache.Put('c', ['F'], ['F'])
+
+	assert Cache.Get('b') is None
+	assert Cache.Get('a')[0] == ['R']
+	assert Cache.Get('c')[0] == ['F']
+
+
+def test_disk_evicts_least_recently_used(tmp_path):
+
+	Path = str(tmp_path / 'cache.sqlite')
+	Cache = SolutionCache(Path, MemoryEntries=1, DiskEntries=2)
+	Cache.Put('a', ['R'], ['R'])
+	Cache.Put('b', ['U'], ['U'])
+	Cache.Get('a')
+	Cache.Put('c', ['F'], ['F'])
+	Cache.Close()
+
+	Cache = SolutionCache(Path, MemoryEntries=1, DiskEntries=2)
+	assert Cache.Get('b') is None
+	assert Cache.Get('a')[0] == ['R']
+	assert Cache.Get('c')[0] == ['F']
+
+
+def test_models_are_not_mixed():
+
+	Cache = SolutionCache(None)
+	Cache.Put(STATE, ['R2'], ['R', 'R'], 'depth=23')
+
+	assert Cache.Get(STATE, 'depth=23 costs=B2') is None
+	assert Cache.Get(STATE, 'depth=23')[:2] == (['R2'], ['R', 'R'])
+
+
+def test_complete_flag_and_candidates_survive_a_restart(tmp_path):
+
+	Path = str(tmp_path / 'cache.sqlite')
+	Cache = SolutionCache(Path)
+	Cache.Put(STATE, ['R2'], ['R', 'R'], 'm', Complete=False, Candidates=[['R2'], ["L'", 'B']])
+	Cache.Put('x', ['U'], ['U'], 'm')
+	Cache.Close()
+
+	Cache = SolutionCache(Path)
+	assert Cache.Get(STATE, 'm') == (['R2'], ['R', 'R'], False, [['R2'], ["L'", 'B']])
+	assert Cache.Get('x', 'm') == (['U'], ['U'], True, [['U']])
+
+
+def test_file_without_the_new_columns(tmp_path):
+
+	Path = str(tmp_path / 'cache.sqlite')
+	Disk = sqlite3.connect(Path)
+	Disk.execute('CREATE TABLE solutions (state TEXT PRIMARY KEY, solution TEXT, disaggregated TEXT, used REAL)')
+	Disk.execute("INSERT INTO solutions VALUES ('a', 'R2 U', 'R R U', 0)")
+	Disk.commit()
+	Disk.close()
+
+	Cache = SolutionCache(Path)
+	assert Cache.Get('a') == (['R2', 'U'], ['R', 'R', 'U'], True, [['R2', 'U']])
+	Cache.Put('b', ['F'], ['F'])
+	assert Cache.Get('b')[0] == ['F']